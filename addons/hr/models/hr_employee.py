@@ -661,6 +661,26 @@ We can redirect you to the public employee list."""
                                 domain=[('company_id', 'in', [False, self.company_id.id])])[self.resource_id.id]
         return calendar_intervals
 
+    def _get_expected_attendances_batch(self, date_from, date_to):
+        """ Batched version of `_get_expected_attendances`: the work intervals are computed
+        once per calendar, timezone and company for all the employees sharing them.
+
+        :return: dict {employee.id: Intervals}
+        """
+        res = {}
+        employees_by_calendar = self.grouped(lambda e: (e.resource_calendar_id or e.company_id.resource_calendar_id, e.tz, e.company_id))
+        for (calendar, tz, company), employees in employees_by_calendar.items():
+            calendar_intervals = calendar._work_intervals_batch(
+                date_from,
+                date_to,
+                tz=timezone(tz) if tz else None,
+                resources=employees.resource_id,
+                compute_leaves=True,
+                domain=[('company_id', 'in', [False, company.id])])
+            for employee in employees:
+                res[employee.id] = calendar_intervals[employee.resource_id.id]
+        return res
+
     def _get_calendar_attendances(self, date_from, date_to):
         self.ensure_one()
         employee_timezone = timezone(self.tz) if self.tz else None
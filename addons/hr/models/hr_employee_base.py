@@ -48,7 +48,7 @@ class HrEmployeeBase(models.AbstractModel):
     resource_calendar_id = fields.Many2one('resource.calendar', check_company=True)
     is_flexible = fields.Boolean(compute='_compute_is_flexible', store=True)
     is_fully_flexible = fields.Boolean(compute='_compute_is_flexible', store=True)
-    parent_id = fields.Many2one('hr.employee', 'Manager', compute="_compute_parent_id", store=True, readonly=False,
+    parent_id = fields.Many2one('hr.employee', 'Manager', compute="_compute_parent_id", store=True, readonly=False, index='btree_not_null',
         domain="['|', ('company_id', '=', False), ('company_id', 'in', allowed_company_ids)]")
     coach_id = fields.Many2one(
         'hr.employee', 'Coach', compute='_compute_coach', store=True, readonly=False,
@@ -126,13 +126,8 @@ class HrEmployeeBase(models.AbstractModel):
         if not active_department:
             self.member_of_department = False
         else:
-            def get_all_children(department):
-                children = department.child_ids
-                if not children:
-                    return self.env['hr.department']
-                return children + get_all_children(children)
-
-            child_departments = active_department + get_all_children(active_department)
+            # single query on the materialized path of the departments
+            child_departments = self.env['hr.department'].search([('id', 'child_of', active_department.id)])
             for employee in self:
                 employee.member_of_department = employee.department_id in child_departments
 
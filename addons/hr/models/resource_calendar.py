@@ -1,7 +1,13 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
-from odoo import models
-from odoo.tools import float_compare
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from pytz import timezone
+
+from odoo import api, models
+from odoo.tools import float_compare, ormcache
+
+from odoo.addons.resource.models.utils import Intervals
 
 
 class ResourceCalendar(models.Model):
@@ -16,3 +22,78 @@ class ResourceCalendar(models.Model):
     def _calculate_is_fulltime(self):
         self.ensure_one()
         return not float_compare(self.full_time_required_hours, self._calculate_hours_per_week(), 3)
+
+    def write(self, vals):
+        # invalidate the attendance intervals cache of `_get_attendance_interval_items`
+        self.env.registry.clear_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super().unlink()
+
+    def _attendance_intervals_batch(self, start_dt, end_dt, resources=None, domain=None, tz=None, lunch=False):
+        """ Override to share the expansion of the attendances between the resources of
+        the calendar: the intervals only depend on the calendar, the timezone and the
+        period, they are computed once per whole local days and kept in the registry
+        cache, then trimmed to the requested period.
+        Flexible resources and calendars keep the standard computation.
+        """
+        if len(self) != 1 or self.flexible_hours:
+            return super()._attendance_intervals_batch(start_dt, end_dt, resources=resources, domain=domain, tz=tz, lunch=lunch)
+        resources = resources or self.env['resource.resource']
+        flexible_resources = resources.filtered(lambda r: not r.calendar_id or r.calendar_id.flexible_hours)
+        result = {}
+        if flexible_resources:
+            result = super()._attendance_intervals_batch(start_dt, end_dt, resources=flexible_resources, domain=domain, tz=tz, lunch=lunch)
+
+        resources_per_tz = defaultdict(list)
+        for resource in list(resources - flexible_resources) + [self.env['resource.resource']]:
+            resources_per_tz[tz or timezone((resource or self).tz)].append(resource)
+        Attendance = self.env['resource.calendar.attendance']
+        for resource_tz, tz_resources in resources_per_tz.items():
+            local_start, local_end = start_dt.astimezone(resource_tz), end_dt.astimezone(resource_tz)
+            date_to = local_end.date()
+            if local_end.time() != time.min:
+                date_to += timedelta(days=1)
+            items = self._get_attendance_interval_items(local_start.date(), date_to, resource_tz.zone, domain, lunch)
+            for resource in tz_resources:
+                # the items are already normalized, don't merge them again
+                intervals = Intervals()
+                intervals._items = [
+                    (max(start, local_start), min(stop, local_end), Attendance.browse(attendance_ids))
+                    for start, stop, attendance_ids in items
+                    if start < local_end and stop > local_start
+                ]
+                result[resource.id] = intervals
+        return result
+
+    @ormcache('self.id', 'date_from', 'date_to', 'tz_name', 'str(domain)', 'lunch')
+    def _get_attendance_interval_items(self, date_from, date_to, tz_name, domain, lunch):
+        """ Return the attendance intervals of the calendar between the local midnights
+        of `date_from` and `date_to` in the given timezone as a tuple of
+        (start, stop, attendance ids) tuples, suitable for the registry cache.
+        """
+        tz = timezone(tz_name)
+        start_dt = tz.localize(datetime.combine(date_from, time.min))
+        end_dt = tz.localize(datetime.combine(date_to, time.min))
+        intervals = super()._attendance_intervals_batch(start_dt, end_dt, domain=domain, tz=tz, lunch=lunch)[False]
+        return tuple((start, stop, tuple(attendances.ids)) for start, stop, attendances in intervals)
+
+
+class ResourceCalendarAttendance(models.Model):
+    _inherit = 'resource.calendar.attendance'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        # invalidate the attendance intervals cache of `resource.calendar._get_attendance_interval_items`
+        self.env.registry.clear_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.env.registry.clear_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super().unlink()
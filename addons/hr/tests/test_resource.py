@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from pytz import utc
 
 from odoo.addons.resource.models.utils import Intervals
@@ -88,3 +88,34 @@ class TestResource(TestHrCommon):
             self.assertEqual(resource[field], user[field])
         for field in 'job_title', 'department_id', 'work_email', 'work_phone', 'show_hr_icon_display', 'hr_icon_display':
             self.assertEqual(resource[field], employee[field])
+
+    def test_attendance_intervals_cache(self):
+        """ Resources sharing a calendar reuse its expansion, which follows the changes
+        of the attendances.
+        """
+        self.calendar_40h.tz = self.employee_niv.tz = 'UTC'
+        employee_2 = self.env['hr.employee'].create({
+            'name': 'Tony Dean',
+            'resource_calendar_id': self.calendar_40h.id,
+            'tz': self.employee_niv.tz,
+        })
+        resources = self.employee_niv.resource_id | employee_2.resource_id
+        start, stop = utc.localize(datetime(2021, 7, 5)), utc.localize(datetime(2021, 7, 10))
+
+        def get_hours():
+            intervals = self.calendar_40h._attendance_intervals_batch(start, stop, resources=resources)
+            self.assertEqual(list(intervals[self.employee_niv.resource_id.id]), list(intervals[employee_2.resource_id.id]))
+            return sum((stop - start).total_seconds() / 3600 for start, stop, _attendance in intervals[employee_2.resource_id.id])
+
+        self.assertEqual(get_hours(), 40)
+        with self.assertQueryCount(0):
+            get_hours()
+        # a period within the same days reuses the expansion, trimmed to the period
+        start, stop = start + timedelta(hours=12), stop - timedelta(hours=12)
+        with self.assertQueryCount(0):
+            self.assertEqual(get_hours(), 32)
+        intervals = self.calendar_40h._attendance_intervals_batch(start, stop, resources=resources)
+        self.assertTrue(all(start <= i_start < i_stop <= stop for i_start, i_stop, _attendance in intervals[employee_2.resource_id.id]))
+        start, stop = start - timedelta(hours=12), stop + timedelta(hours=12)
+        self.calendar_40h.attendance_ids.filtered(lambda a: a.dayofweek == '4' and a.day_period == 'afternoon').unlink()
+        self.assertEqual(get_hours(), 36)
@@ -16,7 +16,7 @@ from odoo.addons.resource.models.utils import Intervals
 from odoo.osv.expression import AND, OR
 from odoo.tools.float_utils import float_is_zero
 from odoo.exceptions import AccessError
-from odoo.tools import convert, format_duration, format_time, format_datetime
+from odoo.tools import SQL, convert, format_duration, format_time, format_datetime
 from odoo.tools.float_utils import float_compare
 
 def get_google_maps_url(latitude, longitude):
@@ -212,20 +212,25 @@ class HrAttendance(models.Model):
             between check_in and check_out, without taking into account the lunch_interval"""
         for attendance in self:
             if attendance.check_out and attendance.check_in and attendance.employee_id:
-                calendar = attendance._get_employee_calendar()
-                resource = attendance.employee_id.resource_id
-                tz = timezone(resource.tz) if not calendar else timezone(calendar.tz)
-                check_in_tz = attendance.check_in.astimezone(tz)
-                check_out_tz = attendance.check_out.astimezone(tz)
-                lunch_intervals = []
-                if not attendance.employee_id.is_flexible:
-                    lunch_intervals = attendance.employee_id._employee_attendance_intervals(check_in_tz, check_out_tz, lunch=True)
-                attendance_intervals = Intervals([(check_in_tz, check_out_tz, attendance)]) - lunch_intervals
-                delta = sum((i[1] - i[0]).total_seconds() for i in attendance_intervals)
-                attendance.worked_hours = delta / 3600.0
+                attendance.worked_hours = attendance._get_worked_hours(attendance.check_out)
             else:
                 attendance.worked_hours = False
 
+    def _get_worked_hours(self, check_out):
+        """ Return the worked hours of the attendance if it was checked out at `check_out`. """
+        self.ensure_one()
+        calendar = self._get_employee_calendar()
+        resource = self.employee_id.resource_id
+        tz = timezone(resource.tz) if not calendar else timezone(calendar.tz)
+        check_in_tz = self.check_in.astimezone(tz)
+        check_out_tz = check_out.astimezone(tz)
+        lunch_intervals = []
+        if not self.employee_id.is_flexible:
+            lunch_intervals = self.employee_id._employee_attendance_intervals(check_in_tz, check_out_tz, lunch=True)
+        attendance_intervals = Intervals([(check_in_tz, check_out_tz, self)]) - lunch_intervals
+        delta = sum((i[1] - i[0]).total_seconds() for i in attendance_intervals)
+        return delta / 3600.0
+
     @api.constrains('check_in', 'check_out')
     def _check_validity_check_in_check_out(self):
         """ verifies if check_in is earlier than check_out. """
@@ -305,73 +310,79 @@ class HrAttendance(models.Model):
     def _update_overtime(self, employee_attendance_dates=None):
         if employee_attendance_dates is None:
             employee_attendance_dates = self._get_attendances_dates()
+        # No overtime computed for fully flexible employees
+        employee_attendance_dates = {
+            emp: attendance_dates for emp, attendance_dates in employee_attendance_dates.items()
+            if attendance_dates and not emp.is_fully_flexible
+        }
+        if not employee_attendance_dates:
+            return
 
-        overtime_to_unlink = self.env['hr.attendance.overtime']
-        overtime_vals_list = []
-        affected_employees = self.env['hr.employee']
+        # get_attendances_dates returns the date translated from the local timezone without tzinfo,
+        # and contains all the date which we need to check for overtime.
+        # Employees sharing the same range of days are processed together.
+        employees_per_range = defaultdict(lambda: self.env['hr.employee'])
         for emp, attendance_dates in employee_attendance_dates.items():
-            # get_attendances_dates returns the date translated from the local timezone without tzinfo,
-            # and contains all the date which we need to check for overtime
-            attendance_domain = []
-            for attendance_date in attendance_dates:
-                attendance_domain = OR([attendance_domain, [
-                    ('check_in', '>=', attendance_date[0]), ('check_in', '<', attendance_date[0] + timedelta(hours=24)),
-                ]])
-            attendance_domain = AND([[('employee_id', '=', emp.id)], attendance_domain])
-
-            # Attendances per LOCAL day
-            attendances_per_day = defaultdict(lambda: self.env['hr.attendance'])
-            all_attendances = self.env['hr.attendance'].search(attendance_domain)
-            for attendance in all_attendances:
-                check_in_day_start = attendance._get_day_start_and_day(attendance.employee_id, attendance.check_in)
-                attendances_per_day[check_in_day_start[1]] += attendance
+            start = min(attendance_dates, key=itemgetter(0))[0]
+            stop = max(attendance_dates, key=itemgetter(0))[0] + timedelta(hours=24)
+            employees_per_range[start, stop] |= emp
+        employees = self.env['hr.employee'].union(*employees_per_range.values())
+
+        # Attendances per employee and LOCAL day, fetched with one range query
+        attendances_per_day = defaultdict(lambda: self.env['hr.attendance'])
+        all_attendances = self.env['hr.attendance'].search(OR([
+            [('employee_id', 'in', range_employees.ids), ('check_in', '>=', start), ('check_in', '<', stop)]
+            for (start, stop), range_employees in employees_per_range.items()
+        ]))
+        for attendance in all_attendances:
+            check_in_day_start = attendance._get_day_start_and_day(attendance.employee_id, attendance.check_in)
+            attendances_per_day[attendance.employee_id, check_in_day_start[1]] += attendance
 
+        # Retrieve expected attendance intervals, once per calendar
+        # working_times = {employee: {date: [(start, stop)]}}
+        working_times = defaultdict(lambda: defaultdict(list))
+        for (start, stop), range_employees in employees_per_range.items():
             # As _attendance_intervals_batch and _leave_intervals_batch both take localized dates we need to localize those date
-            start = pytz.utc.localize(min(attendance_dates, key=itemgetter(0))[0])
-            stop = pytz.utc.localize(max(attendance_dates, key=itemgetter(0))[0] + timedelta(hours=24))
-
-            # Retrieve expected attendance intervals
-            calendar = emp.resource_calendar_id or emp.company_id.resource_calendar_id
-            expected_attendances = emp._employee_attendance_intervals(start, stop)
-
-            # working_times = {date: [(start, stop)]}
-            working_times = defaultdict(lambda: [])
-            for expected_attendance in expected_attendances:
-                # Exclude resource.calendar.attendance
-                working_times[expected_attendance[0].date()].append(expected_attendance[:2])
-
-            overtimes = self.env['hr.attendance.overtime'].sudo().search([
-                ('employee_id', '=', emp.id),
-                ('date', 'in', [day_data[1] for day_data in attendance_dates]),
+            expected_attendances = range_employees._get_expected_attendances_batch(pytz.utc.localize(start), pytz.utc.localize(stop))
+            for emp in range_employees:
+                for expected_attendance in expected_attendances[emp.id]:
+                    # Exclude resource.calendar.attendance
+                    working_times[emp][expected_attendance[0].date()].append(expected_attendance[:2])
+
+        overtimes = {
+            (overtime.employee_id, overtime.date): overtime
+            for overtime in self.env['hr.attendance.overtime'].sudo().search([
+                ('employee_id', 'in', employees.ids),
+                ('date', 'in', list({day_data[1] for attendance_dates in employee_attendance_dates.values() for day_data in attendance_dates})),
                 ('adjustment', '=', False),
             ])
+        }
 
+        overtime_to_unlink = self.env['hr.attendance.overtime']
+        overtime_vals_list = []
+        overtime_to_write = {}
+        touched_days = set()
+        for emp, attendance_dates in employee_attendance_dates.items():
             company_threshold = emp.company_id.overtime_company_threshold / 60.0
-            employee_threshold = emp.company_id.overtime_employee_threshold / 60.0
 
             for day_data in attendance_dates:
                 attendance_date = day_data[1]
-                attendances = attendances_per_day.get(attendance_date, self.browse())
+                attendances = attendances_per_day.get((emp, attendance_date), self.browse())
                 unfinished_shifts = attendances.filtered(lambda a: not a.check_out)
                 overtime_duration = 0
                 overtime_duration_real = 0
                 # Overtime is not counted if any shift is not closed or if there are no attendances for that day,
                 # this could happen when deleting attendances.
-
-                # No overtime computed for fully flexible employees
-                if emp.is_fully_flexible:
-                    continue
-
                 if not unfinished_shifts and attendances:
                     # The employee usually doesn't work on that day
-                    if not working_times[attendance_date]:
+                    if not working_times[emp][attendance_date]:
                         # User does not have any resource_calendar_attendance for that day (week-end for example)
                         overtime_duration = sum(attendances.mapped('worked_hours'))
                         overtime_duration_real = overtime_duration
                     # The employee usually work on that day
                     else:
                         # Count time before, during and after 'working hours'
-                        pre_work_time, work_duration, post_work_time, planned_work_duration = attendances._get_pre_post_work_time(emp, working_times, attendance_date)
+                        pre_work_time, work_duration, post_work_time, planned_work_duration = attendances._get_pre_post_work_time(emp, working_times[emp], attendance_date)
                         # Overtime within the planned work hours + overtime before/after work hours is > company threshold
                         overtime_duration = work_duration - planned_work_duration
                         if pre_work_time > company_threshold:
@@ -381,7 +392,7 @@ class HrAttendance(models.Model):
                         # Global overtime including the thresholds
                         overtime_duration_real = sum(attendances.mapped('worked_hours')) - planned_work_duration
 
-                overtime = overtimes.filtered(lambda o: o.date == attendance_date)
+                overtime = overtimes.get((emp, attendance_date))
                 if not float_is_zero(overtime_duration, 2) or unfinished_shifts:
                     # Do not create if any attendance doesn't have a check_out, update if exists
                     if unfinished_shifts:
@@ -393,20 +404,21 @@ class HrAttendance(models.Model):
                             'duration': overtime_duration,
                             'duration_real': overtime_duration_real,
                         })
+                        touched_days.add((emp, attendance_date))
                     elif overtime:
-                        overtime.sudo().write({
-                            'duration': overtime_duration,
-                            'duration_real': overtime_duration
-                        })
-                        affected_employees |= overtime.employee_id
+                        overtime_to_write[overtime] = overtime_duration
+                        touched_days.add((emp, attendance_date))
                 elif overtime:
                     overtime_to_unlink |= overtime
-        created_overtimes = self.env['hr.attendance.overtime'].sudo().create(overtime_vals_list)
-        employees_worked_hours_to_compute = (affected_employees.ids +
-                                             created_overtimes.employee_id.ids +
-                                             overtime_to_unlink.employee_id.ids)
+                    touched_days.add((emp, attendance_date))
+
+        self.env['hr.attendance.overtime'].sudo().create(overtime_vals_list)
+        if overtime_to_write:
+            self._write_overtime_durations(overtime_to_write)
         overtime_to_unlink.sudo().unlink()
-        to_recompute = self.search([('employee_id', 'in', employees_worked_hours_to_compute)])
+
+        # Only the attendances of the days whose overtime changed share it differently
+        to_recompute = self.env['hr.attendance'].union(*(attendances_per_day[day] for day in touched_days))
         # for automatically validated attendances, avoid recomputing extra hours if user has changed its value
         validated_modified = to_recompute.filtered(lambda att: att.employee_id.company_id.attendance_overtime_validation == 'no_validation'
                                                         and float_compare(att.overtime_hours, att.validated_overtime_hours, precision_digits=2))
@@ -417,6 +429,29 @@ class HrAttendance(models.Model):
         self.env.add_to_compute(self._fields['expected_hours'],
                                 to_recompute)
 
+    def _write_overtime_durations(self, overtime_durations):
+        """ Write the durations of several overtimes with a single query.
+
+        :param overtime_durations: dict {hr.attendance.overtime: duration}
+        """
+        overtimes = self.env['hr.attendance.overtime'].union(*overtime_durations)
+        overtimes.flush_recordset(['duration', 'duration_real'])
+        self.env.cr.execute(SQL(
+            """
+            UPDATE hr_attendance_overtime overtime
+               SET duration = v.duration,
+                   duration_real = v.duration
+              FROM (VALUES %s) AS v(id, duration)
+             WHERE overtime.id = v.id
+            """,
+            SQL(", ").join(
+                SQL("(%s, %s::double precision)", overtime.id, duration)
+                for overtime, duration in overtime_durations.items()
+            ),
+        ))
+        overtimes.invalidate_recordset(['duration', 'duration_real'])
+        overtimes.modified(['duration', 'duration_real'])
+
     def _get_pre_post_work_time(self, employee, working_times, attendance_date):
         pre_work_time, work_duration, post_work_time = 0, 0, 0
         company_threshold = employee.company_id.overtime_company_threshold / 60.0
@@ -705,10 +740,6 @@ class HrAttendance(models.Model):
         })
 
     def _cron_auto_check_out(self):
-        def check_in_tz(attendance):
-            """Returns check-in time in calendar's timezone."""
-            return attendance.check_in.astimezone(pytz.timezone(attendance.employee_id._get_tz()))
-
         to_verify = self.env['hr.attendance'].search(
             [('check_out', '=', False),
              ('employee_id.company_id.auto_check_out', '=', True),
@@ -718,6 +749,12 @@ class HrAttendance(models.Model):
         if not to_verify:
             return
 
+        employee_timezones = {employee: pytz.timezone(employee._get_tz()) for employee in to_verify.employee_id}
+
+        def check_in_tz(attendance):
+            """Returns check-in time in calendar's timezone."""
+            return attendance.check_in.astimezone(employee_timezones[attendance.employee_id])
+
         to_verify_min_date = min(to_verify.mapped('check_in')).replace(hour=0, minute=0, second=0)
         previous_attendances = self.env['hr.attendance'].search([
                     ('employee_id', 'in', to_verify.mapped('employee_id').ids),
@@ -729,38 +766,47 @@ class HrAttendance(models.Model):
         for previous in previous_attendances:
             mapped_previous_duration[previous.employee_id][check_in_tz(previous).date()] += previous.worked_hours
 
-        all_companies = to_verify.employee_id.company_id
-
-        for company in all_companies:
+        # {(calendar, dayofweek, week_type): hours}, the week type is only set for two weeks calendars
+        expected_hours = defaultdict(float)
+        for calendar_attendance in to_verify.employee_id.resource_calendar_id.attendance_ids:
+            calendar = calendar_attendance.calendar_id
+            week_type = calendar_attendance.week_type if calendar.two_weeks_calendar else False
+            expected_hours[calendar, calendar_attendance.dayofweek, week_type] += calendar_attendance.duration_hours
+
+        CalendarAttendance = self.env['resource.calendar.attendance']
+        now = fields.Datetime.now()
+        # {check_out: attendance ids}
+        check_outs = defaultdict(list)
+        for company, to_verify_company in to_verify.grouped(lambda a: a.employee_id.company_id).items():
             max_tol = company.auto_check_out_tolerance
-            to_verify_company = to_verify.filtered(lambda a: a.employee_id.company_id.id == company.id)
 
             for att in to_verify_company:
-
-                employee_timezone = pytz.timezone(att.employee_id._get_tz())
                 check_in_datetime = check_in_tz(att)
-                now_datetime = fields.Datetime.now().astimezone(employee_timezone)
+                now_datetime = now.astimezone(employee_timezones[att.employee_id])
                 current_attendance_duration = (now_datetime - check_in_datetime).total_seconds() / 3600
                 previous_attendances_duration = mapped_previous_duration[att.employee_id][check_in_datetime.date()]
 
-                expected_worked_hours = sum(
-                    att.employee_id.resource_calendar_id.attendance_ids.filtered(
-                        lambda a: a.dayofweek == str(check_in_datetime.weekday())
-                            and (not a.two_weeks_calendar or a.week_type == str(a.get_week_type(check_in_datetime.date())))
-                    ).mapped("duration_hours")
-                )
+                calendar = att.employee_id.resource_calendar_id
+                week_type = str(CalendarAttendance.get_week_type(check_in_datetime.date())) if calendar.two_weeks_calendar else False
+                expected_worked_hours = expected_hours.get((calendar, str(check_in_datetime.weekday()), week_type), 0.0)
 
                 # Attendances where Last open attendance time + previously worked time on that day + tolerance greater than the attendances hours (including lunch) in his calendar
                 if (current_attendance_duration + previous_attendances_duration - max_tol) > expected_worked_hours:
-                    att.check_out = att.check_in.replace(hour=23, minute=59, second=59)
-                    excess_hours = att.worked_hours - (expected_worked_hours + max_tol - previous_attendances_duration)
-                    att.write({
-                        "check_out": max(att.check_out - relativedelta(hours=excess_hours), att.check_in + relativedelta(seconds=1)),
-                        "out_mode": "auto_check_out"
-                    })
-                    att.message_post(
-                        body=_('This attendance was automatically checked out because the employee exceeded the allowed time for their scheduled work hours.')
-                    )
+                    end_of_day = att.check_in.replace(hour=23, minute=59, second=59)
+                    excess_hours = att._get_worked_hours(end_of_day) - (expected_worked_hours + max_tol - previous_attendances_duration)
+                    check_out = max(end_of_day - relativedelta(hours=excess_hours), att.check_in + relativedelta(seconds=1))
+                    check_outs[check_out].append(att.id)
+
+        if not check_outs:
+            return
+        for check_out, attendance_ids in check_outs.items():
+            self.browse(attendance_ids).write({
+                "check_out": check_out,
+                "out_mode": "auto_check_out"
+            })
+        checked_out = self.browse([attendance_id for attendance_ids in check_outs.values() for attendance_id in attendance_ids])
+        body = _('This attendance was automatically checked out because the employee exceeded the allowed time for their scheduled work hours.')
+        checked_out._message_log_batch(bodies={attendance.id: body for attendance in checked_out})
 
     def _cron_absence_detection(self):
         """
@@ -774,26 +820,46 @@ class HrAttendance(models.Model):
         checked_in_employees = self.env['hr.attendance.overtime'].search([('date', '=', yesterday),
                                                                           ('adjustment', '=', False)]).employee_id
 
-        technical_attendances_vals = []
         absent_employees = self.env['hr.employee'].search([('id', 'not in', checked_in_employees.ids),
                                                            ('company_id', 'in', companies.ids),
                                                            ('resource_calendar_id.flexible_hours', '=', False)])
 
+        check_in_per_employee = {}
+        # {(day start, day): employees}, the day the overtime of the technical attendance is computed for
+        employees_per_day = defaultdict(lambda: self.env['hr.employee'])
         for emp in absent_employees:
             local_day_start = pytz.utc.localize(yesterday).astimezone(pytz.timezone(emp._get_tz()))
-            technical_attendances_vals.append({
-                'check_in': local_day_start.strftime('%Y-%m-%d %H:%M:%S'),
-                'check_out': (local_day_start + relativedelta(seconds=1)).strftime('%Y-%m-%d %H:%M:%S'),
-                'in_mode': 'technical',
-                'out_mode': 'technical',
-                'employee_id': emp.id
-            })
+            check_in = local_day_start.replace(tzinfo=None)
+            check_in_per_employee[emp] = check_in
+            employees_per_day[self._get_day_start_and_day(emp, check_in)] |= emp
+
+        # Only the employees expected to work on that day get a negative overtime,
+        # don't create technical attendances for the other ones
+        technical_attendances_vals = []
+        for (day_start, day), employees in employees_per_day.items():
+            expected_attendances = employees._get_expected_attendances_batch(
+                pytz.utc.localize(day_start), pytz.utc.localize(day_start + timedelta(hours=24)))
+            for emp in employees:
+                planned_work_duration = sum(
+                    (stop - start).total_seconds() / 3600.0
+                    for start, stop, _dummy in expected_attendances[emp.id]
+                    if start.date() == day
+                )
+                if float_is_zero(planned_work_duration, 2):
+                    continue
+                check_in = check_in_per_employee[emp]
+                technical_attendances_vals.append({
+                    'check_in': check_in,
+                    'check_out': check_in + relativedelta(seconds=1),
+                    'in_mode': 'technical',
+                    'out_mode': 'technical',
+                    'employee_id': emp.id
+                })
 
         technical_attendances = self.env['hr.attendance'].create(technical_attendances_vals)
         to_unlink = technical_attendances.filtered(lambda a: a.overtime_hours == 0)
+        to_unlink.unlink()
 
+        technical_attendances -= to_unlink
         body = _('This attendance was automatically created to cover an unjustified absence on that day.')
-        for technical_attendance in technical_attendances - to_unlink:
-            technical_attendance.message_post(body=body)
-
-        to_unlink.unlink()
+        technical_attendances._message_log_batch(bodies={attendance.id: body for attendance in technical_attendances})
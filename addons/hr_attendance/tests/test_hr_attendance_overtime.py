@@ -147,6 +147,31 @@ class TestHrAttendanceOvertime(TransactionCase):
         attendance.unlink()
         self.assertAlmostEqual(self.employee.total_overtime, 1, 2)
 
+    def test_overtime_batch(self):
+        """ Overtimes of several employees and days are computed in one go """
+        attendances = self.env['hr.attendance'].create([{
+            'employee_id': employee.id,
+            'check_in': check_in,
+            'check_out': check_out,
+        } for employee in (self.employee, self.other_employee, self.jpn_employee) for check_in, check_out in [
+            (datetime(2021, 1, 2, 8, 0), datetime(2021, 1, 2, 11, 0)),
+            (datetime(2021, 1, 4, 7, 0), datetime(2021, 1, 4, 18, 0)),
+            (datetime(2021, 1, 5, 8, 0), datetime(2021, 1, 5, 12, 0)),
+        ]])
+        overtimes = self.env['hr.attendance.overtime'].search([('employee_id', 'in', (self.employee | self.other_employee).ids)])
+        self.assertEqual(len(overtimes), 6)
+        for employee in self.employee | self.other_employee:
+            self.assertRecordValues(overtimes.filtered(lambda o: o.employee_id == employee).sorted('date'), [
+                {'date': date(2021, 1, 2), 'duration': 3},
+                {'date': date(2021, 1, 4), 'duration': 2},
+                {'date': date(2021, 1, 5), 'duration': -4},
+            ])
+            self.assertAlmostEqual(employee.total_overtime, 1, 2)
+
+        attendances.filtered(lambda a: a.check_in.day == 5).write({'check_out': datetime(2021, 1, 5, 17, 0)})
+        for employee in self.employee | self.other_employee:
+            self.assertAlmostEqual(employee.total_overtime, 5, 2)
+
     def test_overtime_change_employee(self):
         Attendance = self.env['hr.attendance']
         attendance = Attendance.create({
@@ -506,6 +531,24 @@ class TestHrAttendanceOvertime(TransactionCase):
         self.env['hr.attendance']._cron_auto_check_out()
         self.assertEqual(attendances_jpn[2].check_out, datetime(2024, 2, 2, 3, 0), "Check-out after 4 hours (4 hours expected from calendar + 1 hours tolerance - 1 hour previous attendance)")
 
+    @freeze_time("2024-02-1 23:00:00")
+    def test_auto_check_out_batch(self):
+        """ Test that the attendances checked out together are written and logged in batch """
+        self.company.write({
+            'auto_check_out': True,
+            'auto_check_out_tolerance': 1
+        })
+        attendances = self.env['hr.attendance'].create([{
+            'employee_id': employee.id,
+            'check_in': datetime(2024, 2, 1, 8, 0),
+        } for employee in (self.employee, self.other_employee)])
+
+        self.env['hr.attendance']._cron_auto_check_out()
+        self.assertEqual(attendances.mapped('check_out'), [datetime(2024, 2, 1, 18, 0)] * 2)
+        self.assertEqual(attendances.mapped('out_mode'), ['auto_check_out'] * 2)
+        for attendance in attendances:
+            self.assertIn('automatically checked out', attendance.message_ids[0].body)
+
     def test_auto_check_out_lunch_period(self):
         Attendance = self.env['hr.attendance']
         self.company.write({
@@ -628,6 +671,25 @@ class TestHrAttendanceOvertime(TransactionCase):
         # Other company with setting disabled
         self.assertAlmostEqual(self.europe_employee.total_overtime, 0, 2)
 
+    def test_absence_management_technical_attendances(self):
+        self.company.write({
+            'absence_management': True,
+        })
+        Attendance = self.env['hr.attendance']
+
+        # Saturday, the employees are not expected to work
+        with freeze_time("2024-02-04 14:00:00"):
+            Attendance._cron_absence_detection()
+        self.assertFalse(Attendance.search([('employee_id', '=', self.other_employee.id), ('in_mode', '=', 'technical')]))
+
+        # Thursday
+        with freeze_time("2024-02-02 14:00:00"):
+            Attendance._cron_absence_detection()
+        technical_attendance = Attendance.search([('employee_id', '=', self.other_employee.id), ('in_mode', '=', 'technical')])
+        self.assertEqual(len(technical_attendance), 1)
+        self.assertAlmostEqual(technical_attendance.overtime_hours, -8, 2)
+        self.assertIn('unjustified absence', technical_attendance.message_ids[0].body)
+
     def test_overtime_hours_flexible_resource(self):
         """ Test the computation of overtime hours for a single flexible resource with 8 hours_per_day.
         =========  
@@ -264,6 +264,14 @@ class Employee(models.Model):
             duration_data = duration_data | contract_intervals
         return duration_data
 
+    def _get_expected_attendances_batch(self, date_from, date_to):
+        # employees with a contract follow the calendars of their contracts
+        with_contract = self & self.sudo()._get_contracts(date_from, date_to, states=['open', 'close']).employee_id
+        res = super(Employee, self - with_contract)._get_expected_attendances_batch(date_from, date_to)
+        for employee in with_contract:
+            res[employee.id] = employee._get_expected_attendances(date_from, date_to)
+        return res
+
     def _get_calendar_attendances(self, date_from, date_to):
         self.ensure_one()
         valid_contracts = self.sudo()._get_contracts(date_from, date_to, states=['open', 'close'])
@@ -87,7 +87,70 @@ class HrEmployeeBase(models.AbstractModel):
         return self.env.user.employee_id
 
     def _get_consumed_leaves(self, leave_types, target_date=False, ignore_future=False):
+        """ Return the consumption of the allocations of the employees for the given leave
+        types, see `_get_consumed_leaves_data` for the structure of the result.
+
+        The consumption is computed once per transaction for a given set of employees, leave
+        types and target date and kept in a snapshot shared by all the callers (dashboard,
+        allocation data, remaining leaves computations). The snapshot is dropped when a leave,
+        an allocation or a leave type is modified, see `_invalidate_consumed_leaves`.
+        """
         employees = self or self._get_contextual_employee()
+        if not target_date:
+            target_date = fields.Date.today()
+        if self.env.context.get('leave_skip_balance_snapshot'):
+            return employees._get_consumed_leaves_data(leave_types, target_date, ignore_future)
+        key = (
+            self.env.uid, self.env.su, tuple(self.env.context.get('allowed_company_ids') or ()),
+            frozenset(employees.ids), frozenset(leave_types.ids), target_date, fields.Date.today(),
+            ignore_future, frozenset(self.env.context.get('ignored_leave_ids') or ()),
+        )
+        # precommit data only lives until the end of the transaction (commit or rollback)
+        snapshots = self.env.cr.precommit.data.setdefault('hr_holidays.consumed_leaves', {})
+        if key not in snapshots:
+            snapshots[key] = employees._get_consumed_leaves_data(leave_types, target_date, ignore_future)
+        return self._copy_consumed_leaves(snapshots[key])
+
+    @api.model
+    def _invalidate_consumed_leaves(self):
+        """ Drop the consumption snapshots of the current transaction. """
+        self.env.cr.precommit.data.pop('hr_holidays.consumed_leaves', None)
+
+    def _get_consumed_leaves_structures(self):
+        allocations_leaves_consumed = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: 0))))
+        to_recheck_leaves_per_leave_type = defaultdict(lambda:
+            defaultdict(lambda: {
+                'excess_days': defaultdict(lambda: {
+                    'amount': 0,
+                    'is_virtual': True,
+                }),
+                'exceeding_duration': 0,
+                'to_recheck_leaves': self.env['hr.leave']
+            })
+        )
+        return allocations_leaves_consumed, to_recheck_leaves_per_leave_type
+
+    def _copy_consumed_leaves(self, consumed_leaves):
+        """ Copy a consumption snapshot, so that the callers can't alter it. """
+        allocations_leaves_consumed, to_recheck_leaves_per_leave_type = self._get_consumed_leaves_structures()
+        for employee, employee_data in consumed_leaves[0].items():
+            employee_copy = allocations_leaves_consumed[employee]
+            for leave_type, leave_type_data in employee_data.items():
+                leave_type_copy = employee_copy[leave_type]
+                for allocation, allocation_data in leave_type_data.items():
+                    leave_type_copy[allocation].update(allocation_data)
+        for employee, employee_data in consumed_leaves[1].items():
+            employee_copy = to_recheck_leaves_per_leave_type[employee]
+            for leave_type, content in employee_data.items():
+                content_copy = employee_copy[leave_type]
+                content_copy['exceeding_duration'] = content['exceeding_duration']
+                content_copy['to_recheck_leaves'] = content['to_recheck_leaves']
+                for excess_date, excess_days in content['excess_days'].items():
+                    content_copy['excess_days'][excess_date] = dict(excess_days)
+        return allocations_leaves_consumed, to_recheck_leaves_per_leave_type
+
+    def _get_consumed_leaves_data(self, leave_types, target_date, ignore_future=False):
+        employees = self
         leaves_domain = [
             ('holiday_status_id', 'in', leave_types.ids),
             ('employee_id', 'in', employees.ids),
@@ -96,8 +159,6 @@ class HrEmployeeBase(models.AbstractModel):
         if self.env.context.get('ignored_leave_ids'):
             leaves_domain.append(('id', 'not in', self.env.context.get('ignored_leave_ids')))
 
-        if not target_date:
-            target_date = fields.Date.today()
         if ignore_future:
             leaves_domain.append(('date_from', '<=', target_date))
         leaves = self.env['hr.leave'].search(leaves_domain)
@@ -150,18 +211,7 @@ class HrEmployeeBase(models.AbstractModel):
         # "to_recheck_leaves" stores every leave that is not yet taken into account by the "allocation_leaves_consumed" dictionary.
         # "excess_days" represents the excess amount that somehow isn't taken into account by the first dictionary.
         # "exceeding_duration" sum up the to_recheck_leaves duration and compares it to the maximum allocated for that time period.
-        allocations_leaves_consumed = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: 0))))
-
-        to_recheck_leaves_per_leave_type = defaultdict(lambda:
-            defaultdict(lambda: {
-                'excess_days': defaultdict(lambda: {
-                    'amount': 0,
-                    'is_virtual': True,
-                }),
-                'exceeding_duration': 0,
-                'to_recheck_leaves': self.env['hr.leave']
-            })
-        )
+        allocations_leaves_consumed, to_recheck_leaves_per_leave_type = self._get_consumed_leaves_structures()
         for allocation in allocations:
             allocation_data = allocations_leaves_consumed[allocation.employee_id][allocation.holiday_status_id][allocation]
             future_leaves = 0
@@ -455,6 +505,8 @@ class HrEmployeeBase(models.AbstractModel):
         res = super().write(values)
         # remove users from the Responsible group if they are no longer leave managers
         old_managers.sudo()._clean_leave_responsible_users()
+        if 'resource_calendar_id' in values:
+            self._invalidate_consumed_leaves()
 
         # Change the resource calendar of the employee's leaves in the future
         # Other modules can disable this behavior by setting the context key
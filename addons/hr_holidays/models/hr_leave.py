@@ -14,6 +14,7 @@ from odoo import api, Command, fields, models, tools
 from odoo.addons.base.models.res_partner import _tz_get
 from odoo.addons.resource.models.utils import float_to_time, HOURS_PER_DAY, Intervals
 from odoo.exceptions import AccessError, UserError, ValidationError
+from odoo.tools import SQL
 from odoo.tools.float_utils import float_round, float_compare
 from odoo.tools.misc import clean_context, format_date
 from odoo.tools.translate import _
@@ -229,6 +230,10 @@ class HolidaysRequest(models.Model):
         res = super(HolidaysRequest, self)._auto_init()
         tools.create_index(self._cr, 'hr_leave_date_to_date_from_index',
                            self._table, ['date_to', 'date_from'])
+        # overlap detection of `_check_date`
+        tools.create_index(self._cr, 'hr_leave_employee_period_index',
+                           self._table, ['employee_id', 'date_to', 'date_from'],
+                           where="state NOT IN ('cancel', 'refuse')")
         return res
 
     @api.onchange('request_hour_from', 'request_hour_to')
@@ -567,27 +572,40 @@ class HolidaysRequest(models.Model):
         for holiday in self:
             holiday.attachment_ids = holiday.supported_attachment_ids
 
+    def _get_conflicting_leaves(self):
+        """ Return the leaves of the same employees overlapping the leaves of `self`,
+        the leaves of `self` excluded, in a single query.
+
+        :return: dict {leave id: list of conflicting leave ids}
+        """
+        if not self:
+            return {}
+        self.flush_model(['employee_id', 'date_from', 'date_to', 'state'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT leave.id, ARRAY_AGG(other.id ORDER BY other.id)
+              FROM hr_leave leave
+              JOIN hr_leave other
+                ON other.employee_id = leave.employee_id
+               AND other.date_to > leave.date_from
+               AND other.date_from < leave.date_to
+               AND other.state NOT IN ('cancel', 'refuse')
+               AND other.id != ALL(%(ids)s)
+             WHERE leave.id = ANY(%(ids)s)
+          GROUP BY leave.id
+            """,
+            ids=list(self.ids),
+        ))
+        return dict(self.env.cr.fetchall())
+
     @api.constrains('date_from', 'date_to', 'employee_id')
     def _check_date(self):
         if self.env.context.get('leave_skip_date_check', False):
             return
 
-        all_leaves = self.search([
-            ('date_from', '<', max(self.mapped('date_to'))),
-            ('date_to', '>', min(self.mapped('date_from'))),
-            ('employee_id', 'in', self.employee_id.ids),
-            ('id', 'not in', self.ids),
-            ('state', 'not in', ['cancel', 'refuse']),
-        ])
+        conflicts = self._get_conflicting_leaves()
         for holiday in self:
-            domain = [
-                ('employee_id', '=', holiday.employee_id.id),
-                ('date_from', '<', holiday.date_to),
-                ('date_to', '>', holiday.date_from),
-                ('id', '!=', holiday.id),
-                ('state', 'not in', ['cancel', 'refuse']),
-            ]
-            conflicting_holidays = all_leaves.filtered_domain(domain)
+            conflicting_holidays = self.browse(conflicts.get(holiday.id, []))
 
             if conflicting_holidays:
                 conflicting_holidays_list = []
@@ -640,6 +658,8 @@ Attempting to double-book your time off won't magically make your vacation 2x be
                 raise ValidationError(_("This modification is not allowed in the current state."))
 
     def _check_validity(self):
+        # the leaves are being written, don't keep their consumption for the rest of the transaction
+        self = self.with_context(leave_skip_balance_snapshot=True)
         sorted_leaves = defaultdict(lambda: self.env['hr.leave'])
         for leave in self:
             sorted_leaves[(leave.holiday_status_id, leave.date_from.date())] |= leave
@@ -769,6 +789,7 @@ Attempting to double-book your time off won't magically make your vacation 2x be
         if any(not vals.get('employee_id') for vals in vals_list):
             raise UserError(_("There is no employee set on the time off. Please make sure you're logged in the correct company."))
         holidays = super(HolidaysRequest, self.with_context(mail_create_nosubscribe=True)).create(vals_list)
+        self.env['hr.employee']._invalidate_consumed_leaves()
         holidays._check_validity()
 
         for holiday in holidays:
@@ -819,6 +840,7 @@ Attempting to double-book your time off won't magically make your vacation 2x be
             if 'date_to' in values:
                 values['request_date_to'] = values['date_to']
         result = super(HolidaysRequest, self).write(values)
+        self.env['hr.employee']._invalidate_consumed_leaves()
         if any(field in values for field in ['request_date_from', 'date_from', 'request_date_from', 'date_to', 'holiday_status_id', 'employee_id', 'state']):
             self._check_validity()
         if not self.env.context.get('leave_fast_create'):
@@ -846,7 +868,9 @@ Attempting to double-book your time off won't magically make your vacation 2x be
 
     def unlink(self):
         self.sudo()._post_leave_cancel()
-        return super(HolidaysRequest, self.with_context(leave_skip_date_check=True)).unlink()
+        res = super(HolidaysRequest, self.with_context(leave_skip_date_check=True)).unlink()
+        self.env['hr.employee']._invalidate_consumed_leaves()
+        return res
 
     def copy_data(self, default=None):
         vals_list = super().copy_data(default=default)
@@ -2,16 +2,22 @@
 
 # Copyright (c) 2005-2006 Axelor SARL. (http://www.axelor.com)
 
+import logging
+
 from datetime import datetime, date, time
 from dateutil.relativedelta import relativedelta
 from calendar import monthrange
+from time import monotonic
 
 from odoo import api, fields, models, _
 from odoo.addons.hr_holidays.models.hr_leave import get_employee_from_context
 from odoo.exceptions import AccessError, UserError, ValidationError
+from odoo.tools import split_every
 from odoo.tools.float_utils import float_round
 from odoo.tools.date_utils import get_timedelta
 
+_logger = logging.getLogger(__name__)
+
 
 MONTHS_TO_INTEGER = {"jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6, "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12}
 
@@ -318,7 +324,7 @@ class HolidaysAllocation(models.Model):
         if current_level.cap_accrued_time_yearly:
             maximum_leave_yearly = current_level.maximum_leave_yearly\
                 if current_level.added_value_type != 'hour'\
-                else current_level.maximum_leave_yearly / self.employee_id._get_hours_per_day(self.date_from)
+                else current_level.maximum_leave_yearly / self._get_accrual_hours_per_day()
             yearly_remaining_amount = maximum_leave_yearly - self.yearly_accrued_amount
             days_to_add = min(days_to_add, yearly_remaining_amount)
         if current_level.cap_accrued_time:
@@ -394,7 +400,7 @@ class HolidaysAllocation(models.Model):
             added_value = level.added_value
         # Convert time in hours to time in days in case the level is encoded in hours
         if level.added_value_type == 'hour':
-            added_value = added_value / self.employee_id._get_hours_per_day(self.date_from)
+            added_value = added_value / self._get_accrual_hours_per_day()
         period_prorata = 1
         if (start_period != start_date or end_period != end_date) and not level.accrual_plan_id.is_based_on_worked_time:
             period_days = (end_period - start_period)
@@ -410,6 +416,10 @@ class HolidaysAllocation(models.Model):
         """
 
         date_to = date_to or fields.Date.today()
+        # leaves_taken gets recomputed every time allocation.number_of_days is assigned to and the hours per day
+        # look for the contracts of the employee: fetch both once for the whole batch.
+        leaves_taken_per_allocation = {allocation.id: allocation.leaves_taken for allocation in self}
+        self = self.with_context(accrual_hours_per_day=self._get_accrual_hours_per_day_batch())
         already_accrued = {allocation.id: allocation.already_accrued or (allocation.number_of_days != 0 and allocation.accrual_plan_id.accrued_gain_time == 'start') for allocation in self}
         first_allocation = _("""This allocation have already ran once, any modification won't be effective to the days allocated to the employee. If you need to change the configuration of the allocation, delete and create a new one.""")
         for allocation in self:
@@ -419,15 +429,12 @@ class HolidaysAllocation(models.Model):
             level_ids = allocation.accrual_plan_id.level_ids.sorted('sequence')
             if not level_ids:
                 continue
-            # "cache" leaves taken, as it gets recomputed every time allocation.number_of_days is assigned to. Without this,
-            # every loop will take 1+ second. It can be removed if computes don't chain in a way to always reassign accrual plan
-            # even if the value doesn't change. This is the best performance atm.
             first_level = level_ids[0]
             first_level_start_date = allocation.date_from + get_timedelta(first_level.start_count, first_level.start_type)
             if allocation.holiday_status_id.request_unit in ["day", "half_day"]:
-                leaves_taken = allocation.leaves_taken
+                leaves_taken = leaves_taken_per_allocation[allocation.id]
             else:
-                leaves_taken = allocation.leaves_taken / allocation.employee_id._get_hours_per_day(allocation.date_from)
+                leaves_taken = leaves_taken_per_allocation[allocation.id] / allocation._get_accrual_hours_per_day()
             allocation.already_accrued = already_accrued[allocation.id]
             # first time the plan is run, initialize nextcall and take carryover / level transition into account
             if not allocation.nextcall:
@@ -459,7 +466,7 @@ class HolidaysAllocation(models.Model):
                     if current_level.added_value_type == "day":
                         current_level_maximum_leave = current_level.maximum_leave
                     else:
-                        current_level_maximum_leave = current_level.maximum_leave / allocation.employee_id._get_hours_per_day(allocation.date_from)
+                        current_level_maximum_leave = current_level.maximum_leave / allocation._get_accrual_hours_per_day()
                 nextcall = current_level._get_next_date(allocation.nextcall)
                 # Since _get_previous_date returns the given date if it corresponds to a call date
                 # this will always return lastcall except possibly on the first call
@@ -502,7 +509,7 @@ class HolidaysAllocation(models.Model):
                         # allocation.expiring_carryover_days - allocation.leaves_taken or 0 if all the expiring days were used
                         # to take time off.
                         # This ensures that only the days that weren't used to take time off will expire.
-                        expiring_days = max(0, allocation.expiring_carryover_days - allocation.leaves_taken)
+                        expiring_days = max(0, allocation.expiring_carryover_days - leaves_taken_per_allocation[allocation.id])
                         allocation.number_of_days = max(0, allocation.number_of_days - expiring_days)
                         allocation.expiring_carryover_days = 0
 
@@ -518,7 +525,7 @@ class HolidaysAllocation(models.Model):
                             if current_level.added_value_type == 'day':
                                 postpone_max_days = current_level.postpone_max_days
                             else:
-                                postpone_max_days = current_level.postpone_max_days / allocation.employee_id._get_hours_per_day(allocation.date_from)
+                                postpone_max_days = current_level.postpone_max_days / allocation._get_accrual_hours_per_day()
                             allocation_max_days = min(postpone_max_days, allocated_days_left)
                         allocation.number_of_days = min(allocation.number_of_days, allocation_max_days) + leaves_taken
                     allocation.expiring_carryover_days = allocation.number_of_days
@@ -563,7 +570,7 @@ class HolidaysAllocation(models.Model):
                             allocation.last_executed_carryover_date = carryover_date
                             allocated_days_left = allocation.number_of_days - leaves_taken
                             postpone_max_days = current_level.postpone_max_days if current_level.added_value_type == 'day' \
-                                else current_level.postpone_max_days / allocation.employee_id._get_hours_per_day(allocation.date_from)
+                                else current_level.postpone_max_days / allocation._get_accrual_hours_per_day()
                             allocated_days_left = allocation.number_of_days - leaves_taken
                             allocation_max_days = 0 # default if unused_accrual are lost
                             if current_level.action_with_unused_accruals == 'maximum':
@@ -591,26 +598,64 @@ class HolidaysAllocation(models.Model):
                     if current_level.added_value_type == "day":
                         current_level_maximum_leave = current_level.maximum_leave
                     else:
-                        current_level_maximum_leave = current_level.maximum_leave / allocation.employee_id._get_hours_per_day(allocation.date_from)
+                        current_level_maximum_leave = current_level.maximum_leave / allocation._get_accrual_hours_per_day()
                 if allocation.actual_lastcall in {period_start, allocation.date_from} | set(level_start.keys())\
                         or (allocation.actual_lastcall - get_timedelta(current_level.accrual_validity_count, current_level.accrual_validity_type)
                             in {period_start, allocation.date_from} | set(level_start.keys())):
                     allocation._add_days_to_allocation(current_level, current_level_maximum_leave, leaves_taken, period_start, allocation.nextcall)
                     allocation.already_accrued = True
 
+    def _get_accrual_hours_per_day_batch(self):
+        """ Return the hours per day of the employees of the allocations at the start of
+        their allocation, with one `_get_calendars` call per start date.
+
+        :return: dict {allocation.id: hours per day}
+        """
+        res = {}
+        for date_from, allocations in self.grouped('date_from').items():
+            calendars = allocations.employee_id._get_calendars(date_from)
+            for allocation in allocations:
+                if not allocation.employee_id:
+                    res[allocation.id] = 0
+                    continue
+                calendar = calendars.get(allocation.employee_id.id)
+                # 24H to handle the case of Fully Flexible (ones without a working calendar)
+                res[allocation.id] = calendar.hours_per_day if calendar else 24
+        return res
+
+    def _get_accrual_hours_per_day(self):
+        self.ensure_one()
+        hours_per_day = self.env.context.get('accrual_hours_per_day', {})
+        if self.id in hours_per_day:
+            return hours_per_day[self.id]
+        return self.employee_id._get_hours_per_day(self.date_from)
+
     @api.model
-    def _update_accrual(self):
+    def _update_accrual(self, batch_size=500, auto_commit=False):
         """
         Method called by the cron task in order to increment the number_of_days when
         necessary.
+        The allocations are processed by batches. With `auto_commit`, each batch is
+        committed on its own: as processed allocations no longer match the domain, an
+        interrupted run resumes where it stopped.
         """
         today = datetime.combine(fields.Date.today(), time(0, 0, 0))
         allocations = self.search([
             ('allocation_type', '=', 'accrual'), ('state', '=', 'validate'),
             ('accrual_plan_id', '!=', False), ('employee_id', '!=', False),
             '|', ('date_to', '=', False), ('date_to', '>', fields.Datetime.now()),
-            '|', ('nextcall', '=', False), ('nextcall', '<=', today)])
-        allocations._process_accrual_plans()
+            '|', ('nextcall', '=', False), ('nextcall', '<=', today)], order='employee_id, id')
+        done = 0
+        for allocation_ids in split_every(batch_size, allocations.ids):
+            batch_start = monotonic()
+            self.browse(allocation_ids)._process_accrual_plans()
+            done += len(allocation_ids)
+            _logger.info(
+                "Accrual: %d allocations processed in %.2fs, %d remaining",
+                len(allocation_ids), monotonic() - batch_start, len(allocations) - done)
+            if auto_commit:
+                self.env['ir.cron']._notify_progress(done=done, remaining=len(allocations) - done)
+                self.env.cr.commit()
 
     def _get_future_leaves_on(self, accrual_date):
         # As computing future accrual allocation days automatically updates the allocation,
@@ -726,13 +771,17 @@ class HolidaysAllocation(models.Model):
 
         if 'number_of_days_display' not in values and 'number_of_hours_display' not in values and 'state' not in values:
             res = super().write(values)
+            self.env['hr.employee']._invalidate_consumed_leaves()
             if 'allocation_type' in values:
                 self._add_lastcalls()
             return res
 
         previous_consumed_leaves = self.employee_id._get_consumed_leaves(leave_types=self.holiday_status_id)
         result = super().write(values)
-        consumed_leaves = self.employee_id._get_consumed_leaves(leave_types=self.holiday_status_id)
+        self.env['hr.employee']._invalidate_consumed_leaves()
+        consumed_leaves = self.employee_id.with_context(
+            leave_skip_balance_snapshot=True,
+        )._get_consumed_leaves(leave_types=self.holiday_status_id)
 
         if 'allocation_type' in values:
             self._add_lastcalls()
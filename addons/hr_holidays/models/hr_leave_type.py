@@ -385,6 +385,12 @@ class HolidaysType(models.Model):
             return leaves._as_query()
         return super()._search(domain, offset, limit, order)
 
+    def write(self, vals):
+        res = super().write(vals)
+        # the unit and the allocation requirement of the types drive the consumed leaves
+        self.env['hr.employee']._invalidate_consumed_leaves()
+        return res
+
     def copy_data(self, default=None):
         vals_list = super().copy_data(default=default)
         return [dict(vals, name=self.env._("%s (copy)", leave_type.name)) for leave_type, vals in zip(self, vals_list)]
@@ -53,6 +53,8 @@ class CalendarLeaves(models.Model):
         if not time_domain_dict:
             return
 
+        # the public time offs change the duration of the leaves over several allocations
+        self.env['hr.employee']._invalidate_consumed_leaves()
         domain = self._get_domain(time_domain_dict)
         leaves = self.env['hr.leave'].search(domain)
         if not leaves:
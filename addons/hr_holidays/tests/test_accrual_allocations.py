@@ -227,6 +227,37 @@ class TestAccrualAllocations(TestHrHolidaysCommon):
                 allocation._update_accrual()
                 self.assertEqual(allocation.number_of_days, 1, 'There should be only 1 day allocated.')
 
+    def test_accrual_cron_batches(self):
+        """ The allocations are accrued the same way whatever the size of the batches """
+        with freeze_time("2017-12-5"):
+            accrual_plan = self.env['hr.leave.accrual.plan'].with_context(tracking_disable=True).create({
+                'name': 'Accrual Plan For Test',
+                'level_ids': [(0, 0, {
+                    'start_count': 1,
+                    'start_type': 'day',
+                    'added_value': 1,
+                    'added_value_type': 'day',
+                    'frequency': 'daily',
+                    'cap_accrued_time': True,
+                    'maximum_leave': 10000
+                })],
+            })
+            allocations = self.env['hr.leave.allocation'].with_user(self.user_hrmanager_id).with_context(tracking_disable=True).create([{
+                'name': 'Accrual allocation for employee',
+                'accrual_plan_id': accrual_plan.id,
+                'employee_id': employee.id,
+                'holiday_status_id': self.leave_type.id,
+                'number_of_days': 0,
+                'allocation_type': 'accrual',
+            } for employee in (self.employee_emp, self.employee_hruser, self.employee_hrmanager)])
+            allocations.action_validate()
+            allocations._update_accrual(batch_size=2)
+
+            with freeze_time(datetime.date.today() + relativedelta(days=4)):
+                allocations._update_accrual(batch_size=2)
+                self.assertEqual(allocations.mapped('number_of_days'), [3, 3, 3])
+                self.assertEqual(allocations.mapped('nextcall'), [datetime.date.today() + relativedelta(days=1)] * 3)
+
     def test_frequency_weekly(self):
         with freeze_time("2017-12-5"):
             accrual_plan = self.env['hr.leave.accrual.plan'].with_context(tracking_disable=True).create({
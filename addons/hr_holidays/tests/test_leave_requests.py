@@ -111,6 +111,31 @@ class TestLeaveRequests(TestHrHolidaysCommon):
                 'request_date_to': datetime.today(),
             })
 
+    @mute_logger('odoo.models.unlink', 'odoo.addons.mail.models.mail_mail')
+    def test_overlapping_requests_batch(self):
+        """ Leaves created in batch are only checked against the existing leaves of their employee """
+        employees = self.employee_emp | self.employee_hruser | self.employee_hrmanager
+        leave = self.env['hr.leave'].create({
+            'name': 'Hol11',
+            'employee_id': self.employee_hruser_id,
+            'holiday_status_id': self.holidays_type_1.id,
+            'request_date_from': date(2024, 2, 12),
+            'request_date_to': date(2024, 2, 12),
+        })
+        leaves = self.env['hr.leave'].create([{
+            'name': 'Closure',
+            'employee_id': employee.id,
+            'holiday_status_id': self.holidays_type_1.id,
+            'request_date_from': date(2024, 2, 8),
+            'request_date_to': date(2024, 2, 9),
+        } for employee in employees])
+        self.assertEqual(leaves._get_conflicting_leaves(), {})
+        # the leaves of the recordset are not reported against each other
+        self.assertEqual((leaves | leave)._get_conflicting_leaves(), {})
+
+        with self.assertRaisesRegex(ValidationError, 'overlaps'):
+            leaves.filtered(lambda l: l.employee_id == self.employee_hruser).request_date_to = date(2024, 2, 14)
+
     def test_limited_type_not_enough_days(self):
         with freeze_time('2022-01-05'):
             allocation = self.env['hr.leave.allocation'].with_user(self.user_hruser_id).create({
@@ -923,6 +948,43 @@ class TestLeaveRequests(TestHrHolidaysCommon):
                 ml=5, lt=0, rl=5, vrl=2, vlt=3,
             )
 
+    def test_consumed_leaves_snapshot(self):
+        with freeze_time('2020-09-15'):
+            allocation = self.env['hr.leave.allocation'].create({
+                'name': 'Annual Time Off',
+                'employee_id': self.employee_emp_id,
+                'holiday_status_id': self.holidays_type_2.id,
+                'number_of_days': 5,
+                'state': 'confirm',
+                'date_from': '2020-01-01',
+                'date_to': '2020-12-31',
+            })
+            allocation.action_validate()
+            consumed_leaves = self.employee_emp._get_consumed_leaves(self.holidays_type_2)[0]
+            with self.assertQueryCount(0):
+                snapshot = self.employee_emp._get_consumed_leaves(self.holidays_type_2)[0]
+            self.assertEqual(snapshot, consumed_leaves)
+
+            # the callers get a copy of the snapshot
+            snapshot[self.employee_emp][self.holidays_type_2][allocation]['virtual_remaining_leaves'] = 0
+            self._check_holidays_count(
+                self.employee_emp._get_consumed_leaves(self.holidays_type_2)[0][self.employee_emp][self.holidays_type_2][allocation],
+                ml=5, lt=0, rl=5, vrl=5, vlt=0,
+            )
+
+            # the snapshot is dropped when a leave is requested
+            self.env['hr.leave'].with_user(self.user_employee_id).create({
+                'name': 'Holiday Request',
+                'employee_id': self.employee_emp_id,
+                'holiday_status_id': self.holidays_type_2.id,
+                'request_date_from': '2020-09-07',
+                'request_date_to': '2020-09-09',
+            })
+            self._check_holidays_count(
+                self.employee_emp._get_consumed_leaves(self.holidays_type_2)[0][self.employee_emp][self.holidays_type_2][allocation],
+                ml=5, lt=0, rl=5, vrl=2, vlt=3,
+            )
+
     def test_archived_allocation(self):
         with freeze_time('2022-09-15'):
             allocation_2021 = self.env['hr.leave.allocation'].create({
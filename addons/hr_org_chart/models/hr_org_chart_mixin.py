@@ -3,6 +3,7 @@
 
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
+from odoo.tools import SQL
 
 
 class HrEmployeeBase(models.AbstractModel):
@@ -29,18 +30,52 @@ class HrEmployeeBase(models.AbstractModel):
         """
         if not parents:
             parents = self.env[self._name]
+        subordinate_ids = set().union(*self._get_subordinate_ids_per_employee().values())
+        return self.browse(subordinate_ids) - parents - self
 
-        indirect_subordinates = self.env[self._name]
-        parents |= self
-        direct_subordinates = self.child_ids - parents
-        child_subordinates = direct_subordinates._get_subordinates(parents=parents) if direct_subordinates else self.browse()
-        indirect_subordinates |= child_subordinates
-        return indirect_subordinates | direct_subordinates
+    def _get_subordinate_ids_per_employee(self):
+        """
+        Get the subordinates (direct and indirect) of each employee of `self` with a single
+        recursive query on the managers. The employees that would not be read through
+        `child_ids` (archived, not accessible) and their own subordinates are not included.
+        :return: dict {employee id: set of subordinate ids}
+        """
+        employee_ids = tuple(self._origin.ids)
+        if not employee_ids:
+            return {}
+        # hr.employee.public is a view on hr.employee: flush the underlying table too
+        self.env['hr.employee'].flush_model(['parent_id', 'active', 'company_id'])
+        self.flush_model(['parent_id', 'active', 'company_id'])
+        readable_employees = self._search([])
+        # UNION discards the rows already found, the recursion stops on hierarchy loops
+        self.env.cr.execute(SQL("""
+            WITH RECURSIVE subordinates(employee_id, id) AS (
+                SELECT emp.parent_id, emp.id
+                  FROM %(table)s emp
+                 WHERE emp.parent_id IN %(employee_ids)s
+                   AND emp.id IN %(readable_employees)s
+                 UNION
+                SELECT sub.employee_id, emp.id
+                  FROM %(table)s emp
+                  JOIN subordinates sub ON emp.parent_id = sub.id
+                 WHERE emp.id IN %(readable_employees)s
+            )
+            SELECT employee_id, ARRAY_AGG(id)
+              FROM subordinates
+             WHERE id != employee_id
+          GROUP BY employee_id
+        """,
+            table=SQL.identifier(self._table),
+            employee_ids=employee_ids,
+            readable_employees=readable_employees.subselect(),
+        ))
+        return {employee_id: set(subordinate_ids) for employee_id, subordinate_ids in self.env.cr.fetchall()}
 
     @api.depends('child_ids', 'child_ids.child_all_count')
     def _compute_subordinates(self):
+        subordinate_ids_per_employee = self._get_subordinate_ids_per_employee()
         for employee in self:
-            employee.subordinate_ids = employee._get_subordinates()
+            employee.subordinate_ids = self.browse(subordinate_ids_per_employee.get(employee._origin.id, ()))
             employee.child_all_count = len(employee.subordinate_ids)
 
     @api.depends_context('uid', 'company')
@@ -54,6 +54,26 @@ class TestEmployee(TestHrCommon):
         self.assertFalse(employees.filtered_domain(employees._search_is_subordinate('=', True)))
         self.assertEqual(employees.filtered_domain(employees._search_is_subordinate('=', False)), employees)
 
+    def test_subordinates(self):
+        self.employee_paul.parent_id = self.employee_georges
+        self.employee_pierre.parent_id = self.employee_paul
+        # Georges is the manager of his own manager
+        self.employee_georges.parent_id = self.employee_pierre
+
+        self.assertEqual(self.employee_georges.subordinate_ids, self.employee_paul + self.employee_pierre)
+        self.assertEqual(self.employee_georges.child_all_count, 2)
+        self.assertEqual(self.employee_paul.subordinate_ids, self.employee_pierre + self.employee_georges)
+        self.assertEqual(
+            (self.employee_georges + self.employee_paul)._get_subordinates(),
+            self.employee_pierre,
+            "The employees should not be counted as subordinates of each other")
+
+        # write directly to keep the hierarchy links that archiving would empty
+        self.employee_paul.active = False
+        self.env.invalidate_all()
+        self.assertFalse(self.employee_georges.subordinate_ids, "The subordinates of an archived employee are not reachable")
+        self.assertEqual(self.employee_pierre.subordinate_ids, self.employee_georges)
+
     def test_hierarchy_read(self):
         HrEmployee = self.env['hr.employee']
         employees = self.employee_georges + self.employee_paul + self.employee_pierre
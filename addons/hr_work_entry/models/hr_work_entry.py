@@ -67,6 +67,12 @@ class HrWorkEntry(models.Model):
 
     def init(self):
         tools.create_index(self._cr, "hr_work_entry_date_start_date_stop_index", self._table, ["date_start", "date_stop"])
+        # Used to find the work entries overlapping given ones, see `_get_work_entries_overlaps`
+        tools.create_index(
+            self._cr, "hr_work_entry_employee_period_gist_index", self._table,
+            ["int4range(employee_id, employee_id, '[]')", "tsrange(date_start, date_stop, '()')"],
+            method='gist', where='active',
+        )
 
     @api.depends('work_entry_type_id', 'employee_id')
     def _compute_name(self):
@@ -143,27 +149,54 @@ class HrWorkEntry(models.Model):
         # use '()' to exlude the lower and upper bounds of the range.
         # Filter on date_start and date_stop (both indexed) in the EXISTS clause to
         # limit the resulting set size and fasten the query.
+        if self.ids:
+            conflicts = set(itertools.chain.from_iterable(self._get_work_entries_overlaps()))
+        else:
+            self.flush_model(['date_start', 'date_stop', 'employee_id', 'active'])
+            query = """
+                SELECT b1.id,
+                       b2.id
+                  FROM hr_work_entry b1
+                  JOIN hr_work_entry b2
+                    ON b1.employee_id = b2.employee_id
+                   AND b1.id <> b2.id
+                 WHERE b1.date_start <= %(stop)s
+                   AND b1.date_stop >= %(start)s
+                   AND b1.active = TRUE
+                   AND b2.active = TRUE
+                   AND tsrange(b1.date_start, b1.date_stop, '()') && tsrange(b2.date_start, b2.date_stop, '()')
+                   AND b2.date_start <= %(stop)s AND b2.date_stop >= %(start)s
+            """
+            self.env.cr.execute(query, {"stop": stop, "start": start})
+            conflicts = set(itertools.chain.from_iterable(self.env.cr.fetchall()))
+        self.browse(conflicts).write({
+            'state': 'conflict',
+        })
+        return bool(conflicts)
+
+    def _get_work_entries_overlaps(self):
+        """
+        Return the (other work entry id, work entry id) pairs of active work entries
+        overlapping the active work entries of `self`.
+        The overlapping work entries are found row by row through the GiST index
+        on the employee and the period, instead of scanning a whole date range.
+        """
+        if not self.ids:
+            return []
         self.flush_model(['date_start', 'date_stop', 'employee_id', 'active'])
-        query = """
+        self.env.cr.execute("""
             SELECT b1.id,
                    b2.id
-              FROM hr_work_entry b1
-              JOIN hr_work_entry b2
-                ON b1.employee_id = b2.employee_id
-               AND b1.id <> b2.id
-             WHERE b1.date_start <= %(stop)s
-               AND b1.date_stop >= %(start)s
+              FROM hr_work_entry b2
+              JOIN hr_work_entry b1
+                ON int4range(b1.employee_id, b1.employee_id, '[]') = int4range(b2.employee_id, b2.employee_id, '[]')
+               AND tsrange(b1.date_start, b1.date_stop, '()') && tsrange(b2.date_start, b2.date_stop, '()')
                AND b1.active = TRUE
+               AND b1.id <> b2.id
+             WHERE b2.id IN %(ids)s
                AND b2.active = TRUE
-               AND tsrange(b1.date_start, b1.date_stop, '()') && tsrange(b2.date_start, b2.date_stop, '()')
-               AND {}
-        """.format("b2.id IN %(ids)s" if self.ids else "b2.date_start <= %(stop)s AND b2.date_stop >= %(start)s")
-        self.env.cr.execute(query, {"stop": stop, "start": start, "ids": tuple(self.ids)})
-        conflicts = set(itertools.chain.from_iterable(self.env.cr.fetchall()))
-        self.browse(conflicts).write({
-            'state': 'conflict',
-        })
-        return bool(conflicts)
+        """, {"ids": tuple(self.ids)})
+        return self.env.cr.fetchall()
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -215,9 +248,9 @@ class HrWorkEntry(models.Model):
         """
         Context manager used for conflicts checking.
         When exiting the context manager, conflicts are checked
-        for all work entries within a date range. By default, the start and end dates are
-        computed according to `self` (min and max respectively) but it can be overwritten by providing
-        other values as parameter.
+        for the work entries of `self` and the ones they overlapped before the change.
+        Without work entries in `self`, conflicts are checked for all work entries within
+        a date range, given by `start` and `stop`.
         :param start: datetime to overwrite the default behaviour
         :param stop: datetime to overwrite the default behaviour
         :param skip: If True, no error checking is done
@@ -226,7 +259,14 @@ class HrWorkEntry(models.Model):
             skip = skip or self.env.context.get('hr_work_entry_no_check', False)
             start = start or min(self.mapped('date_start'), default=False)
             stop = stop or max(self.mapped('date_stop'), default=False)
-            if not skip and start and stop:
+            if not skip and start and stop and self.ids:
+                # the new overlaps of `self` are marked by `_check_if_error`, only the work entries
+                # overlapped before the change must be rechecked
+                overlapping_ids = {work_entry_id for work_entry_id, _dummy in self._get_work_entries_overlaps()}
+                work_entries = (self | self.browse(overlapping_ids)).sudo().with_context(hr_work_entry_no_check=True)
+                work_entries = work_entries.filtered(lambda w: w.state not in ('validated', 'cancelled'))
+                work_entries._reset_conflicting_state()
+            elif not skip and start and stop:
                 domain = [
                     ('date_start', '<', stop),
                     ('date_stop', '>', start),
@@ -2,8 +2,10 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 import itertools
+import logging
 from collections import defaultdict
 from datetime import datetime, date, time
+from time import monotonic
 import pytz
 
 from dateutil.relativedelta import relativedelta
@@ -11,11 +13,18 @@ from dateutil.relativedelta import relativedelta
 from odoo import api, Command, fields, models, _
 from odoo.addons.resource.models.utils import string_to_datetime, Intervals
 from odoo.osv import expression
-from odoo.tools import ormcache, format_list
+from odoo.tools import ormcache, format_list, split_every
 from odoo.exceptions import UserError
 
 from .hr_work_intervals import WorkIntervals
 
+try:
+    from resource import getrusage, RUSAGE_SELF
+except ImportError:  # not available on Windows
+    getrusage = None
+
+_logger = logging.getLogger(__name__)
+
 
 class HrContract(models.Model):
     _inherit = 'hr.contract'
@@ -369,7 +378,6 @@ class HrContract(models.Model):
                 _("Sorry, generating work entries from cancelled contracts is not allowed.")
                 + "\n%s" % (format_list(self.env, canceled_contracts.mapped("name"))),
             )
-        vals_list = []
         self.write({'last_generation_date': fields.Date.today()})
 
         intervals_to_generate = defaultdict(lambda: self.env['hr.contract'])
@@ -410,14 +418,43 @@ class HrContract(models.Model):
                 contract.date_generated_to = date_stop_work_entries
                 intervals_to_generate[(last_generated_to, date_stop_work_entries)] |= contract
 
-        for interval, contracts in intervals_to_generate.items():
-            date_from, date_to = interval
-            vals_list.extend(contracts._get_work_entries_values(date_from, date_to))
-
-        if not vals_list:
-            return self.env['hr.work.entry']
-
-        return self.env['hr.work.entry'].create(vals_list)
+        start = monotonic()
+        work_entry_ids = []
+        WorkEntry = self.env['hr.work.entry']
+        for vals_list in self._get_work_entries_values_batches(intervals_to_generate):
+            work_entry_ids += WorkEntry.create(vals_list).ids
+            # don't keep the created work entries in the cache, only their ids
+            WorkEntry.flush_model()
+            WorkEntry.invalidate_model()
+
+        if not work_entry_ids:
+            return WorkEntry
+
+        duration = monotonic() - start
+        _logger.info(
+            "Generated %s work entries for %s contracts in %.2fs (%.0f entries/s, peak memory %s)",
+            len(work_entry_ids), len(self), duration, len(work_entry_ids) / (duration or 1),
+            "%.0f MB" % (getrusage(RUSAGE_SELF).ru_maxrss / 1024) if getrusage else "unknown")
+        return WorkEntry.browse(work_entry_ids)
+
+    def _get_work_entries_values_batches(self, intervals_to_generate, batch_size=5000, contracts_batch_size=100):
+        """
+        Generate the values of the work entries of the contracts to generate per interval by
+        lists of about `batch_size` values, so that they can be created one list at a time.
+        The values are computed by chunks of `contracts_batch_size` contracts sharing the same
+        interval, to keep the calendars and the leaves fetched in batch.
+        :param intervals_to_generate: {(date_from, date_to): contracts}
+        :return: generator of lists of dictionnaries.
+        """
+        vals_list = []
+        for (date_from, date_to), contracts in intervals_to_generate.items():
+            for contracts_batch in split_every(contracts_batch_size, contracts.ids, contracts.browse):
+                vals_list += contracts_batch._get_work_entries_values(date_from, date_to)
+                if len(vals_list) >= batch_size:
+                    yield vals_list
+                    vals_list = []
+        if vals_list:
+            yield vals_list
 
     def _remove_work_entries(self):
         ''' Remove all work_entries that are outside contract period (function used after writing new start or/and end date) '''
@@ -51,6 +51,15 @@ class TestWorkEntry(TestWorkEntryBase):
             ('date_stop', '<=', self.end)])
         self.assertEqual(attendance_nb, work_entry_nb, "One work_entry should be generated for each calendar attendance")
 
+    def test_work_entries_values_batches(self):
+        contract = self.richard_emp.contract_id
+        middle = datetime(2015, 11, 15, 23, 59, 59)
+        intervals_to_generate = {(self.start, middle): contract, (middle, self.end): contract}
+        batches = list(contract._get_work_entries_values_batches(intervals_to_generate, batch_size=1))
+        self.assertEqual(len(batches), 2, "The values should be yielded once the batch size is reached")
+        attendance_nb = len(self.resource_calendar_id._attendance_intervals_batch(self.start.replace(tzinfo=pytz.utc), self.end.replace(tzinfo=pytz.utc))[False])
+        self.assertEqual(sum(len(vals_list) for vals_list in batches), attendance_nb)
+
     def test_approve_multiple_day_work_entry(self):
         start = datetime(2015, 11, 1, 9, 0, 0)
         end = datetime(2015, 11, 3, 18, 0, 0)
@@ -166,6 +175,27 @@ class TestWorkEntry(TestWorkEntryBase):
         self.assertEqual(work_entry_2.state, 'conflict')
         self.assertNotEqual(work_entry_3.state, 'conflict')
 
+    def test_write_conflict_overlapping_only(self):
+        """ Test updating work entries only rechecks the work entries they overlap """
+        work_entry_1, work_entry_2, work_entry_3, work_entry_4 = self.create_work_entries([
+            (datetime(2018, 10, 10, 9, 0), datetime(2018, 10, 10, 12, 0)),
+            (datetime(2018, 10, 10, 11, 0), datetime(2018, 10, 10, 12, 0)),
+            (datetime(2018, 10, 10, 13, 0), datetime(2018, 10, 10, 14, 0)),
+            (datetime(2018, 10, 10, 15, 0), datetime(2018, 10, 10, 18, 0)),
+        ])
+        self.assertEqual(work_entry_1.state, 'conflict', "It should conflict")
+        self.assertEqual(work_entry_2.state, 'conflict', "It should conflict")
+        work_entry_3.state = 'conflict'
+
+        (work_entry_1 + work_entry_4).write({'work_entry_type_id': self.work_entry_type.id})
+        self.assertEqual(work_entry_1.state, 'conflict', "It should still conflict")
+        self.assertEqual(work_entry_2.state, 'conflict', "It should still conflict")
+        self.assertEqual(work_entry_3.state, 'conflict', "It doesn't overlap the updated work entries, it should not be rechecked")
+
+        work_entry_1.date_stop = datetime(2018, 10, 10, 11, 0)
+        self.assertNotEqual(work_entry_1.state, 'conflict', "It should no longer conflict")
+        self.assertNotEqual(work_entry_2.state, 'conflict', "It should no longer conflict")
+
     def test_create_conflict(self):
         """ Test creating a work entry recomputes conflicts """
         work_entry_1 = self.create_work_entry(datetime(2018, 10, 10, 9, 0), datetime(2018, 10, 10, 12, 0))
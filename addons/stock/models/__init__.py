@@ -22,4 +22,6 @@ from . import stock_scrap
 from . import product
 from . import stock_package_level
 from . import stock_package_type
+from . import stock_product_level
+from . import stock_quantity_checkpoint
 from . import stock_storage_category
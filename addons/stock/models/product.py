@@ -172,11 +172,33 @@ class Product(models.Model):
         domain_move_out_todo = [('state', 'in', ('waiting', 'confirmed', 'assigned', 'partially_available'))] + domain_move_out
         moves_in_res = {product.id: product_qty for product, product_qty in Move._read_group(domain_move_in_todo, ['product_id'], ['product_qty:sum'])}
         moves_out_res = {product.id: product_qty for product, product_qty in Move._read_group(domain_move_out_todo, ['product_id'], ['product_qty:sum'])}
+        if not (lot_id or owner_id or package_id) and self.env['stock.product.level']._is_enabled():
+            # the snapshot holds the same sums as the quants, without the lots, packages and owners
+            Quant = self.env['stock.product.level']
         quants_res = {product.id: (quantity, reserved_quantity) for product, quantity, reserved_quantity in Quant._read_group(domain_quant, ['product_id'], ['quantity:sum', 'reserved_quantity:sum'])}
         if dates_in_the_past:
-            # Calculate the moves that were done before now to calculate back in time (as most questions will be recent ones)
-            domain_move_in_done = [('state', '=', 'done'), ('date', '>', to_date)] + domain_move_in_done
-            domain_move_out_done = [('state', '=', 'done'), ('date', '>', to_date)] + domain_move_out_done
+            # Start from the current quantities or from the closest checkpoint and replay the moves
+            # done between that date and `to_date` (as most questions will be recent ones)
+            checkpoint_date = False
+            if not (lot_id or owner_id or package_id):
+                checkpoint_date = self.env['stock.quantity.checkpoint']._get_nearest_date(to_date)
+            if checkpoint_date:
+                Checkpoint = self.env['stock.quantity.checkpoint']
+                domain_checkpoint = [('date', '=', checkpoint_date), ('product_id', 'in', self.ids)] + domain_quant_loc
+                qty_res_past = {product.id: quantity for product, quantity in Checkpoint._read_group(domain_checkpoint, ['product_id'], ['quantity:sum'])}
+            else:
+                qty_res_past = {product_id: quantities[0] for product_id, quantities in quants_res.items()}
+            if checkpoint_date and checkpoint_date < to_date:
+                # replay forward from the checkpoint
+                past_sign = -1
+                domain_date_done = [('date', '>', checkpoint_date), ('date', '<=', to_date)]
+            else:
+                past_sign = 1
+                domain_date_done = [('date', '>', to_date)]
+                if checkpoint_date:
+                    domain_date_done += [('date', '<=', checkpoint_date)]
+            domain_move_in_done = [('state', '=', 'done')] + domain_date_done + domain_move_in_done
+            domain_move_out_done = [('state', '=', 'done')] + domain_date_done + domain_move_out_done
 
             groupby = ['product_id', 'product_uom']
             moves_in_res_past = defaultdict(float)
@@ -200,7 +222,7 @@ class Product(models.Model):
             rounding = product.uom_id.rounding
             res[product_id] = {}
             if dates_in_the_past:
-                qty_available = quants_res.get(origin_product_id, [0.0])[0] - moves_in_res_past.get(origin_product_id, 0.0) + moves_out_res_past.get(origin_product_id, 0.0)
+                qty_available = qty_res_past.get(origin_product_id, 0.0) - past_sign * (moves_in_res_past.get(origin_product_id, 0.0) - moves_out_res_past.get(origin_product_id, 0.0))
             else:
                 qty_available = quants_res.get(origin_product_id, [0.0])[0]
             reserved_quantity = quants_res.get(origin_product_id, [False, 0.0])[1]
@@ -408,7 +430,10 @@ class Product(models.Model):
             domain_quant.append(('owner_id', '=', owner_id))
         if package_id:
             domain_quant.append(('package_id', '=', package_id))
-        quants_groupby = self.env['stock.quant']._read_group(domain_quant, ['product_id'], ['quantity:sum'])
+        Quant = self.env['stock.quant']
+        if not (lot_id or owner_id or package_id) and self.env['stock.product.level']._is_enabled():
+            Quant = self.env['stock.product.level']
+        quants_groupby = Quant._read_group(domain_quant, ['product_id'], ['quantity:sum'])
 
         # check if we need include zero values in result
         include_zero = (
@@ -650,7 +675,10 @@ class Product(models.Model):
         :rtype: defaultdict(float)
         """
         domain_quant = expression.AND([self._get_domain_locations()[0], [('product_id', 'in', self.ids)]])
-        quants_groupby = self.env['stock.quant']._read_group(domain_quant, ['product_id'], ['quantity:sum'])
+        Quant = self.env['stock.quant']
+        if self.env['stock.product.level']._is_enabled():
+            Quant = self.env['stock.product.level']
+        quants_groupby = Quant._read_group(domain_quant, ['product_id'], ['quantity:sum'])
         currents = defaultdict(float)
         currents.update({product.id: quantity for product, quantity in quants_groupby})
         return currents
@@ -291,11 +291,13 @@ class Location(models.Model):
                 vals['name'] = _("%s (copy)", location.name)
         return vals_list
 
-    def _get_putaway_strategy(self, product, quantity=0, package=None, packaging=None, additional_qty=None):
+    def _get_putaway_strategy(self, product, quantity=0, package=None, packaging=None, additional_qty=None, qty_by_location=None):
         """Returns the location where the product has to be put, if any compliant
         putaway strategy is found. Otherwise returns self.
         The quantity should be in the default UOM of the product, it is used when
         no package is specified.
+        `qty_by_location` can be given to skip the computation of the current and
+        future quantities of `product` per location (see `_get_putaway_qty_by_product`).
         """
         self = self._check_access_putaway()
         products = self.env.context.get('products', self.env['product.product'])
@@ -330,8 +332,9 @@ class Location(models.Model):
             locations = self.child_internal_location_ids
         if putaway_rules:
             # get current product qty (qty in current quants and future qty on assigned ml) of all child locations
-            qty_by_location = defaultdict(lambda: 0)
-            if locations.storage_category_id:
+            is_qty_precomputed = qty_by_location is not None and not (package and package.package_type_id)
+            qty_by_location = defaultdict(lambda: 0, qty_by_location if is_qty_precomputed else {})
+            if locations.storage_category_id and not is_qty_precomputed:
                 if package and package.package_type_id:
                     move_line_data = self.env['stock.move.line']._read_group([
                         ('id', 'not in', list(self._context.get('exclude_sml_ids', set()))),
@@ -372,6 +375,31 @@ class Location(models.Model):
 
         return putaway_location
 
+    def _get_putaway_qty_by_product(self, products, locations):
+        """Return the current and future quantities of `products` in `locations`,
+        as used by the putaway strategy, in one pass for all the products.
+
+        :return: dict mapping product id to a dict mapping location id to the
+            quantity in the default UOM of the product
+        """
+        qty_by_product = defaultdict(lambda: defaultdict(lambda: 0))
+        quant_data = self.env['stock.quant']._read_group([
+            ('product_id', 'in', products.ids),
+            ('location_id', 'in', locations.ids),
+        ], ['product_id', 'location_id'], ['quantity:sum'])
+        for product, location, quantity_sum in quant_data:
+            qty_by_product[product.id][location.id] += quantity_sum
+        move_line_data = self.env['stock.move.line']._read_group([
+            ('id', 'not in', list(self._context.get('exclude_sml_ids', set()))),
+            ('product_id', 'in', products.ids),
+            ('location_dest_id', 'in', locations.ids),
+            ('state', 'not in', ['draft', 'done', 'cancel'])
+        ], ['product_id', 'location_dest_id'], ['quantity:array_agg', 'product_uom_id:recordset'])
+        for product, location_dest, quantity_list, uoms in move_line_data:
+            qty_by_product[product.id][location_dest.id] += sum(
+                ml_uom._compute_quantity(float(qty), product.uom_id) for qty, ml_uom in zip(quantity_list, uoms))
+        return qty_by_product
+
     def _get_next_inventory_date(self):
         """ Used to get the next inventory date for a quant located in this location. It is
         based on:
@@ -536,6 +564,20 @@ class StockRoute(models.Model):
                 vals['name'] = _("%s (copy)", route.name)
         return vals_list
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        # invalidate the rule resolution cache of `procurement.group._get_rule`
+        self.env.registry.clear_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.env.registry.clear_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super().unlink()
+
     @api.depends('company_id')
     def _compute_warehouses(self):
         for loc in self:
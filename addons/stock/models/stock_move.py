@@ -467,11 +467,16 @@ Please change the quantity done or the rounding precision of your unit of measur
         reserve. When the move is done, `availability` is set to the quantity the move did actually
         move.
         """
+        available_quantities = self.env['stock.quant']._get_available_quantities([
+            (move.product_id, move.location_id, None, None, None, False)
+            for move in self
+            if move.state != 'done' and move.product_id
+        ])
         for move in self:
             if move.state == 'done':
                 move.availability = move.product_qty
             else:
-                total_availability = self.env['stock.quant']._get_available_quantity(move.product_id, move.location_id) if move.product_id else 0.0
+                total_availability = available_quantities.get((move.product_id, move.location_id, None, None, None, False), 0.0)
                 move.availability = min(move.product_qty, total_availability)
 
     @api.depends('product_id', 'product_qty', 'picking_type_id', 'quantity', 'priority', 'state', 'product_uom_qty', 'location_id')
@@ -750,6 +755,11 @@ Please change the quantity done or the rounding precision of your unit of measur
             if picking.group_id:
                 vals['group_id'] = picking.group_id.id
         res = super(StockMove, self).write(vals)
+        if 'date' in vals or vals.get('state') == 'done':
+            # the checkpoints taken after a (backdated) done move don't include it
+            done_moves = self.filtered(lambda m: m.state == 'done')
+            if done_moves:
+                self.env['stock.quantity.checkpoint']._invalidate(min(done_moves.mapped('date')))
         if move_to_recompute_state:
             move_to_recompute_state._recompute_state()
         if move_to_check_location:
@@ -2336,16 +2346,25 @@ Please change the quantity done or the rounding precision of your unit of measur
         if not self or self.env['ir.config_parameter'].sudo().get_param('stock.no_auto_scheduler'):
             return
 
+        # Index the auto-triggered orderpoints of the moved products by (company, product), so the orderpoint of
+        # each move is found by comparing location parent paths instead of running one search per move.
+        orderpoints_index = defaultdict(list)
+        for orderpoint in self.env['stock.warehouse.orderpoint'].search([
+            ('product_id', 'in', self.product_id.ids),
+            ('trigger', '=', 'auto'),
+            ('company_id', 'in', self.company_id.ids),
+        ]):
+            orderpoints_index[orderpoint.company_id.id, orderpoint.product_id.id].append((orderpoint.location_id.parent_path, orderpoint))
+
         orderpoints_by_company = defaultdict(lambda: self.env['stock.warehouse.orderpoint'])
         orderpoints_context_by_company = defaultdict(dict)
         for move in self:
-            orderpoint = self.env['stock.warehouse.orderpoint'].search([
-                ('product_id', '=', move.product_id.id),
-                ('trigger', '=', 'auto'),
-                ('location_id', 'parent_of', move.location_id.id),
-                ('company_id', '=', move.company_id.id),
-                '!', ('location_id', 'parent_of', move.location_dest_id.id),
-            ], limit=1)
+            orderpoint = next((
+                orderpoint
+                for parent_path, orderpoint in orderpoints_index[move.company_id.id, move.product_id.id]
+                if move.location_id.parent_path.startswith(parent_path)
+                and not move.location_dest_id.parent_path.startswith(parent_path)
+            ), self.env['stock.warehouse.orderpoint'])
             if orderpoint:
                 orderpoints_by_company[orderpoint.company_id] |= orderpoint
             if orderpoint and move.product_qty > orderpoint.product_min_qty and move.origin:
@@ -2425,14 +2444,18 @@ Please change the quantity done or the rounding precision of your unit of measur
         :rtype: defaultdict
         """
         wh_location_query = self.env['stock.location']._search([('id', 'child_of', warehouse.view_location_id.id)])
-        forecast_lines = self.env['stock.forecasted_product_product']._get_report_lines(False, self.product_id.ids, wh_location_query, location_id or warehouse.lot_stock_id, read=False)
+        # only the reconciled quantities are needed, not the rendered report lines
+        forecast_lines = self.env['stock.forecasted_product_product']._get_report_line_values(False, self.product_id.ids, wh_location_query, location_id or warehouse.lot_stock_id)
         result = defaultdict(lambda: (0.0, False))
         for line in forecast_lines:
             move_out = line.get('move_out')
-            if not move_out or not line['quantity']:
+            if not move_out:
+                continue
+            quantity = float_round(line['quantity'], precision_rounding=move_out.product_id.uom_id.rounding)
+            if not quantity:
                 continue
             move_in = line.get('move_in')
-            qty_expected = line['quantity'] + result[move_out][0] if line['replenishment_filled'] else -line['quantity']
+            qty_expected = quantity + result[move_out][0] if line.get('replenishment_filled', True) else -quantity
             date_expected = False
             if move_in:
                 date_expected = max(move_in.date, result[move_out][1]) if result[move_out][1] else move_in.date
@@ -276,13 +276,21 @@ class StockMoveLine(models.Model):
                 else:
                     smls.package_level_id.location_dest_id = smls.location_dest_id
             else:
+                # Load the occupancy of the destinations once for all the lines, then keep it up to date
+                # with each assignment instead of reading it again for every line.
+                qty_by_product = None
+                if locations.storage_category_id and smls.move_id.location_dest_id._check_access_putaway().putaway_rule_ids:
+                    qty_by_product = smls.move_id.location_dest_id.with_context(exclude_sml_ids=excluded_smls)._get_putaway_qty_by_product(smls.product_id, locations)
                 for sml in smls:
                     putaway_loc_id = sml.move_id.location_dest_id.with_context(exclude_sml_ids=excluded_smls, locations=locations)._get_putaway_strategy(
                         sml.product_id, quantity=sml.quantity, packaging=sml.move_id.product_packaging_id,
+                        qty_by_location=qty_by_product[sml.product_id.id] if qty_by_product is not None else None,
                     )
                     if putaway_loc_id != sml.location_dest_id:
                         sml.location_dest_id = putaway_loc_id
                     excluded_smls.discard(sml.id)
+                    if qty_by_product is not None and sml.state not in ('draft', 'done', 'cancel') and sml.location_dest_id in locations:
+                        qty_by_product[sml.product_id.id][sml.location_dest_id.id] += sml.product_uom_id._compute_quantity(sml.quantity, sml.product_id.uom_id)
 
     def _get_default_dest_location(self):
         if not self.env.user.has_group('stock.group_stock_multi_locations'):
@@ -426,6 +434,7 @@ class StockMoveLine(models.Model):
         move_done = mls.filtered(lambda m: m.state == "done").move_id
         if move_done:
             move_done._check_quantity()
+            self.env['stock.quantity.checkpoint']._invalidate(min(move_done.mapped('date')))
         return mls
 
     def write(self, vals):
@@ -518,6 +527,7 @@ class StockMoveLine(models.Model):
             move_done = mls.move_id
             if move_done:
                 move_done._check_quantity()
+                self.env['stock.quantity.checkpoint']._invalidate(min(move_done.mapped('date')))
 
         # update the date when it seems like (additional) quantities are "done" and the date hasn't been manually updated
         if 'date' not in vals and ('product_uom_id' in vals or 'quantity' in vals or vals.get('picked', False)):
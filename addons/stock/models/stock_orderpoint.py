@@ -7,6 +7,7 @@ from collections import defaultdict
 from datetime import datetime, time
 from dateutil import relativedelta
 from psycopg2 import OperationalError
+from time import monotonic
 
 from odoo import SUPERUSER_ID, _, api, fields, models
 from odoo.addons.stock.models.stock_rule import ProcurementException
@@ -352,35 +353,74 @@ class StockWarehouseOrderpoint(models.Model):
 
         orderpoints = self.filtered(to_compute)
         qty_in_progress_by_orderpoint = orderpoints._quantity_in_progress()
+        qty_to_order_by_orderpoint = orderpoints._get_qty_to_order_by_orderpoint(qty_in_progress_by_orderpoint=qty_in_progress_by_orderpoint)
         for orderpoint in orderpoints:
-            orderpoint.qty_to_order_computed = orderpoint._get_qty_to_order(qty_in_progress_by_orderpoint=qty_in_progress_by_orderpoint)
+            orderpoint.qty_to_order_computed = qty_to_order_by_orderpoint[orderpoint.id]
         (self - orderpoints).qty_to_order_computed = False
 
     def _get_qty_to_order(self, force_visibility_days=False, qty_in_progress_by_orderpoint=None):
         self.ensure_one()
-        visibility_days = self.visibility_days
-        if force_visibility_days is not False:
-            # Accepts falsy values such as 0.
-            visibility_days = force_visibility_days
-        qty_to_order = 0.0
+        return self._get_qty_to_order_by_orderpoint(
+            force_visibility_days=force_visibility_days,
+            qty_in_progress_by_orderpoint=qty_in_progress_by_orderpoint,
+        )[self.id]
+
+    def _get_qty_to_order_by_orderpoint(self, force_visibility_days=False, qty_in_progress_by_orderpoint=None):
+        """ Compute the quantity to order of all the orderpoints in `self` at once.
+
+        The forecasted quantities are read once per distinct product context
+        (location, forecast date) for all the products sharing it, instead of
+        once per orderpoint. Without visibility days the forecast used by the
+        orderpoint is `qty_forecast` itself and no read is needed at all.
+
+        :return: dict mapping orderpoint id to its quantity to order
+        """
+        qty_to_order_by_orderpoint = dict.fromkeys(self.ids, 0.0)
         qty_in_progress_by_orderpoint = qty_in_progress_by_orderpoint or {}
-        qty_in_progress = qty_in_progress_by_orderpoint.get(self.id)
-        if qty_in_progress is None:
-            qty_in_progress = self._quantity_in_progress()[self.id]
+        missing_qty_in_progress = self.filtered(lambda o: o.id not in qty_in_progress_by_orderpoint)
+        if missing_qty_in_progress:
+            qty_in_progress_by_orderpoint = {**qty_in_progress_by_orderpoint, **missing_qty_in_progress._quantity_in_progress()}
+
+        qty_forecast_by_orderpoint = {}
+        orderpoints_by_context = defaultdict(list)
+        for orderpoint in self:
+            # The check is on purpose. We only want to consider the visibility days if the forecast is negative and
+            # there is a already something to ressuply base on lead times.
+            if float_compare(orderpoint.qty_forecast, orderpoint.product_min_qty, precision_rounding=orderpoint.product_uom.rounding) >= 0:
+                continue
+            visibility_days = orderpoint.visibility_days if force_visibility_days is False else force_visibility_days
+            if not visibility_days:
+                qty_forecast_by_orderpoint[orderpoint.id] = orderpoint.qty_forecast
+                continue
+            product_context = frozendict(orderpoint._get_product_context(visibility_days=visibility_days))
+            orderpoints_by_context[product_context].append(orderpoint.id)
+
+        for product_context, orderpoint_ids in orderpoints_by_context.items():
+            orderpoints = self.browse(orderpoint_ids)
+            virtual_available_by_product = {
+                product['id']: product['virtual_available']
+                for product in orderpoints.product_id.with_context(product_context).read(['virtual_available'])
+            }
+            for orderpoint in orderpoints:
+                qty_forecast_by_orderpoint[orderpoint.id] = virtual_available_by_product[orderpoint.product_id.id] + qty_in_progress_by_orderpoint[orderpoint.id]
+
+        for orderpoint in self.browse(qty_forecast_by_orderpoint):
+            qty_to_order_by_orderpoint[orderpoint.id] = orderpoint._round_qty_to_order(
+                max(orderpoint.product_min_qty, orderpoint.product_max_qty) - qty_forecast_by_orderpoint[orderpoint.id]
+            )
+        return qty_to_order_by_orderpoint
+
+    def _round_qty_to_order(self, qty_to_order):
+        """ Round `qty_to_order` according to the multiple quantity of the orderpoint. """
+        self.ensure_one()
         rounding = self.product_uom.rounding
-        # The check is on purpose. We only want to consider the visibility days if the forecast is negative and
-        # there is a already something to ressuply base on lead times.
-        if float_compare(self.qty_forecast, self.product_min_qty, precision_rounding=rounding) < 0:
-            product_context = self._get_product_context(visibility_days=visibility_days)
-            qty_forecast_with_visibility = self.product_id.with_context(product_context).read(['virtual_available'])[0]['virtual_available'] + qty_in_progress
-            qty_to_order = max(self.product_min_qty, self.product_max_qty) - qty_forecast_with_visibility
-            remainder = (self.qty_multiple > 0.0 and qty_to_order % self.qty_multiple) or 0.0
-            if (float_compare(remainder, 0.0, precision_rounding=rounding) > 0
-                    and float_compare(self.qty_multiple - remainder, 0.0, precision_rounding=rounding) > 0):
-                if float_is_zero(self.product_max_qty, precision_rounding=rounding):
-                    qty_to_order += self.qty_multiple - remainder
-                else:
-                    qty_to_order -= remainder
+        remainder = (self.qty_multiple > 0.0 and qty_to_order % self.qty_multiple) or 0.0
+        if (float_compare(remainder, 0.0, precision_rounding=rounding) > 0
+                and float_compare(self.qty_multiple - remainder, 0.0, precision_rounding=rounding) > 0):
+            if float_is_zero(self.product_max_qty, precision_rounding=rounding):
+                qty_to_order += self.qty_multiple - remainder
+            else:
+                qty_to_order -= remainder
         return qty_to_order
 
     def _get_qty_multiple_to_order(self):
@@ -635,13 +675,38 @@ class StockWarehouseOrderpoint(models.Model):
 
     def _procure_orderpoint_confirm(self, use_new_cursor=False, company_id=None, raise_user_error=True):
         """ Create procurements based on orderpoints.
+
+        Orderpoints are processed warehouse by warehouse and the batch jobs log
+        the throughput of every warehouse. A failing procurement does not prevent
+        the other ones of its batch from being run.
+
         :param bool use_new_cursor: if set, use a dedicated cursor and auto-commit after processing
             1000 orderpoints.
             This is appropriate for batch jobs only.
         """
         self = self.with_company(company_id)
 
-        for orderpoints_batch_ids in split_every(1000, self.ids):
+        for (company, warehouse), orderpoints in self.grouped(lambda o: (o.company_id, o.warehouse_id)).items():
+            start = monotonic()
+            failures = self._procure_orderpoint_batches(orderpoints.ids, use_new_cursor=use_new_cursor, raise_user_error=raise_user_error)
+            duration = monotonic() - start
+            # only the batch jobs report their throughput, interactive replenishments stay quiet
+            _logger.log(
+                logging.INFO if use_new_cursor else logging.DEBUG,
+                "Orderpoints of company %s, warehouse %s: %d processed in %.2fs (%.1f/s), %d failed",
+                company.id, warehouse.id, len(orderpoints), duration,
+                len(orderpoints) / duration if duration else 0.0, failures)
+
+        return {}
+
+    def _procure_orderpoint_batches(self, orderpoint_ids, use_new_cursor=False, raise_user_error=True):
+        """ Run the procurements of the given orderpoints by batches of 1000.
+
+        :return: the number of orderpoints whose procurement failed
+        :rtype: int
+        """
+        failures = 0
+        for orderpoints_batch_ids in split_every(1000, orderpoint_ids):
             if use_new_cursor:
                 assert isinstance(self._cr, BaseCursor)
                 cr = Registry(self._cr.dbname).cursor()
@@ -671,16 +736,22 @@ class StockWarehouseOrderpoint(models.Model):
                     try:
                         with self.env.cr.savepoint():
                             self.env['procurement.group'].with_context(from_orderpoint=True).run(procurements, raise_user_error=raise_user_error)
-                    except ProcurementException as errors:
-                        orderpoints_exceptions = []
-                        for procurement, error_msg in errors.procurement_exceptions:
-                            orderpoints_exceptions += [(procurement.values.get('orderpoint_id'), error_msg)]
-                        all_orderpoints_exceptions += orderpoints_exceptions
-                        failed_orderpoints = self.env['stock.warehouse.orderpoint'].concat(*[o[0] for o in orderpoints_exceptions])
-                        if not failed_orderpoints:
-                            _logger.error('Unable to process orderpoints')
-                            break
-                        orderpoints_batch -= failed_orderpoints
+                    except ProcurementException:
+                        # isolate the failing procurements: run them one by one, each in
+                        # its own savepoint, rather than replaying the whole batch
+                        failed_orderpoints = self.env['stock.warehouse.orderpoint']
+                        for procurement in procurements:
+                            try:
+                                with self.env.cr.savepoint():
+                                    self.env['procurement.group'].with_context(from_orderpoint=True).run([procurement], raise_user_error=raise_user_error)
+                            except ProcurementException as errors:
+                                failed_orderpoints |= procurement.values.get('orderpoint_id')
+                                all_orderpoints_exceptions += [
+                                    (procurement.values.get('orderpoint_id'), error_msg)
+                                    for dummy, error_msg in errors.procurement_exceptions
+                                ]
+                        (orderpoints_batch - failed_orderpoints)._post_process_scheduler()
+                        break
 
                     except OperationalError:
                         if use_new_cursor:
@@ -692,6 +763,7 @@ class StockWarehouseOrderpoint(models.Model):
                         orderpoints_batch._post_process_scheduler()
                         break
 
+                failures += len(all_orderpoints_exceptions)
                 # Log an activity on product template for failed orderpoints.
                 for orderpoint, error_msg in all_orderpoints_exceptions:
                     existing_activity = self.env['mail.activity'].search([
@@ -713,7 +785,7 @@ class StockWarehouseOrderpoint(models.Model):
                         cr.close()
                     _logger.info("A batch of %d orderpoints is processed and committed", len(orderpoints_batch_ids))
 
-        return {}
+        return failures
 
     def _post_process_scheduler(self):
         return True
@@ -1267,9 +1267,13 @@ class Picking(models.Model):
 
     def _send_confirmation_email(self):
         subtype_id = self.env['ir.model.data']._xmlid_to_res_id('mail.mt_comment')
-        for stock_pick in self.filtered(lambda p: p.company_id.stock_move_email_validation and p.picking_type_id.code == 'outgoing'):
+        pickings = self
+        if self.env.context.get('defer_confirmation_email'):
+            # leave the emails to the mail queue instead of sending them during the validation
+            pickings = self.with_context(mail_notify_force_send=False)
+        for stock_pick in pickings.filtered(lambda p: p.company_id.stock_move_email_validation and p.picking_type_id.code == 'outgoing'):
             delivery_template = stock_pick.company_id.stock_mail_confirmation_template_id
-            stock_pick.with_context(force_send=True).message_post_with_source(
+            stock_pick.message_post_with_source(
                 delivery_template,
                 email_layout_xmlid='mail.mail_notification_light',
                 subtype_id=subtype_id,
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import logging
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+
+class StockProductLevel(models.Model):
+    """ Materialized on hand and reserved quantities per product and location.
+
+    The table mirrors the sum of `stock.quant` over lots, packages and owners.
+    It is maintained incrementally: every change of a quant appends a row
+    holding the difference, so that concurrent transactions never wait for each
+    other on the same product and location. `_compact` periodically folds the
+    rows of each (product, location) into a single one, and `_check_consistency`
+    compares the table with the quants and rebuilds it if they drifted apart.
+
+    The table is only maintained while the `stock.product_level_snapshot`
+    parameter is set. The product quantity fields then read from it instead of
+    the quants, once it has been rebuilt by the cron (the quants may have
+    changed while it was not maintained).
+    """
+    _name = 'stock.product.level'
+    _description = 'Product Stock Level'
+    _log_access = False
+
+    product_id = fields.Many2one('product.product', 'Product', required=True, index=True, ondelete='cascade', readonly=True)
+    location_id = fields.Many2one('stock.location', 'Location', required=True, index=True, ondelete='cascade', readonly=True)
+    company_id = fields.Many2one('res.company', 'Company', readonly=True)
+    quantity = fields.Float('Quantity', digits='Product Unit of Measure', readonly=True)
+    reserved_quantity = fields.Float('Reserved Quantity', digits='Product Unit of Measure', readonly=True)
+
+    # bump to rebuild the table from the quants at the next module update
+    _LEVEL_VERSION = '1'
+
+    def init(self):
+        # a full rebuild scans all the quants: only do it on install or when the
+        # table format changes, the cron takes care of the drifts
+        ICP = self.env['ir.config_parameter'].sudo()
+        if ICP.get_param('stock.product_level_version') != self._LEVEL_VERSION:
+            ICP.set_param('stock.product_level_synced', False)
+            ICP.set_param('stock.product_level_version', self._LEVEL_VERSION)
+        if not self._is_maintained():
+            return
+        self.env.cr.execute("SELECT 1 FROM stock_product_level LIMIT 1")
+        if self.env.cr.rowcount and ICP.get_param('stock.product_level_synced'):
+            return
+        self._rebuild()
+
+    @api.model
+    def _is_maintained(self):
+        return bool(self.env['ir.config_parameter'].sudo().get_param('stock.product_level_snapshot'))
+
+    @api.model
+    def _is_enabled(self):
+        """ Whether the quantities can be read from the table: it is maintained and
+        it was rebuilt since the last time it was not. """
+        return self._is_maintained() and bool(self.env['ir.config_parameter'].sudo().get_param('stock.product_level_synced'))
+
+    @api.model
+    def _track_changes(self):
+        """ Whether the changes of quants must be recorded in the table. When they
+        are not, the table is flagged as outdated: it must be rebuilt before being
+        read again. """
+        if self._is_maintained():
+            return True
+        ICP = self.env['ir.config_parameter'].sudo()
+        if ICP.get_param('stock.product_level_synced'):
+            ICP.set_param('stock.product_level_synced', False)
+        return False
+
+    @api.model
+    def _add_quantities(self, quantities):
+        """ Record a change of quants.
+
+        :param quantities: dict mapping (product_id, location_id, company_id) to
+            a (quantity, reserved_quantity) difference
+        """
+        rows = [
+            SQL("(%s, %s, %s, %s, %s)", product_id, location_id, company_id or None, quantity, reserved_quantity)
+            for (product_id, location_id, company_id), (quantity, reserved_quantity) in quantities.items()
+            if quantity or reserved_quantity
+        ]
+        if not rows:
+            return
+        self.env.cr.execute(SQL(
+            "INSERT INTO stock_product_level (product_id, location_id, company_id, quantity, reserved_quantity) VALUES %s",
+            SQL(", ").join(rows),
+        ))
+        self.invalidate_model()
+
+    @api.model
+    def _compact(self):
+        """ Fold the rows of every (product, location) into a single row. """
+        self.env.cr.execute("""
+            WITH deleted AS (
+                DELETE FROM stock_product_level
+                RETURNING product_id, location_id, company_id, quantity, reserved_quantity
+            )
+            INSERT INTO stock_product_level (product_id, location_id, company_id, quantity, reserved_quantity)
+                 SELECT product_id, location_id, company_id, SUM(quantity), SUM(reserved_quantity)
+                   FROM deleted
+               GROUP BY product_id, location_id, company_id
+                 HAVING SUM(quantity) != 0 OR SUM(reserved_quantity) != 0
+        """)
+        self.invalidate_model()
+
+    @api.model
+    def _rebuild(self):
+        """ Recompute the whole table from the quants. """
+        self.env['stock.quant'].flush_model(['product_id', 'location_id', 'company_id', 'quantity', 'reserved_quantity'])
+        self.env.cr.execute("""
+            DELETE FROM stock_product_level;
+            INSERT INTO stock_product_level (product_id, location_id, company_id, quantity, reserved_quantity)
+                 SELECT product_id, location_id, company_id, SUM(quantity), SUM(reserved_quantity)
+                   FROM stock_quant
+               GROUP BY product_id, location_id, company_id
+                 HAVING SUM(quantity) != 0 OR SUM(reserved_quantity) != 0
+        """)
+        self.invalidate_model()
+        self.env['ir.config_parameter'].sudo().set_param('stock.product_level_synced', True)
+
+    @api.model
+    def _check_consistency(self, rebuild=True):
+        """ Compare the table with the quants.
+
+        :param bool rebuild: rebuild the table if it drifted from the quants
+        :return: the number of (product, location) whose quantities differ
+        :rtype: int
+        """
+        self.env['stock.quant'].flush_model(['product_id', 'location_id', 'quantity', 'reserved_quantity'])
+        self.env.cr.execute("""
+            SELECT COUNT(*)
+              FROM (
+                    SELECT product_id, location_id, SUM(quantity) AS quantity, SUM(reserved_quantity) AS reserved_quantity
+                      FROM stock_quant
+                  GROUP BY product_id, location_id
+                   ) quant
+         FULL JOIN (
+                    SELECT product_id, location_id, SUM(quantity) AS quantity, SUM(reserved_quantity) AS reserved_quantity
+                      FROM stock_product_level
+                  GROUP BY product_id, location_id
+                   ) level
+                ON quant.product_id = level.product_id AND quant.location_id = level.location_id
+             WHERE round(COALESCE(quant.quantity, 0)::numeric, 6) != round(COALESCE(level.quantity, 0)::numeric, 6)
+                OR round(COALESCE(quant.reserved_quantity, 0)::numeric, 6) != round(COALESCE(level.reserved_quantity, 0)::numeric, 6)
+        """)
+        drift_count = self.env.cr.fetchone()[0]
+        if drift_count:
+            _logger.warning("The stock level snapshot differs from the quants for %d product/location pairs", drift_count)
+            if rebuild:
+                self._rebuild()
+        return drift_count
+
+    @api.model
+    def _cron_check_product_levels(self):
+        if not self._is_maintained():
+            return
+        if not self._is_enabled():
+            self._rebuild()
+            return
+        self._compact()
+        self._check_consistency()
@@ -7,6 +7,7 @@ from ast import literal_eval
 from collections import defaultdict
 from markupsafe import escape
 from psycopg2 import Error
+from time import monotonic
 
 from odoo import _, api, fields, models, SUPERUSER_ID
 from odoo.exceptions import UserError, ValidationError
@@ -266,6 +267,7 @@ class StockQuant(models.Model):
                 ] |= quant
 
         quants = self.env['stock.quant']
+        created_quants = self.env['stock.quant']
         is_inventory_mode = self._is_inventory_mode()
         allowed_fields = self._get_inventory_fields_create()
         for vals in vals_list:
@@ -311,8 +313,11 @@ class StockQuant(models.Model):
                 quant = super().create(vals)
                 _add_to_cache(quant)
                 quants |= quant
+                created_quants |= quant
                 if self._is_inventory_mode() and quant.company_id:
                     quant._check_company()
+        if created_quants and self.env['stock.product.level']._track_changes():
+            self.env['stock.product.level']._add_quantities(created_quants._get_product_level_quantities())
         return quants
 
     def _load_records_create(self, values):
@@ -360,7 +365,32 @@ class StockQuant(models.Model):
                 return
             self = self.sudo()
             raise UserError(_("Quant's editing is restricted, you can't do this operation."))
-        return super(StockQuant, self).write(vals)
+        if not {'product_id', 'location_id', 'quantity', 'reserved_quantity'} & vals.keys() or not self.env['stock.product.level']._track_changes():
+            return super(StockQuant, self).write(vals)
+        quantities = self._get_product_level_quantities(sign=-1)
+        res = super(StockQuant, self).write(vals)
+        for key, (quantity, reserved_quantity) in self._get_product_level_quantities().items():
+            quantities[key] = (quantities.get(key, (0.0, 0.0))[0] + quantity, quantities.get(key, (0.0, 0.0))[1] + reserved_quantity)
+        self.env['stock.product.level']._add_quantities(quantities)
+        return res
+
+    def unlink(self):
+        if not self or not self.env['stock.product.level']._track_changes():
+            return super().unlink()
+        quantities = self._get_product_level_quantities(sign=-1)
+        res = super().unlink()
+        self.env['stock.product.level']._add_quantities(quantities)
+        return res
+
+    def _get_product_level_quantities(self, sign=1):
+        """ Return the quantities of the quants summed per product and location,
+        see `stock.product.level._add_quantities`. """
+        quantities = {}
+        for quant in self.sudo():
+            key = (quant.product_id.id, quant.location_id.id, quant.company_id.id)
+            quantity, reserved_quantity = quantities.get(key, (0.0, 0.0))
+            quantities[key] = (quantity + sign * quant.quantity, reserved_quantity + sign * quant.reserved_quantity)
+        return quantities
 
     @api.ondelete(at_uninstall=False)
     def _unlink_except_wrong_permission(self):
@@ -850,6 +880,64 @@ class StockQuant(models.Model):
             else:
                 return sum([available_quantity for available_quantity in availaible_quantities.values() if float_compare(available_quantity, 0, precision_rounding=rounding) > 0])
 
+    def _get_available_quantities(self, requests, allow_negative=False):
+        """ Batched version of `_get_available_quantity`: return the available quantities of
+        several (product, location, lot, package, owner, strict) combinations from a single
+        grouped query. Identical combinations are only computed once.
+
+        :param requests: iterable of tuples (product_id, location_id, lot_id, package_id,
+            owner_id, strict) taking the same values as the arguments of
+            `_get_available_quantity`
+        :return: dict mapping each tuple of `requests` to its available quantity as a float
+        """
+        self = self.sudo()
+        requests = list(dict.fromkeys(requests))
+        if not requests:
+            return {}
+        products = self.env['product.product'].union(*(request[0] for request in requests))
+        locations = self.env['stock.location'].union(*(request[1] for request in requests))
+        domain = [('product_id', 'in', products.ids), ('location_id', 'child_of', locations.ids)]
+        if self.env.context.get('with_expiration'):
+            domain = expression.AND([['|', ('expiration_date', '>=', self.env.context['with_expiration']), ('expiration_date', '=', False)], domain])
+        quantities_by_product = defaultdict(list)
+        for product, location, lot, package, owner, quantity, reserved_quantity in self._read_group(
+            domain,
+            ['product_id', 'location_id', 'lot_id', 'package_id', 'owner_id'],
+            ['quantity:sum', 'reserved_quantity:sum'],
+        ):
+            quantities_by_product[product].append((location, lot, package, owner, quantity - reserved_quantity))
+
+        def _match(request, location, lot, package, owner):
+            product_id, location_id, lot_id, package_id, owner_id, strict = request
+            if strict:
+                return location == location_id and (lot.id in (lot_id.id, False) if lot_id else not lot) \
+                    and package == (package_id or package.browse()) and owner == (owner_id or owner.browse())
+            return location.parent_path.startswith(location_id.parent_path) \
+                and (not lot_id or lot.id in (lot_id.id, False)) \
+                and (not package_id or package == package_id) and (not owner_id or owner == owner_id)
+
+        res = {}
+        for request in requests:
+            product_id, location_id, lot_id, package_id, owner_id, strict = request
+            rounding = product_id.uom_id.rounding
+            available_quantities = defaultdict(float)
+            for location, lot, package, owner, available_quantity in quantities_by_product[product_id]:
+                if not _match(request, location, lot, package, owner):
+                    continue
+                if product_id.tracking != 'none' and not lot and strict and lot_id:
+                    continue
+                available_quantities[lot] += available_quantity
+            if product_id.tracking == 'none':
+                available_quantity = sum(available_quantities.values())
+                if not allow_negative and float_compare(available_quantity, 0.0, precision_rounding=rounding) < 0:
+                    available_quantity = 0.0
+            elif allow_negative:
+                available_quantity = sum(available_quantities.values())
+            else:
+                available_quantity = sum(quantity for quantity in available_quantities.values() if float_compare(quantity, 0, precision_rounding=rounding) > 0)
+            res[request] = available_quantity
+        return res
+
     def _get_reserve_quantity(self, product_id, location_id, quantity, product_packaging_id=None, uom_id=None, lot_id=None, package_id=None, owner_id=None, strict=False):
         """ Get the quantity available to reserve for the set of quants
         sharing the combination of `product_id, location_id` if `strict` is set to False or sharing
@@ -1141,42 +1229,180 @@ class StockQuant(models.Model):
         self.env.cr.execute(query, params)
         quants = self.env['stock.quant'].browse([quant['id'] for quant in self.env.cr.dictfetchall()])
         quants.sudo().unlink()
+        return len(quants)
 
     @api.model
     def _clean_reservations(self):
-        reserved_quants = self.env['stock.quant']._read_group(
-            [('reserved_quantity', '!=', 0)],
-            ['product_id', 'location_id', 'lot_id', 'package_id', 'owner_id'],
-            ['reserved_quantity:sum', 'id:recordset'],
-        )
-        reserved_move_lines = self.env['stock.move.line']._read_group(
-            [
-                ('state', 'in', ['assigned', 'partially_available', 'waiting', 'confirmed']),
-                ('quantity_product_uom', '!=', 0),
-                ('product_id.is_storable', '=', True),
-            ],
-            ['product_id', 'location_id', 'lot_id', 'package_id', 'owner_id'],
-            ['quantity_product_uom:sum'],
-        )
-        reserved_move_lines = {
-            (product, location, lot, package, owner): reserved_quantity
-            for product, location, lot, package, owner, reserved_quantity in reserved_move_lines
-        }
-        for product, location, lot, package, owner, reserved_quantity, quants in reserved_quants:
-            ml_reserved_qty = reserved_move_lines.get((product, location, lot, package, owner), 0)
+        """ Align the reserved quantity of the quants on the quantity reserved by
+        the move lines, in a single pass over both tables.
+
+        Quants of the same (product, location, lot, package, owner) are compared
+        as a whole with the move lines reserving from them. Over-reservations are
+        released from the quants reserving the most first, missing reservations
+        are spread over the quants having free quantity. The quants of locations
+        bypassing the reservation are fully unreserved. When called on a
+        recordset, only the products and locations of these quants are considered.
+
+        :return: tuple (number of corrected groups, absolute drift corrected)
+        """
+        self.env['stock.quant'].flush_model(['product_id', 'location_id', 'lot_id', 'package_id', 'owner_id', 'reserved_quantity', 'company_id'])
+        self.env['stock.move.line'].flush_model(['product_id', 'location_id', 'lot_id', 'package_id', 'owner_id', 'state', 'quantity_product_uom'])
+        self.env['product.product'].flush_model(['product_tmpl_id'])
+        self.env['product.template'].flush_model(['is_storable'])
+        quant_domain = SQL("TRUE")
+        move_line_domain = SQL("TRUE")
+        if self._ids:
+            quant_domain = SQL(
+                "product_id IN %s AND location_id IN %s",
+                tuple(self.product_id.ids), tuple(self.location_id.ids))
+            move_line_domain = SQL(
+                "ml.product_id IN %s AND ml.location_id IN %s",
+                tuple(self.product_id.ids), tuple(self.location_id.ids))
+        self.env.cr.execute(SQL("""
+            WITH quants AS (
+                SELECT product_id, location_id, lot_id, package_id, owner_id,
+                       SUM(reserved_quantity) AS reserved_quantity,
+                       ARRAY_AGG(id ORDER BY reserved_quantity DESC, id) AS quant_ids,
+                       ARRAY_AGG(reserved_quantity ORDER BY reserved_quantity DESC, id) AS quant_reserved_quantities
+                  FROM stock_quant
+                 WHERE reserved_quantity != 0
+                   AND %(quant_domain)s
+              GROUP BY product_id, location_id, lot_id, package_id, owner_id
+            ), move_lines AS (
+                SELECT ml.product_id, ml.location_id, ml.lot_id, ml.package_id, ml.owner_id,
+                       SUM(ml.quantity_product_uom) AS reserved_quantity
+                  FROM stock_move_line ml
+                  JOIN product_product pp ON pp.id = ml.product_id
+                  JOIN product_template pt ON pt.id = pp.product_tmpl_id
+                 WHERE ml.state IN ('assigned', 'partially_available', 'waiting', 'confirmed')
+                   AND ml.quantity_product_uom != 0
+                   AND pt.is_storable
+                   AND %(move_line_domain)s
+              GROUP BY ml.product_id, ml.location_id, ml.lot_id, ml.package_id, ml.owner_id
+            )
+            SELECT COALESCE(q.product_id, ml.product_id),
+                   COALESCE(q.location_id, ml.location_id),
+                   COALESCE(q.lot_id, ml.lot_id),
+                   COALESCE(q.package_id, ml.package_id),
+                   COALESCE(q.owner_id, ml.owner_id),
+                   COALESCE(q.reserved_quantity, 0),
+                   COALESCE(ml.reserved_quantity, 0),
+                   q.quant_ids,
+                   q.quant_reserved_quantities
+              FROM quants q
+         FULL JOIN move_lines ml
+                ON ml.product_id = q.product_id
+               AND ml.location_id = q.location_id
+               AND COALESCE(ml.lot_id, 0) = COALESCE(q.lot_id, 0)
+               AND COALESCE(ml.package_id, 0) = COALESCE(q.package_id, 0)
+               AND COALESCE(ml.owner_id, 0) = COALESCE(q.owner_id, 0)
+              JOIN stock_location loc ON loc.id = COALESCE(q.location_id, ml.location_id)
+             WHERE COALESCE(q.reserved_quantity, 0) != COALESCE(ml.reserved_quantity, 0)
+                -- the quants of the locations bypassing the reservation are always unreserved,
+                -- see `stock.location.should_bypass_reservation`
+                OR (q.quant_ids IS NOT NULL AND (loc.usage IN ('supplier', 'customer', 'inventory', 'production') OR loc.scrap_location))
+        """, quant_domain=quant_domain, move_line_domain=move_line_domain))
+        rows = self.env.cr.fetchall()
+
+        Product = self.env['product.product']
+        Location = self.env['stock.location']
+        # prefetch the products and locations of all the groups at once
+        Product.browse([row[0] for row in rows]).uom_id
+        Location.browse([row[1] for row in rows]).company_id
+        new_reserved_quantities = {}
+        quantities = defaultdict(float)
+        to_reserve = {}
+        corrected_count = 0
+        drift = 0.0
+        for product_id, location_id, lot_id, package_id, owner_id, reserved_quantity, ml_reserved_qty, quant_ids, quant_reserved_qties in rows:
+            product = Product.browse(product_id)
+            location = Location.browse(location_id)
+            rounding = product.uom_id.rounding
+            if not quant_ids:
+                # No quant reserves anything for these move lines, it may not even
+                # exist: let _update_reserved_quantity gather or create it.
+                lot = self.env['stock.lot'].browse(lot_id)
+                package = self.env['stock.quant.package'].browse(package_id)
+                owner = self.env['res.partner'].browse(owner_id)
+                if location.should_bypass_reservation() or\
+                        self.env['stock.quant']._should_bypass_product(product, location, ml_reserved_qty, lot, package, owner):
+                    continue
+                self.env['stock.quant']._update_reserved_quantity(product, location, ml_reserved_qty, lot_id=lot, package_id=package, owner_id=owner)
+                corrected_count += 1
+                drift += ml_reserved_qty
+                continue
             if location.should_bypass_reservation():
-                quants._update_reserved_quantity(product, location, -reserved_quantity, lot_id=lot, package_id=package, owner_id=owner)
-            elif float_compare(reserved_quantity, ml_reserved_qty, precision_rounding=product.uom_id.rounding) != 0:
-                quants._update_reserved_quantity(product, location, ml_reserved_qty - reserved_quantity, lot_id=lot, package_id=package, owner_id=owner)
-            if ml_reserved_qty:
-                del reserved_move_lines[(product, location, lot, package, owner)]
-
-        for (product, location, lot, package, owner), reserved_quantity in reserved_move_lines.items():
-            if location.should_bypass_reservation() or\
-                self.env['stock.quant']._should_bypass_product(product, location, reserved_quantity, lot, package, owner):
+                ml_reserved_qty = 0.0
+            elif float_compare(reserved_quantity, ml_reserved_qty, precision_rounding=rounding) == 0:
+                continue
+            corrected_count += 1
+            drift += abs(ml_reserved_qty - reserved_quantity)
+            new_quantities = {}
+            if location.should_bypass_reservation():
+                new_quantities = dict.fromkeys(quant_ids, 0.0)
+            elif ml_reserved_qty > reserved_quantity:
+                # spread over the free quantities of all the quants of the group, see below
+                to_reserve[product_id, location_id, lot_id or 0, package_id or 0, owner_id or 0] = ml_reserved_qty - reserved_quantity
                 continue
             else:
-                self.env['stock.quant']._update_reserved_quantity(product, location, reserved_quantity, lot_id=lot, package_id=package, owner_id=owner)
+                # unreserve from the quants reserving the most first
+                to_unreserve = reserved_quantity - ml_reserved_qty
+                for quant_id, quant_reserved_qty in zip(quant_ids, quant_reserved_qties):
+                    if float_compare(to_unreserve, 0, precision_rounding=rounding) <= 0:
+                        break
+                    unreserved_qty = min(max(quant_reserved_qty, 0), to_unreserve)
+                    new_quantities[quant_id] = max(0, quant_reserved_qty - unreserved_qty)
+                    to_unreserve -= unreserved_qty
+            for quant_id, quant_reserved_qty in zip(quant_ids, quant_reserved_qties):
+                if quant_id in new_quantities:
+                    quantities[product.id, location.id, location.company_id.id] += new_quantities[quant_id] - quant_reserved_qty
+            new_reserved_quantities.update(new_quantities)
+
+        if to_reserve:
+            self.env.cr.execute(SQL("""
+                SELECT id, product_id, location_id, COALESCE(lot_id, 0), COALESCE(package_id, 0), COALESCE(owner_id, 0),
+                       quantity, reserved_quantity
+                  FROM stock_quant
+                 WHERE (product_id, location_id, COALESCE(lot_id, 0), COALESCE(package_id, 0), COALESCE(owner_id, 0)) IN %s
+              ORDER BY quantity - reserved_quantity DESC, id
+            """, tuple(to_reserve)))
+            quants_by_group = defaultdict(list)
+            for quant_id, *key, quantity, quant_reserved_qty in self.env.cr.fetchall():
+                quants_by_group[tuple(key)].append((quant_id, quantity, quant_reserved_qty))
+            for key, missing_qty in to_reserve.items():
+                product = Product.browse(key[0])
+                location = Location.browse(key[1])
+                group_quants = quants_by_group[key]
+                for quant_id, quantity, quant_reserved_qty in group_quants:
+                    if float_compare(missing_qty, 0, precision_rounding=product.uom_id.rounding) <= 0:
+                        break
+                    reserved_qty = min(max(quantity - quant_reserved_qty, 0), missing_qty)
+                    if not reserved_qty:
+                        continue
+                    new_reserved_quantities[quant_id] = quant_reserved_qty + reserved_qty
+                    missing_qty -= reserved_qty
+                if float_compare(missing_qty, 0, precision_rounding=product.uom_id.rounding) > 0:
+                    # the move lines reserve more than available, keep the remainder on the first quant
+                    quant_id, quantity, quant_reserved_qty = group_quants[0]
+                    new_reserved_quantities[quant_id] = new_reserved_quantities.get(quant_id, quant_reserved_qty) + missing_qty
+                quantities[product.id, location.id, location.company_id.id] += to_reserve[key]
+
+        if new_reserved_quantities:
+            self.env.cr.execute(SQL("""
+                UPDATE stock_quant q
+                   SET reserved_quantity = v.reserved_quantity
+                  FROM (VALUES %s) AS v(id, reserved_quantity)
+                 WHERE q.id = v.id
+            """, SQL(", ").join(
+                SQL("(%s, %s::double precision)", quant_id, reserved_quantity)
+                for quant_id, reserved_quantity in new_reserved_quantities.items()
+            )))
+            self.env['stock.quant'].invalidate_model(['reserved_quantity', 'available_quantity'])
+            if self.env['stock.product.level']._track_changes():
+                self.env['stock.product.level']._add_quantities({
+                    key: (0.0, reserved_quantity) for key, reserved_quantity in quantities.items()
+                })
+        return corrected_count, drift
 
     @api.model
     def _merge_quants(self):
@@ -1184,6 +1410,8 @@ class StockQuant(models.Model):
         `_update_available_quantity` and another concurrent one calls this function with the same
         argument, we’ll create a new quant in order for these transactions to not rollback. This
         method will find and deduplicate these quants.
+
+        :return: the number of duplicated quants removed
         """
         params = []
         query = """WITH
@@ -1221,15 +1449,24 @@ class StockQuant(models.Model):
         try:
             with self.env.cr.savepoint():
                 self.env.cr.execute(query, params)
+                merged_count = self.env.cr.rowcount
                 self.env.invalidate_all()
         except Error as e:
             _logger.info('an error occurred while merging quants: %s', e.pgerror)
+            return 0
+        return merged_count
 
     @api.model
     def _quant_tasks(self):
-        self._merge_quants()
-        self._clean_reservations()
-        self._unlink_zero_quants()
+        start = monotonic()
+        merged_count = self._merge_quants()
+        corrected_count, drift = self._clean_reservations()
+        unlinked_count = self._unlink_zero_quants()
+        if merged_count or corrected_count or unlinked_count:
+            _logger.info(
+                "Quant maintenance: %d duplicated quants merged, reservations of %d groups corrected "
+                "(total drift %.2f), %d empty quants removed in %.2fs",
+                merged_count, corrected_count, drift, unlinked_count, monotonic() - start)
 
     @api.model
     def _is_inventory_mode(self):
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+
+class StockQuantityCheckpoint(models.Model):
+    """ On hand quantities per product and location frozen at a given date.
+
+    Quantities in the past are computed from the checkpoint closest to the
+    requested date, replaying only the done moves between both dates instead of
+    every move done since the requested date. Checkpoints are taken daily by a
+    cron; past `_get_retention_days` only the first checkpoint of each month is
+    kept. A checkpoint is removed as soon as a move done before its date is
+    changed, as it could not be replayed from it anymore.
+    """
+    _name = 'stock.quantity.checkpoint'
+    _description = 'Stock Quantity Checkpoint'
+    _order = 'date desc, id'
+    _log_access = False
+
+    date = fields.Datetime('Date', required=True, index=True, readonly=True)
+    product_id = fields.Many2one('product.product', 'Product', required=True, index=True, ondelete='cascade', readonly=True)
+    location_id = fields.Many2one('stock.location', 'Location', index=True, ondelete='cascade', readonly=True)
+    company_id = fields.Many2one('res.company', 'Company', readonly=True)
+    quantity = fields.Float('Quantity', digits='Product Unit of Measure', readonly=True)
+
+    @api.model
+    def _get_retention_days(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param('stock.quantity_checkpoint_retention_days', 31))
+
+    @api.model
+    def _get_margin(self):
+        """ Delay between the checkpoints and their creation, leaving the time
+        to the transactions in progress to be committed. """
+        return timedelta(hours=1)
+
+    @api.model
+    def _create_checkpoint(self, date=None):
+        """ Store the quantities of every product and location at `date`: the
+        current quants minus the moves done after that date.
+
+        :param datetime date: the date of the checkpoint, now by default
+        :return: the date of the checkpoint
+        """
+        date = date or fields.Datetime.now()
+        self.env['stock.quant'].flush_model(['product_id', 'location_id', 'quantity'])
+        self.env['stock.move.line'].flush_model(['product_id', 'location_id', 'location_dest_id', 'quantity_product_uom', 'move_id'])
+        self.env['stock.move'].flush_model(['state', 'date'])
+        self.env['stock.location'].flush_model(['company_id'])
+        self.env['product.product'].flush_model(['product_tmpl_id'])
+        self.env['product.template'].flush_model(['is_storable'])
+        self.env.cr.execute(SQL("""
+            WITH later_move_lines AS (
+                SELECT ml.product_id, ml.location_id, ml.location_dest_id, ml.quantity_product_uom
+                  FROM stock_move_line ml
+                  JOIN stock_move m ON m.id = ml.move_id
+                  JOIN product_product pp ON pp.id = ml.product_id
+                  JOIN product_template pt ON pt.id = pp.product_tmpl_id
+                 WHERE m.state = 'done'
+                   AND m.date > %(date)s
+                   AND pt.is_storable
+            )
+            INSERT INTO stock_quantity_checkpoint (date, product_id, location_id, company_id, quantity)
+                 SELECT %(date)s, quantities.product_id, quantities.location_id, location.company_id, SUM(quantities.quantity)
+                   FROM (
+                        SELECT product_id, location_id, quantity FROM stock_quant
+                         UNION ALL
+                        SELECT product_id, location_dest_id, -quantity_product_uom FROM later_move_lines
+                         UNION ALL
+                        SELECT product_id, location_id, quantity_product_uom FROM later_move_lines
+                        ) quantities
+                   JOIN stock_location location ON location.id = quantities.location_id
+               GROUP BY quantities.product_id, quantities.location_id, location.company_id
+                 HAVING SUM(quantities.quantity) != 0
+        """, date=date))
+        self.invalidate_model()
+        return date
+
+    @api.model
+    def _invalidate(self, date):
+        """ Remove the checkpoints taken from `date` on, when a move done at
+        `date` changed after they were taken. """
+        self.env.cr.execute(SQL("DELETE FROM stock_quantity_checkpoint WHERE date >= %s", date))
+        if self.env.cr.rowcount:
+            self.invalidate_model()
+
+    @api.model
+    def _prune(self):
+        """ Only keep the first checkpoint of each month past the retention period. """
+        limit = fields.Datetime.now() - timedelta(days=self._get_retention_days())
+        self.env.cr.execute(SQL("""
+            DELETE FROM stock_quantity_checkpoint
+                  WHERE date < %(limit)s
+                    AND date NOT IN (
+                            SELECT MIN(date)
+                              FROM stock_quantity_checkpoint
+                             WHERE date < %(limit)s
+                          GROUP BY date_trunc('month', date)
+                        )
+        """, limit=limit))
+        self.invalidate_model()
+
+    @api.model
+    def _get_nearest_date(self, date):
+        """ Return the date of the checkpoint closest to `date`, or False when
+        the current quantities are closer to it than any checkpoint.
+        """
+        self.env.cr.execute(SQL("""
+            SELECT (SELECT MAX(date) FROM stock_quantity_checkpoint WHERE date <= %(date)s),
+                   (SELECT MIN(date) FROM stock_quantity_checkpoint WHERE date > %(date)s)
+        """, date=date))
+        before, after = self.env.cr.fetchone()
+        nearest_date = False
+        nearest_delta = fields.Datetime.now() - date
+        for checkpoint_date in (before, after):
+            if checkpoint_date and abs(checkpoint_date - date) < nearest_delta:
+                nearest_date = checkpoint_date
+                nearest_delta = abs(checkpoint_date - date)
+        return nearest_date
+
+    @api.model
+    def _cron_create_checkpoint(self):
+        self._create_checkpoint(fields.Datetime.now() - self._get_margin())
+        self._prune()
@@ -10,7 +10,7 @@ from odoo.exceptions import UserError, ValidationError
 from odoo.modules.registry import Registry
 from odoo.osv import expression
 from odoo.sql_db import BaseCursor
-from odoo.tools import float_compare, float_is_zero
+from odoo.tools import float_compare, float_is_zero, ormcache, SQL
 from odoo.tools.misc import split_every
 
 _logger = logging.getLogger(__name__)
@@ -114,6 +114,20 @@ class StockRule(models.Model):
                 vals['name'] = _("%s (copy)", rule.name)
         return vals_list
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        # invalidate the rule resolution cache of `procurement.group._get_rule`
+        self.env.registry.clear_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.env.registry.clear_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super().unlink()
+
     @api.constrains('company_id')
     def _check_company_consistency(self):
         for rule in self:
@@ -490,13 +504,15 @@ class ProcurementGroup(models.Model):
                 raise ProcurementException(procurement_errors)
         actions_to_run = defaultdict(list)
         procurement_errors = []
+        procurements_to_run = []
         for procurement in procurements:
             procurement.values.setdefault('company_id', procurement.location_id.company_id)
             procurement.values.setdefault('priority', '0')
             procurement.values.setdefault('date_planned', procurement.values.get('date_planned', False) or fields.Datetime.now())
             if self._skip_procurement(procurement):
                 continue
-            rule = self._get_rule(procurement.product_id, procurement.location_id, procurement.values)
+            procurements_to_run.append(procurement)
+        for procurement, rule in zip(procurements_to_run, self._get_rules(procurements_to_run)):
             if not rule:
                 error = _('No rule has been found to replenish "%(product)s" in "%(location)s".\nVerify the routes configuration on the product.',
                     product=procurement.product_id.display_name, location=procurement.location_id.display_name)
@@ -572,14 +588,95 @@ class ProcurementGroup(models.Model):
                 res = Rule.search(expression.AND([[('route_id', 'in', warehouse_routes.ids)], domain]), order='route_sequence, sequence', limit=1)
         return res
 
+    @api.model
+    def _get_rules(self, procurements):
+        """ Resolve the pull rule of every procurement in one pass.
+
+        Procurements sharing the same rule cache key (see `_get_rule_cache_key`)
+        are only resolved once, which is the common case when the scheduler
+        runs over many orderpoints of the same warehouse.
+
+        :param procurements: list of `Procurement`
+        :return: list of `stock.rule` records, in the order of `procurements`
+        """
+        rules_by_key = {}
+        rules = []
+        for procurement in procurements:
+            product, location, values = procurement.product_id, procurement.location_id, procurement.values
+            if not location:
+                rules.append(self.env['stock.rule'])
+                continue
+            key = self._get_rule_cache_key(product, location, values)
+            if key is None:
+                rules.append(self._search_rule_for_location(product, location, values))
+                continue
+            if key not in rules_by_key:
+                rules_by_key[key] = self._get_rule_from_key(key, product, location, values)
+            rules.append(rules_by_key[key])
+        return rules
+
+    @api.model
+    def _get_rule_cache_key(self, product_id, location_id, values):
+        """ Return a hashable key describing everything the rule resolution
+        depends on for the given arguments, or None if the result must not be
+        cached.
+
+        The key contains the rule domain (thus the location ancestry and any
+        restriction added by overrides of `_get_rule_domain`) and the route sets
+        of the procurement, the packaging, the product (with its category) and
+        the warehouse. The product itself is not part of the key: the resolution
+        only depends on its routes, so that products sharing them share the
+        cached rule. The cache is cleared whenever a rule, a route or the routes
+        of a warehouse are modified.
+        """
+        if not location_id.parent_path:
+            return None
+        locations = self.env['stock.location'].browse(
+            int(location) for location in reversed(location_id.parent_path.split('/')[:-1])
+        )
+        route_ids = values.get('route_ids') or self.env['stock.route']
+        packaging_id = values.get('product_packaging_id') or self.env['product.packaging']
+        product_routes = product_id.route_ids | product_id.categ_id.total_route_ids
+        warehouse_key = None
+        if 'warehouse_id' in values:
+            warehouse_id = values['warehouse_id'] or self.env['stock.warehouse']
+            warehouse_key = (warehouse_id.id, tuple(sorted(warehouse_id.route_ids.ids)))
+        return (
+            self.env.uid, self.env.su, tuple(self.env.companies.ids), self.env.context.get('active_test', True),
+            location_id.id, str(self._get_rule_domain(locations, values)),
+            tuple(sorted(route_ids.ids)),
+            packaging_id.id, tuple(sorted(packaging_id.route_ids.ids)),
+            tuple(sorted(product_routes.ids)),
+            warehouse_key,
+        )
+
+    @api.model
+    @ormcache('key')
+    def _get_rule_id(self, key, product_id, location_id, values):
+        return self._search_rule_for_location(product_id, location_id, values).id
+
     @api.model
     def _get_rule(self, product_id, location_id, values):
         """ Find a pull rule for the location_id, fallback on the parent
         locations if it could not be found.
+
+        Results are cached per `_get_rule_cache_key`.
         """
-        result = self.env['stock.rule']
         if not location_id:
-            return result
+            return self.env['stock.rule']
+        key = self._get_rule_cache_key(product_id, location_id, values)
+        if key is None:
+            return self._search_rule_for_location(product_id, location_id, values)
+        return self._get_rule_from_key(key, product_id, location_id, values)
+
+    @api.model
+    def _get_rule_from_key(self, key, product_id, location_id, values):
+        return self.env['stock.rule'].browse(self._get_rule_id(key, product_id, location_id, values))
+
+    @api.model
+    def _search_rule_for_location(self, product_id, location_id, values):
+        """ Uncached implementation of `_get_rule`. """
+        result = self.env['stock.rule']
         locations = location_id
         # Get the location hierarchy, starting from location_id up to its root location.
         while locations[-1].location_id:
@@ -705,8 +802,7 @@ class ProcurementGroup(models.Model):
         task_done = 0
 
         # Minimum stock rules
-        domain = self._get_orderpoint_domain(company_id=company_id)
-        orderpoints = self.env['stock.warehouse.orderpoint'].search(domain)
+        orderpoints = self._get_scheduler_orderpoints(company_id=company_id)
         orderpoints.sudo()._procure_orderpoint_confirm(use_new_cursor=use_new_cursor, company_id=company_id, raise_user_error=False)
         task_done += 1
 
@@ -745,11 +841,44 @@ class ProcurementGroup(models.Model):
         return 3
 
     @api.model
-    def run_scheduler(self, use_new_cursor=False, company_id=False):
+    def _get_scheduler_orderpoints(self, company_id=False):
+        """ Return the orderpoints to procure. When the context holds a
+        `stock_scheduler_shard` (index, count), only the orderpoints of the product
+        bucket `index` out of `count` are returned (see `run_scheduler`). """
+        Orderpoint = self.env['stock.warehouse.orderpoint']
+        domain = self._get_orderpoint_domain(company_id=company_id)
+        shard = self.env.context.get('stock_scheduler_shard')
+        if not shard:
+            return Orderpoint.search(domain)
+        shard_index, shard_count = shard
+        Orderpoint.flush_model()
+        self.env['product.product'].flush_model(['active'])
+        self._cr.execute(SQL("""
+            SELECT id
+              FROM stock_warehouse_orderpoint
+             WHERE MOD(product_id, %(shard_count)s) = %(shard_index)s
+               AND id IN %(orderpoints)s
+          ORDER BY id
+        """, shard_count=shard_count, shard_index=shard_index, orderpoints=Orderpoint._search(domain).subselect()))
+        return Orderpoint.browse([row[0] for row in self._cr.fetchall()])
+
+    @api.model
+    def run_scheduler(self, use_new_cursor=False, company_id=False, shard_index=None, shard_count=1):
         """ Call the scheduler in order to check the running procurements (super method), to check the minimum stock rules
         and the availability of moves. This function is intended to be run for all the companies at the same time, so
-        we run functions as SUPERUSER to avoid intercompanies and access rights issues. """
+        we run functions as SUPERUSER to avoid intercompanies and access rights issues.
+
+        When `shard_index` is given, only the orderpoints of that product bucket out of `shard_count` are procured.
+        Several scheduled actions calling e.g. `model.run_scheduler(True, shard_index=i, shard_count=4)` for i in 0..3
+        can then be run in parallel by different cron workers, each with its own cursor. The shard 0 also assigns
+        the waiting moves and runs the quant tasks, so it must always be scheduled. """
         try:
+            if shard_index is not None:
+                self = self.with_context(stock_scheduler_shard=(shard_index, shard_count))
+                if shard_index != 0:
+                    orderpoints = self._get_scheduler_orderpoints(company_id=company_id)
+                    orderpoints.sudo()._procure_orderpoint_confirm(use_new_cursor=use_new_cursor, company_id=company_id, raise_user_error=False)
+                    return {}
             self._run_scheduler_tasks(use_new_cursor=use_new_cursor, company_id=company_id)
         except Exception:
             _logger.error("Error during stock scheduler", exc_info=True)
@@ -187,6 +187,10 @@ class Warehouse(models.Model):
                 if warehouse.company_id.id != vals['company_id']:
                     raise UserError(_("Changing the company of this record is forbidden at this point, you should rather archive it and create a new one."))
 
+        if 'route_ids' in vals:
+            # invalidate the rule resolution cache of `procurement.group._get_rule`
+            self.env.registry.clear_cache()
+
         Route = self.env['stock.route']
         warehouses = self.with_context(active_test=False)
         warehouses._create_missing_locations(vals)
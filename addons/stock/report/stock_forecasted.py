@@ -187,7 +187,22 @@ class StockForecasted(models.AbstractModel):
     def _get_report_moves_fields(self):
         return ['id', 'date']
 
+    def _prepare_report_lines(self, line_values, read=True):
+        return [self._prepare_report_line(read=read, **values) for values in line_values]
+
     def _get_report_lines(self, product_template_ids, product_ids, wh_location_ids, wh_stock_location, read=True):
+        line_values = self._get_report_line_values(product_template_ids, product_ids, wh_location_ids, wh_stock_location)
+        return self._prepare_report_lines(line_values, read=read)
+
+    def _get_report_line_values(self, product_template_ids, product_ids, wh_location_ids, wh_stock_location):
+        """ Reconcile the outgoing moves of the products with their reservations, the
+        stock and the incoming moves.
+
+        Lines are only described by the arguments of `_prepare_report_line`, so that
+        callers only pay the rendering of the lines they actually display.
+
+        :return: list of dict of `_prepare_report_line` keyword arguments
+        """
 
         def _get_out_move_reserved_data(out, linked_moves, used_reserved_moves, currents):
             reserved_out = 0
@@ -248,7 +263,7 @@ class StockForecasted(models.AbstractModel):
                 'taken_from_stock': taken_from_stock_out,
             }
 
-        def _reconcile_out_with_ins(lines, out, ins, demand, product_rounding, in_id_to_in_data, ins_per_product, dest_ids_to_in_ids, read=True):
+        def _reconcile_out_with_ins(lines, out, ins, demand, product_rounding, in_id_to_in_data, ins_per_product, dest_ids_to_in_ids):
             ins_to_remove = []
             for in_id in ins:
                 in_data = in_id_to_in_data[in_id]
@@ -257,7 +272,7 @@ class StockForecasted(models.AbstractModel):
                     continue
                 taken_from_in = min(demand, in_data['qty'])
                 demand -= taken_from_in
-                lines.append(self._prepare_report_line(taken_from_in, move_in=in_data['move'], move_out=out, read=read))
+                lines.append({'quantity': taken_from_in, 'move_in': in_data['move'], 'move_out': out})
                 in_data['qty'] -= taken_from_in
                 if in_data['qty'] <= 0:
                     ins_to_remove.append(in_id)
@@ -373,7 +388,7 @@ class StockForecasted(models.AbstractModel):
                 if reserved_out > 0:
                     demand_out = max(demand_out - reserved_out, 0)
                     in_transit = bool(reserved_move.move_orig_ids)
-                    lines.append(self._prepare_report_line(reserved_out, move_out=out, reserved_move=reserved_move, in_transit=in_transit, read=read))
+                    lines.append({'quantity': reserved_out, 'move_out': out, 'reserved_move': reserved_move, 'in_transit': in_transit})
 
                 if float_is_zero(demand_out, precision_rounding=product_rounding):
                     continue
@@ -381,7 +396,7 @@ class StockForecasted(models.AbstractModel):
                 # Reconcile with the current stock.
                 if taken_from_stock_out > 0:
                     demand_out = max(demand_out - taken_from_stock_out, 0)
-                    lines.append(self._prepare_report_line(taken_from_stock_out, move_out=out, read=read))
+                    lines.append({'quantity': taken_from_stock_out, 'move_out': out})
 
                 if float_is_zero(demand_out, precision_rounding=product_rounding):
                     continue
@@ -391,36 +406,36 @@ class StockForecasted(models.AbstractModel):
                 if unreservable_qty > 0:
                     demand_out -= unreservable_qty
                     transit_stock -= unreservable_qty
-                    lines.append(self._prepare_report_line(unreservable_qty, move_out=out, in_transit=True, read=read))
+                    lines.append({'quantity': unreservable_qty, 'move_out': out, 'in_transit': True})
 
                 if float_is_zero(demand_out, precision_rounding=product_rounding):
                     continue
 
                 # Reconcile with the ins.
-                demand_out = _reconcile_out_with_ins(lines, out, dest_ids_to_in_ids[out.id], demand_out, product_rounding, in_id_to_in_data, ins_per_product, dest_ids_to_in_ids, read=read)
+                demand_out = _reconcile_out_with_ins(lines, out, dest_ids_to_in_ids[out.id], demand_out, product_rounding, in_id_to_in_data, ins_per_product, dest_ids_to_in_ids)
 
                 if not float_is_zero(demand_out, precision_rounding=product_rounding):
                     unreconciled_outs.append((demand_out, out))
 
             # Another pass, in case there are some ins linked to a dest move but that still have some quantity available
             for (demand, out) in unreconciled_outs:
-                demand = _reconcile_out_with_ins(lines, out, ins_per_product[product.id], demand, product_rounding, in_id_to_in_data, ins_per_product, dest_ids_to_in_ids, read=read)
+                demand = _reconcile_out_with_ins(lines, out, ins_per_product[product.id], demand, product_rounding, in_id_to_in_data, ins_per_product, dest_ids_to_in_ids)
                 if not float_is_zero(demand, precision_rounding=product_rounding):
                     # Not reconciled
-                    lines.append(self._prepare_report_line(demand, move_out=out, replenishment_filled=False, read=read))
+                    lines.append({'quantity': demand, 'move_out': out, 'replenishment_filled': False})
             # Stock in transit
             if not float_is_zero(transit_stock, precision_rounding=product_rounding):
-                lines.append(self._prepare_report_line(transit_stock, product=product, in_transit=True, read=read))
+                lines.append({'quantity': transit_stock, 'product': product, 'in_transit': True})
 
             # Unused remaining stock.
             if not float_is_zero(free_stock, precision_rounding=product_rounding):
-                lines.append(self._prepare_report_line(free_stock, product=product, read=read))
+                lines.append({'quantity': free_stock, 'product': product})
             # In moves not used.
             for in_id in ins_per_product[product.id]:
                 in_data = in_id_to_in_data[in_id]
                 if float_is_zero(in_data['qty'], precision_rounding=product_rounding):
                     continue
-                lines.append(self._prepare_report_line(in_data['qty'], move_in=in_data['move'], read=read))
+                lines.append({'quantity': in_data['qty'], 'move_in': in_data['move']})
         return lines
 
     @api.model
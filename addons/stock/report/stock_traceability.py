@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+from collections import defaultdict
+
 from odoo import api, models, _
-from odoo.tools import format_datetime
+from odoo.tools import format_datetime, SQL
 from markupsafe import Markup
 
 
@@ -22,33 +24,106 @@ class MrpStockReport(models.TransientModel):
     _name = 'stock.traceability.report'
     _description = 'Traceability Report'
 
+    @api.model
+    def _get_children_query(self):
+        """ Return the SQL selecting the done move lines the move line aliased as
+        `parent` comes from: the lines of its origin moves with the same lot (MTO),
+        otherwise the lines of the same product and lot that entered the internal
+        location it left, before it did (MTS).
+        """
+        return SQL("""
+            SELECT sml.id
+              FROM stock_move_move_rel rel
+              JOIN stock_move_line sml ON sml.move_id = rel.move_orig_id
+             WHERE rel.move_dest_id = parent.move_id
+               AND sml.state = 'done'
+               AND (sml.lot_id = parent.lot_id OR (sml.lot_id IS NULL AND parent.lot_id IS NULL))
+         UNION ALL
+            SELECT sml.id
+              FROM stock_move_line sml
+              JOIN stock_location parent_location ON parent_location.id = parent.location_id
+             WHERE NOT EXISTS (SELECT 1 FROM stock_move_move_rel rel WHERE rel.move_dest_id = parent.move_id)
+               AND parent_location.usage IN ('internal', 'transit')
+               AND sml.product_id = parent.product_id
+               AND (sml.lot_id = parent.lot_id OR (sml.lot_id IS NULL AND parent.lot_id IS NULL))
+               AND sml.location_dest_id = parent.location_id
+               AND sml.date <= parent.date
+               AND sml.state = 'done'
+        """)
+
+    def _flush_traceability(self):
+        self.env['stock.move.line'].flush_model(['move_id', 'lot_id', 'product_id', 'location_id', 'location_dest_id', 'date', 'state'])
+        self.env['stock.move'].flush_model(['move_orig_ids'])
+        self.env['stock.location'].flush_model(['usage'])
+
+    @api.model
+    def _get_move_line_children(self, move_lines):
+        """ Return a dict mapping the id of each of `move_lines` to the list of
+        ids of the move lines it directly comes from.
+        """
+        self._flush_traceability()
+        self.env.cr.execute(SQL("""
+            SELECT parent.id, child.id
+              FROM stock_move_line parent
+        CROSS JOIN LATERAL (%s) child
+             WHERE parent.id = ANY(%s)
+          ORDER BY parent.id, child.id
+        """, self._get_children_query(), list(move_lines.ids)))
+        children = defaultdict(list)
+        for parent_id, child_id in self.env.cr.fetchall():
+            children[parent_id].append(child_id)
+        return children
+
+    @api.model
+    def _get_unfoldable_move_lines(self, move_lines):
+        """ Return the ids of `move_lines` coming from at least one other move line. """
+        if not move_lines:
+            return set()
+        self._flush_traceability()
+        self.env.cr.execute(SQL("""
+            SELECT parent.id
+              FROM stock_move_line parent
+             WHERE parent.id = ANY(%s)
+               AND EXISTS (SELECT 1 FROM (%s) child WHERE child.id != parent.id)
+        """, list(move_lines.ids), self._get_children_query()))
+        return {line_id for line_id, in self.env.cr.fetchall()}
+
     @api.model
     def _get_move_lines(self, move_lines, line_id=None):
-        lines_seen = move_lines
-        lines_todo = list(move_lines)
+        if not move_lines:
+            return self.env['stock.move.line']
+        if line_id is None:
+            # the whole upstream tree, in a single recursive query
+            self._flush_traceability()
+            self.env.cr.execute(SQL("""
+                WITH RECURSIVE traced(id) AS (
+                        SELECT id
+                          FROM stock_move_line
+                         WHERE id = ANY(%(ids)s)
+                     UNION
+                        SELECT child.id
+                          FROM traced
+                          JOIN stock_move_line parent ON parent.id = traced.id
+                    CROSS JOIN LATERAL (%(children)s) child
+                )
+                SELECT id FROM traced WHERE id != ALL(%(ids)s)
+            """, ids=list(move_lines.ids), children=self._get_children_query()))
+            traced_ids = [traced_id for traced_id, in self.env.cr.fetchall()]
+            return self.env['stock.move.line'].search([('id', 'in', traced_ids)])
+
+        # only follow the lines leading to `line_id`, one level at a time
+        lines_seen = set(move_lines.ids)
+        lines_todo = list(move_lines.ids)
         while lines_todo:
-            move_line = lines_todo.pop(0)
-            # if MTO
-            if move_line.move_id.move_orig_ids:
-                lines = move_line.move_id.move_orig_ids.mapped('move_line_ids').filtered(
-                    lambda m: m.lot_id == move_line.lot_id and m.state == 'done'
-                ) - lines_seen
-            # if MTS
-            elif move_line.location_id.usage in ('internal', 'transit'):
-                lines = self.env['stock.move.line'].search([
-                    ('product_id', '=', move_line.product_id.id),
-                    ('lot_id', '=', move_line.lot_id.id),
-                    ('location_dest_id', '=', move_line.location_id.id),
-                    ('id', 'not in', lines_seen.ids),
-                    ('date', '<=', move_line.date),
-                    ('state', '=', 'done')
-                ])
-            else:
-                continue
-            if line_id is None or line_id in lines.ids:
-                lines_todo += list(lines)
-            lines_seen |= lines
-        return lines_seen - move_lines
+            children = self._get_move_line_children(self.env['stock.move.line'].browse(lines_todo))
+            lines_next = []
+            for move_line_id in lines_todo:
+                lines = [child_id for child_id in children[move_line_id] if child_id not in lines_seen]
+                if line_id in lines:
+                    lines_next += lines
+                lines_seen.update(lines)
+            lines_todo = lines_next
+        return self.env['stock.move.line'].search([('id', 'in', list(lines_seen - set(move_lines.ids)))])
 
     @api.model
     def get_lines(self, line_id=False, **kw):
@@ -182,10 +257,11 @@ class MrpStockReport(models.TransientModel):
             else:
                 # Traceability in case of consumed in.
                 lines = self._get_move_lines(move_line, line_id=line_id)
+        unfoldable_ids = set()
+        if model != "stock.lot":
+            unfoldable_ids = self._get_unfoldable_move_lines(self.env['stock.move.line'].concat(*lines).filtered('lot_id'))
         for line in lines:
-            unfoldable = False
-            if line.consume_line_ids or (model != "stock.lot" and line.lot_id and self._get_move_lines(line)):
-                unfoldable = True
+            unfoldable = bool(line.consume_line_ids) or line.id in unfoldable_ids
             final_vals += self._make_dict_move(level, parent_id=line_id, move_line=line, unfoldable=unfoldable)
         return final_vals
 
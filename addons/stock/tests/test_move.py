@@ -1324,6 +1324,41 @@ class StockMove(TransactionCase):
         # check if the putaway wasn't applied
         self.assertEqual(move2.move_line_ids.location_dest_id.id, self.stock_location.id)
 
+    def test_putaway_with_storage_category_batch(self):
+        """Receive several lines of a product at once. Test the occupancy of the
+        locations takes into account the lines already put away in the batch.
+        """
+        storage_category = self.env['stock.storage.category'].create({
+            'name': "storage category",
+            'product_capacity_ids': [Command.create({'product_id': self.product.id, 'quantity': 100})],
+        })
+        shelf1_location, shelf2_location = self.env['stock.location'].create([{
+            'name': name,
+            'usage': 'internal',
+            'location_id': self.stock_location.id,
+            'storage_category_id': storage_category.id,
+        } for name in ('shelf1', 'shelf2')])
+        self.env['stock.putaway.rule'].create({
+            'product_id': self.product.id,
+            'location_in_id': self.stock_location.id,
+            'location_out_id': self.stock_location.id,
+            'storage_category_id': storage_category.id,
+            'sublocation': 'closest_location',
+        })
+
+        moves = self.env['stock.move'].create([{
+            'name': 'test_move_%s' % i,
+            'location_id': self.supplier_location.id,
+            'location_dest_id': self.stock_location.id,
+            'product_id': self.product.id,
+            'product_uom': self.uom_unit.id,
+            'product_uom_qty': 60.0,
+        } for i in range(2)])
+        moves._action_confirm()
+        self.assertEqual(moves.move_line_ids.mapped('location_dest_id'), shelf1_location | shelf2_location)
+        self.assertEqual(moves[0].move_line_ids.location_dest_id, shelf1_location)
+        self.assertEqual(moves[1].move_line_ids.location_dest_id, shelf2_location)
+
     def test_putaway_with_storage_category_3(self):
         """Received products twice, set storage category to only accept new
         product when empty. Check the first time putaway rule applied and second
@@ -2306,6 +2341,72 @@ class StockMove(TransactionCase):
         self.assertAlmostEqual(product.with_context(to_date=fields.Date.add(today, days=-6)).qty_available, 13.0)
         self.assertAlmostEqual(product.with_context(to_date=fields.Date.add(today, days=-4)).qty_available, 11.0)
 
+    def test_past_availability_from_checkpoint(self):
+        """
+        Test the quantity in the past is replayed from the closest checkpoint.
+        """
+        today = fields.Date.today()
+        self.env["stock.quant"]._update_available_quantity(self.product, self.stock_location, 10.0)
+        Checkpoint = self.env['stock.quantity.checkpoint']
+        checkpoint_date = Checkpoint._create_checkpoint(fields.Datetime.now() - relativedelta(days=10))
+        moves = self.env['stock.move'].create([
+            {
+                'name': 'A move in of 3 x product',
+                'location_id': self.customer_location.id,
+                'location_dest_id': self.stock_location.id,
+                'product_id': self.product.id,
+                'product_uom_qty': 3.0,
+            },
+            {
+                'name': 'A move out of 2 x product',
+                'location_id': self.stock_location.id,
+                'location_dest_id': self.customer_location.id,
+                'product_id': self.product.id,
+                'product_uom_qty': 2.0,
+            },
+        ])
+        moves._action_confirm()
+        moves._action_assign()
+        moves.picked = True
+        moves._action_done()
+        moves[0].date = fields.Date.add(today, days=-7)
+        moves[1].date = fields.Date.add(today, days=-5)
+        self.assertEqual(Checkpoint._get_nearest_date(fields.Datetime.to_datetime(fields.Date.add(today, days=-6))), checkpoint_date)
+        self.assertFalse(Checkpoint._get_nearest_date(fields.Datetime.to_datetime(fields.Date.add(today, days=-4))))
+        product = self.product.with_context(location=self.stock_location.id)
+        self.assertAlmostEqual(product.with_context(to_date=fields.Date.add(today, days=-8)).qty_available, 10.0)
+        self.assertAlmostEqual(product.with_context(to_date=fields.Date.add(today, days=-6)).qty_available, 13.0)
+        self.assertAlmostEqual(product.with_context(to_date=fields.Date.add(today, days=-4)).qty_available, 11.0)
+
+    def test_past_availability_checkpoint_backdated_move(self):
+        """
+        Test a checkpoint is built from the moves done after its date, and dropped
+        when a move is backdated before it.
+        """
+        today = fields.Date.today()
+        self.env["stock.quant"]._update_available_quantity(self.product, self.stock_location, 10.0)
+        move = self.env['stock.move'].create({
+            'name': 'A move out of 4 x product',
+            'location_id': self.stock_location.id,
+            'location_dest_id': self.customer_location.id,
+            'product_id': self.product.id,
+            'product_uom_qty': 4.0,
+        })
+        move._action_confirm()
+        move._action_assign()
+        move.picked = True
+        move._action_done()
+        Checkpoint = self.env['stock.quantity.checkpoint']
+        checkpoint_date = Checkpoint._create_checkpoint(fields.Datetime.now() - relativedelta(days=3))
+        # the move done after the checkpoint date is not part of it
+        self.assertEqual(Checkpoint.search([('date', '=', checkpoint_date), ('product_id', '=', self.product.id), ('location_id', '=', self.stock_location.id)]).quantity, 10.0)
+
+        move.date = fields.Date.add(today, days=-5)
+        self.assertFalse(Checkpoint.search([('date', '=', checkpoint_date)]))
+        product = self.product.with_context(location=self.stock_location.id)
+        self.assertAlmostEqual(product.with_context(to_date=fields.Date.add(today, days=-6)).qty_available, 10.0)
+        self.assertAlmostEqual(product.with_context(to_date=fields.Date.add(today, days=-2)).qty_available, 6.0)
+
     def test_product_tree_views(self):
         """Test to make sure that there are no ACLs errors in users with basic permissions."""
         self.env["stock.quant"]._update_available_quantity(self.product, self.stock_location, 3.0)
@@ -183,6 +183,123 @@ class TestProcRule(TransactionCase):
                          "The rule associated with the route having the lowest sequence "
                          "(high_priority) should be selected.")
 
+    def test_get_rule_cache_invalidation(self):
+        """Test that the rule resolution cache follows route and rule changes
+        and that the bulk resolution returns the same rules as `_get_rule`."""
+        warehouse = self.env['stock.warehouse'].search([('company_id', '=', self.env.company.id)], limit=1)
+        product = self.env['product.product'].create({'name': 'Test Product', 'is_storable': True})
+        route_1, route_2 = self.env['stock.route'].create([
+            {'name': 'Route 1', 'sequence': 10},
+            {'name': 'Route 2', 'sequence': 20},
+        ])
+        rule_1, rule_2 = self.env['stock.rule'].create([{
+            'name': route.name,
+            'route_id': route.id,
+            'action': 'pull',
+            'location_src_id': warehouse.lot_stock_id.id,
+            'location_dest_id': warehouse.lot_stock_id.id,
+            'picking_type_id': warehouse.out_type_id.id,
+        } for route in (route_1, route_2)])
+        product.route_ids = route_1 | route_2
+        values = {'warehouse_id': warehouse}
+        ProcurementGroup = self.env['procurement.group']
+
+        self.assertEqual(ProcurementGroup._get_rule(product, warehouse.lot_stock_id, values), rule_1)
+        route_2.sequence = 5
+        self.assertEqual(ProcurementGroup._get_rule(product, warehouse.lot_stock_id, values), rule_2)
+        rule_2.action_archive()
+        self.assertEqual(ProcurementGroup._get_rule(product, warehouse.lot_stock_id, values), rule_1)
+        product.route_ids = route_2
+        self.assertFalse(ProcurementGroup._get_rule(product, warehouse.lot_stock_id, values))
+
+        product.route_ids = route_1
+        procurements = [
+            ProcurementGroup.Procurement(product, 1, product.uom_id, warehouse.lot_stock_id, 'test', 'test', warehouse.company_id, values),
+            ProcurementGroup.Procurement(self.product, 1, product.uom_id, warehouse.lot_stock_id, 'test', 'test', warehouse.company_id, values),
+            ProcurementGroup.Procurement(product, 1, product.uom_id, warehouse.lot_stock_id, 'test', 'test', warehouse.company_id, values),
+        ]
+        self.assertEqual(ProcurementGroup._get_rules(procurements), [
+            ProcurementGroup._get_rule(procurement.product_id, procurement.location_id, procurement.values)
+            for procurement in procurements
+        ])
+        self.assertEqual(ProcurementGroup._get_rules(procurements)[0], rule_1)
+
+        # products sharing their routes share the cached resolution
+        other_product = self.env['product.product'].create({'name': 'Other Product', 'is_storable': True, 'route_ids': route_1.ids})
+        self.assertEqual(
+            ProcurementGroup._get_rule_cache_key(product, warehouse.lot_stock_id, values),
+            ProcurementGroup._get_rule_cache_key(other_product, warehouse.lot_stock_id, values))
+        self.assertEqual(ProcurementGroup._get_rule(other_product, warehouse.lot_stock_id, values), rule_1)
+
+    def test_run_scheduler_shard(self):
+        """Test that a scheduler shard only procures the orderpoints of its product bucket."""
+        warehouse = self.env['stock.warehouse'].search([('company_id', '=', self.env.company.id)], limit=1)
+        products = self.env['product.product'].create([
+            {'name': 'Shard Product %s' % i, 'is_storable': True} for i in range(2)
+        ])
+        orderpoints = self.env['stock.warehouse.orderpoint'].create([{
+            'product_id': product.id,
+            'location_id': warehouse.lot_stock_id.id,
+            'product_min_qty': 5.0,
+            'product_max_qty': 10.0,
+        } for product in products])
+        self.assertNotEqual(products[0].id % 2, products[1].id % 2)
+
+        product = products[0]
+        self.env['procurement.group'].run_scheduler(shard_index=product.id % 2, shard_count=2)
+        receipt_moves = self.env['stock.move'].search([
+            ('product_id', 'in', products.ids),
+            ('location_id', '=', self.env.ref('stock.stock_location_suppliers').id),
+        ])
+        self.assertEqual(receipt_moves.product_id, product)
+        self.assertEqual(receipt_moves.product_uom_qty, 10.0)
+
+    @mute_logger('odoo.addons.stock.models.stock_rule')
+    def test_procure_orderpoint_failure_isolated(self):
+        """Test that a failing procurement doesn't prevent the other orderpoints of
+        its batch from being procured."""
+        warehouse = self.env['stock.warehouse'].search([('company_id', '=', self.env.company.id)], limit=1)
+        # no rule brings goods outside of the stock location of the warehouse
+        location_without_rule = self.env['stock.location'].create({
+            'name': 'No Rule',
+            'location_id': warehouse.view_location_id.id,
+        })
+        products = self.env['product.product'].create([
+            {'name': 'Product %s' % i, 'is_storable': True} for i in range(2)
+        ])
+        self.env['stock.warehouse.orderpoint'].create([{
+            'product_id': product.id,
+            'location_id': location.id,
+            'product_min_qty': 5.0,
+            'product_max_qty': 10.0,
+        } for product, location in zip(products, location_without_rule | warehouse.lot_stock_id)])
+        self.env['procurement.group'].run_scheduler()
+
+        moves = self.env['stock.move'].search([('product_id', 'in', products.ids)])
+        self.assertEqual(moves.product_id, products[1])
+        self.assertTrue(products[0].product_tmpl_id.activity_ids)
+
+    def test_run_scheduler_shard_assign_moves(self):
+        """Test that only the shard 0 assigns the waiting moves."""
+        warehouse = self.env['stock.warehouse'].search([('company_id', '=', self.env.company.id)], limit=1)
+        product = self.env['product.product'].create({'name': 'Shard Product', 'is_storable': True})
+        move = self.env['stock.move'].create({
+            'name': product.name,
+            'product_id': product.id,
+            'product_uom_qty': 5.0,
+            'location_id': warehouse.lot_stock_id.id,
+            'location_dest_id': self.env.ref('stock.stock_location_customers').id,
+            'picking_type_id': warehouse.out_type_id.id,
+        })
+        move._action_confirm()
+        self.assertEqual(move.state, 'confirmed')
+        self.env['stock.quant']._update_available_quantity(product, warehouse.lot_stock_id, 5.0)
+
+        self.env['procurement.group'].run_scheduler(shard_index=1, shard_count=2)
+        self.assertEqual(move.state, 'confirmed')
+        self.env['procurement.group'].run_scheduler(shard_index=0, shard_count=2)
+        self.assertEqual(move.state, 'assigned')
+
     def test_propagate_deadline_move(self):
         deadline = datetime.now()
         move_dest = self.env['stock.move'].create({
@@ -653,6 +770,64 @@ class TestProcRule(TransactionCase):
         stock_move._action_confirm()
         self.assertEqual(orderpoint.qty_to_order, 6)
 
+    def test_compute_qty_to_order_batch(self):
+        """
+        Check that the quantities to order computed for many orderpoints at once
+        match the ones computed orderpoint by orderpoint, including rounding.
+        """
+        products = self.env['product.product'].create([
+            {'name': 'Batch Product %s' % i, 'is_storable': True} for i in range(3)
+        ])
+        orderpoints = self.env['stock.warehouse.orderpoint'].create([{
+            'product_id': product.id,
+            'product_min_qty': min_qty,
+            'product_max_qty': max_qty,
+            'qty_multiple': multiple,
+        } for product, (min_qty, max_qty, multiple) in zip(products, [(5, 12, 5), (4, 4, 3), (10, 20, 0)])])
+        self.env['stock.quant']._update_available_quantity(products[2], orderpoints[2].location_id, 15)
+        orderpoints.invalidate_recordset()
+
+        self.assertEqual(orderpoints.mapped('qty_to_order'), [10, 3, 0])
+        for orderpoint in orderpoints:
+            self.assertEqual(orderpoint._get_qty_to_order(), orderpoint.qty_to_order)
+
+    def test_trigger_scheduler_orderpoint_lookup(self):
+        """
+        Check that confirming moves triggers the auto orderpoint whose location contains
+        the source location but not the destination location of each move.
+        """
+        warehouse = self.env['stock.warehouse'].search([('company_id', '=', self.env.company.id)], limit=1)
+        sub_location = self.env['stock.location'].create({
+            'name': 'Shelf',
+            'location_id': warehouse.lot_stock_id.id,
+        })
+        products = self.env['product.product'].create([
+            {'name': 'Trigger Product %s' % i, 'is_storable': True} for i in range(2)
+        ])
+        self.env['stock.warehouse.orderpoint'].create([{
+            'product_id': product.id,
+            'location_id': warehouse.lot_stock_id.id,
+            'product_min_qty': 1.0,
+            'product_max_qty': 1.0,
+        } for product in products])
+        moves = self.env['stock.move'].create([{
+            'name': 'Test Move',
+            'product_id': product.id,
+            'product_uom': product.uom_id.id,
+            'product_uom_qty': 2.0,
+            'location_id': sub_location.id,
+            'location_dest_id': location_dest_id,
+        } for product, location_dest_id in zip(products, [self.ref('stock.stock_location_customers'), warehouse.lot_stock_id.id])])
+        moves._action_confirm()
+        moves._trigger_scheduler()
+
+        receipt_moves = self.env['stock.move'].search([
+            ('product_id', 'in', products.ids),
+            ('location_id', '=', self.ref('stock.stock_location_suppliers')),
+        ])
+        self.assertEqual(receipt_moves.product_id, products[0])
+        self.assertEqual(receipt_moves.product_uom_qty, 3.0)
+
     def test_rule_help_message_mto_mtso(self):
         """Verify that the rule's help message correctly displays all relevant
         information when the procurement method is MTO or MTSO.
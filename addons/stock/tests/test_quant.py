@@ -82,6 +82,81 @@ class StockQuant(TransactionCase):
         with self.assertRaises(UserError):
             quant.copy()
 
+    def test_product_level_snapshot(self):
+        """ The stock level snapshot follows the quants and the product quantities
+        read from it match the ones read from the quants.
+        """
+        Level = self.env['stock.product.level']
+        ICP = self.env['ir.config_parameter'].sudo()
+        ICP.set_param('stock.product_level_snapshot', True)
+        Level._rebuild()
+        lot1 = self.env['stock.lot'].create({'name': 'lot1', 'product_id': self.product_lot.id})
+        lot2 = self.env['stock.lot'].create({'name': 'lot2', 'product_id': self.product_lot.id})
+        self.env['stock.quant']._update_available_quantity(self.product_lot, self.stock_subloc2, 3.0, lot_id=lot1)
+        self.env['stock.quant']._update_available_quantity(self.product_lot, self.stock_subloc2, 4.0, lot_id=lot2)
+        self.env['stock.quant']._update_available_quantity(self.product_lot, self.stock_subloc3, 5.0, lot_id=lot2)
+        self.env['stock.quant']._update_reserved_quantity(self.product_lot, self.stock_subloc2, 2.0, lot_id=lot1)
+        self.env['stock.quant']._update_available_quantity(self.product_lot, self.stock_subloc3, -1.0, lot_id=lot2)
+        self.assertEqual(Level._check_consistency(rebuild=False), 0)
+        self.assertTrue(Level._is_enabled())
+
+        product = self.product_lot.with_context(location=self.stock_location.id)
+        quantities = product.read(['qty_available', 'free_qty'])[0]
+        self.assertEqual(quantities['qty_available'], 11.0)
+        self.assertEqual(quantities['free_qty'], 9.0)
+        self.assertIn(product, product.search([('qty_available', '=', 11.0)]))
+        self.assertEqual(product._get_only_qty_available()[product.id], 11.0)
+        ICP.set_param('stock.product_level_snapshot', False)
+        product.invalidate_recordset()
+        self.assertEqual(product.read(['qty_available', 'free_qty'])[0], quantities)
+        self.assertEqual(product._get_only_qty_available()[product.id], 11.0)
+        ICP.set_param('stock.product_level_snapshot', True)
+
+        Level._compact()
+        self.assertEqual(Level.search_count([('product_id', '=', self.product_lot.id)]), 2)
+        self.env.cr.execute("DELETE FROM stock_product_level WHERE product_id = %s", [self.product_lot.id])
+        self.assertEqual(Level._check_consistency(), 2)
+        self.assertEqual(Level._check_consistency(rebuild=False), 0)
+
+    def test_product_level_not_maintained(self):
+        """ The stock level snapshot is not maintained when the feature is off, and is
+        only read again once rebuilt. """
+        Level = self.env['stock.product.level']
+        ICP = self.env['ir.config_parameter'].sudo()
+        ICP.set_param('stock.product_level_snapshot', True)
+        Level._rebuild()
+        ICP.set_param('stock.product_level_snapshot', False)
+        self.env['stock.quant']._update_available_quantity(self.product, self.stock_subloc2, 2.0)
+        self.assertFalse(Level.search([('product_id', '=', self.product.id)]))
+
+        ICP.set_param('stock.product_level_snapshot', True)
+        self.assertFalse(Level._is_enabled())
+        self.assertEqual(self.product.with_context(location=self.stock_subloc2.id)._get_only_qty_available()[self.product.id], 2.0)
+        Level._cron_check_product_levels()
+        self.assertTrue(Level._is_enabled())
+        self.assertEqual(Level.search([('product_id', '=', self.product.id)]).quantity, 2.0)
+
+    def test_product_level_init(self):
+        """ The module update only rebuilds the stock level snapshot when its version changes. """
+        Level = self.env['stock.product.level']
+        ICP = self.env['ir.config_parameter'].sudo()
+        ICP.set_param('stock.product_level_snapshot', True)
+        Level._rebuild()
+        self.env['stock.quant']._update_available_quantity(self.product, self.stock_subloc2, 2.0)
+        self.env['stock.quant']._update_available_quantity(self.product, self.stock_subloc3, 3.0)
+        self.env.cr.execute(
+            "DELETE FROM stock_product_level WHERE product_id = %s AND location_id = %s",
+            [self.product.id, self.stock_subloc3.id])
+        level_domain = [('product_id', '=', self.product.id), ('location_id', '=', self.stock_subloc3.id)]
+        ICP.set_param('stock.product_level_version', Level._LEVEL_VERSION)
+        Level.init()
+        self.assertFalse(Level.search(level_domain))
+
+        ICP.set_param('stock.product_level_version', 'outdated')
+        Level.init()
+        self.assertEqual(Level.search(level_domain).quantity, 3.0)
+        self.assertEqual(ICP.get_param('stock.product_level_version'), Level._LEVEL_VERSION)
+
     def test_get_available_quantity_1(self):
         """ Quantity availability with only one quant in a location.
         """
@@ -195,6 +270,41 @@ class StockQuant(TransactionCase):
         self.env = self.env(user=self.demo_user)
         self.assertEqual(self.env['stock.quant']._get_available_quantity(self.product, self.stock_location), 1.0)
 
+    def test_get_available_quantities(self):
+        """ The batched availability matches the availability computed one combination
+        at a time.
+        """
+        lot1 = self.env['stock.lot'].create({'name': 'lot1', 'product_id': self.product_lot.id})
+        lot2 = self.env['stock.lot'].create({'name': 'lot2', 'product_id': self.product_lot.id})
+        Quant = self.env['stock.quant']
+        Quant._update_available_quantity(self.product, self.stock_subloc2, 3.0)
+        Quant._update_available_quantity(self.product, self.stock_subloc3, 2.0)
+        Quant._update_reserved_quantity(self.product, self.stock_subloc3, 1.0)
+        Quant._update_available_quantity(self.product_lot, self.stock_subloc2, 4.0, lot_id=lot1)
+        Quant._update_available_quantity(self.product_lot, self.stock_subloc2, -1.0, lot_id=lot2)
+        Quant._update_available_quantity(self.product_lot, self.stock_subloc2, 2.0)
+
+        requests = [
+            (self.product, self.stock_location, None, None, None, False),
+            (self.product, self.stock_subloc3, None, None, None, False),
+            (self.product, self.stock_subloc3, None, None, None, True),
+            (self.product, self.stock_location, None, None, None, True),
+            (self.product_lot, self.stock_location, None, None, None, False),
+            (self.product_lot, self.stock_location, lot2, None, None, False),
+            (self.product_lot, self.stock_subloc2, lot1, None, None, True),
+            (self.product_lot, self.stock_subloc2, None, None, None, True),
+            (self.product_consu, self.stock_location, None, None, None, False),
+        ]
+        for allow_negative in (False, True):
+            available_quantities = Quant._get_available_quantities(requests, allow_negative=allow_negative)
+            for request in requests:
+                product, location, lot, package, owner, strict = request
+                self.assertEqual(
+                    available_quantities[request],
+                    Quant._get_available_quantity(product, location, lot_id=lot, package_id=package, owner_id=owner, strict=strict, allow_negative=allow_negative),
+                    request)
+        self.assertEqual(Quant._get_available_quantities(requests)[requests[0]], 4.0)
+
     def test_increase_available_quantity_1(self):
         """ Increase the available quantity when no quants are already in a location.
         """
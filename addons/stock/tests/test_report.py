@@ -515,6 +515,53 @@ class TestReports(TestReportsCommon):
         self.assertEqual(line2['document_in']['id'], receipt2.id)
         self.assertEqual(line2['document_out']['id'], delivery.id)
 
+    def test_traceability_move_lines(self):
+        """ Checks the traceability report follows a serial number back to its receipt. """
+        lot = self.env['stock.lot'].create({'name': 'SN1', 'product_id': self.product1.id})
+        customer_location = self.env.ref('stock.stock_location_customers')
+        move_lines = self.env['stock.move.line']
+        for location, location_dest in ((self.supplier_location, self.stock_location), (self.stock_location, customer_location)):
+            move = self.env['stock.move'].create({
+                'name': 'Move SN1',
+                'location_id': location.id,
+                'location_dest_id': location_dest.id,
+                'product_id': self.product1.id,
+                'product_uom': self.product1.uom_id.id,
+                'product_uom_qty': 1.0,
+            })
+            move._action_confirm()
+            move._action_assign()
+            move.move_line_ids.write({'lot_id': lot.id, 'quantity': 1.0})
+            move.picked = True
+            move._action_done()
+            move_lines |= move.move_line_ids
+        receipt_line, delivery_line = move_lines
+
+        report = self.env['stock.traceability.report']
+        self.assertEqual(report._get_move_lines(delivery_line), receipt_line)
+        self.assertFalse(report._get_move_lines(receipt_line))
+        self.assertEqual(report._get_unfoldable_move_lines(move_lines), {delivery_line.id})
+
+    def test_report_forecast_line_values(self):
+        """ Checks the lines rendered by the report match the reconciled line values.
+        """
+        moves_out = self.env['stock.move'].create([{
+            'name': 'Move Out %s' % quantity,
+            'date': datetime.now() + timedelta(days=quantity),
+            'location_id': self.stock_location.id,
+            'location_dest_id': self.env.ref('stock.stock_location_customers').id,
+            'product_id': self.product.id,
+            'product_uom': self.product.uom_id.id,
+            'product_uom_qty': quantity,
+        } for quantity in (1, 2, 3)])
+        moves_out._action_confirm()
+
+        report = self.env['stock.forecasted_product_product']
+        docs = report.get_report_values(docids=self.product.ids)['docs']
+        self.assertEqual([line['quantity'] for line in docs['lines']], [1, 2, 3])
+        self.assertEqual([line['move_out']['id'] for line in docs['lines']], moves_out.ids)
+        self.assertFalse(any(line['replenishment_filled'] for line in docs['lines']))
+
     def test_report_forecast_2_replenishments_order(self):
         """ Creates a receipt then creates a delivery using half of the receipt quantity.
         Checks replenishment lines are correctly sorted (assigned first, unassigned at the end).
@@ -357,6 +357,68 @@ class TestRobustness(TransactionCase):
         self.env['stock.quant']._clean_reservations()
         self.assertEqual(quant.reserved_quantity, 0)
 
+    def test_clean_quants_synch_split_quants(self):
+        """ Ensure the _clean_reservations method spreads the drift over the quants of
+        a same group and reports what it corrected """
+        quants = self.env['stock.quant'].create([{
+            'product_id': self.product1.id,
+            'location_id': self.stock_location.id,
+            'quantity': 5,
+        } for _ in range(2)])
+        move = self.env['stock.move'].create({
+            'name': 'test_clean_quants_synch_split_quants',
+            'location_id': self.stock_location.id,
+            'location_dest_id': self.customer_location.id,
+            'product_id': self.product1.id,
+            'product_uom_qty': 3,
+        })
+        move._action_confirm()
+        move._action_assign()
+        self.assertEqual(move.quantity, 3)
+
+        quants.write({'reserved_quantity': 4})
+        self.assertEqual(quants._clean_reservations(), (1, 5.0))
+        self.assertEqual(sum(quants.mapped('reserved_quantity')), 3)
+        self.assertEqual(quants._clean_reservations(), (0, 0.0))
+
+    def test_clean_quants_synch_under_reserved_split_quants(self):
+        """ Ensure the _clean_reservations method reserves the missing quantity on the
+        quants having free quantity rather than over-reserving a single quant """
+        quants = self.env['stock.quant'].create([{
+            'product_id': self.product1.id,
+            'location_id': self.stock_location.id,
+            'quantity': 5,
+        } for _ in range(2)])
+        move = self.env['stock.move'].create({
+            'name': 'test_clean_quants_synch_under_reserved_split_quants',
+            'location_id': self.stock_location.id,
+            'location_dest_id': self.customer_location.id,
+            'product_id': self.product1.id,
+            'product_uom_qty': 8,
+        })
+        move._action_confirm()
+        move._action_assign()
+        self.assertEqual(move.quantity, 8)
+
+        quants[0].reserved_quantity = 3
+        quants[1].reserved_quantity = 0
+        self.assertEqual(quants._clean_reservations(), (1, 5.0))
+        self.assertEqual(quants[0].reserved_quantity, 3)
+        self.assertEqual(quants[1].reserved_quantity, 5)
+        self.assertEqual(quants._clean_reservations(), (0, 0.0))
+
+    def test_clean_quants_synch_bypass_reservation(self):
+        """ Ensure the _clean_reservations method unreserves the quants of the locations
+        bypassing the reservation """
+        quant = self.env['stock.quant'].create({
+            'product_id': self.product1.id,
+            'location_id': self.customer_location.id,
+            'quantity': 5,
+        })
+        quant.reserved_quantity = 2
+        self.assertEqual(quant._clean_reservations(), (1, 2.0))
+        self.assertEqual(quant.reserved_quantity, 0)
+
     def test_clean_quants_synch_with_different_uom(self):
         """ Ensure the _clean_reservaion method align the quants on stock.move.line when using different UoM """
         uom_kg = self.env.ref('uom.product_uom_kgm')
@@ -12,6 +12,7 @@ from . import stock_lot
 from . import stock_move_line
 from . import stock_picking
 from . import stock_quant
+from . import stock_quantity_checkpoint
 from . import stock_valuation_layer
 from . import res_config_settings
 from . import template_generic_coa
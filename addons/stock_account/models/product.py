@@ -1,12 +1,17 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+import logging
+
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
-from odoo.tools import float_is_zero, float_repr, float_round, float_compare
+from odoo.tools import float_is_zero, float_repr, float_round, float_compare, split_every, SQL
 from odoo.exceptions import ValidationError
 from collections import defaultdict
 from datetime import datetime
+from time import monotonic
+
+_logger = logging.getLogger(__name__)
 
 
 class ProductTemplate(models.Model):
@@ -185,12 +190,46 @@ will update the cost of every lot/serial number in stock."),
     def _get_valuation_layer_groups(self):
         domain = self._get_valuation_layer_group_domain()
         group_fields_aggregate = self._get_valuation_layer_group_fields_aggregate()
+        if self.env.context.get('to_date') and group_fields_aggregate == ['value:sum', 'quantity:sum']:
+            to_date = fields.Datetime.to_datetime(self.env.context['to_date'])
+            checkpoint_date = self.env['stock.quantity.checkpoint']._get_nearest_date(to_date)
+            if checkpoint_date:
+                return self._get_valuation_layer_groups_from_checkpoint(checkpoint_date, to_date)
         return self.env['stock.valuation.layer']._read_group(
             domain,
             groupby=['product_id'],
             aggregates=group_fields_aggregate,
         )
 
+    def _get_valuation_layer_groups_from_checkpoint(self, checkpoint_date, to_date):
+        """ Same as `_get_valuation_layer_groups` at `to_date`, starting from the
+        checkpoint taken at `checkpoint_date` and only reading the layers created
+        between both dates.
+        """
+        company_id = self.env.company.id
+        checkpoint_groups = self.env['stock.quantity.checkpoint']._read_group([
+            ('date', '=', checkpoint_date),
+            ('location_id', '=', False),
+            ('company_id', '=', company_id),
+            ('product_id', 'in', self.ids),
+        ], ['product_id'], ['value:sum', 'quantity:sum'])
+        sign = 1 if checkpoint_date < to_date else -1
+        domain = [
+            *self.env['stock.valuation.layer']._check_company_domain(company_id),
+            ('product_id', 'in', self.ids),
+            ('create_date', '>', min(checkpoint_date, to_date)),
+            ('create_date', '<=', max(checkpoint_date, to_date)),
+        ]
+        layer_groups = self.env['stock.valuation.layer']._read_group(domain, ['product_id'], ['value:sum', 'quantity:sum'])
+        aggregates = defaultdict(lambda: [0.0, 0.0])
+        for product, value, quantity in checkpoint_groups:
+            aggregates[product] = [value, quantity]
+        for product, value, quantity in layer_groups:
+            product_aggregates = aggregates[product]
+            product_aggregates[0] += sign * value
+            product_aggregates[1] += sign * quantity
+        return [(product, *product_aggregates) for product, product_aggregates in aggregates.items()]
+
     def _prepare_valuation_layer_field_values(self, aggregates):
         self.ensure_one()
         value_sum, quantity_sum = aggregates
@@ -260,10 +299,11 @@ will update the cost of every lot/serial number in stock."),
             'lot_id': lot.id if lot else False,
         }
 
-    def _prepare_out_svl_vals(self, quantity, company, lot=False):
+    def _prepare_out_svl_vals(self, quantity, company, lot=False, fifo_candidates=None):
         """Prepare the values for a stock valuation layer created by a delivery.
 
         :param quantity: the quantity to value, expressed in `self.uom_id`
+        :param fifo_candidates: see `_run_fifo`
         :return: values to use in a call to create
         :rtype: dict
         """
@@ -283,7 +323,7 @@ will update the cost of every lot/serial number in stock."),
             'quantity': quantity,
             'lot_id': lot.id if lot else False,
         }
-        fifo_vals = self._run_fifo(abs(quantity), company, lot=lot)
+        fifo_vals = self._run_fifo(abs(quantity), company, lot=lot, fifo_candidates=fifo_candidates)
         vals['remaining_qty'] = fifo_vals.get('remaining_qty')
         # In case of AVCO, fix rounding issue of standard price when needed.
         if self.product_tmpl_id.cost_method == 'average' and not float_is_zero(self.quantity_svl, precision_rounding=self.uom_id.rounding):
@@ -364,12 +404,25 @@ will update the cost of every lot/serial number in stock."),
     def _get_qty_taken_on_candidate(self, qty_to_take_on_candidates, candidate):
         return min(qty_to_take_on_candidates, candidate.remaining_qty)
 
-    def _run_fifo(self, quantity, company, lot=False):
+    def _run_fifo(self, quantity, company, lot=False, fifo_candidates=None):
+        """ Value `quantity` going out on the incoming layers of the product.
+
+        :param fifo_candidates: dict shared by the successive calls of a batch of
+            outgoing moves, keeping the candidates of each (product, company, lot)
+            in memory instead of searching them again for every move. The consumed
+            quantities are only written in cache and flushed together.
+        """
         self.ensure_one()
 
         # Find back incoming stock valuation layers (called candidates here) to value `quantity`.
         qty_to_take_on_candidates = quantity
-        candidates = self._get_fifo_candidates(company, lot=lot)
+        if fifo_candidates is None:
+            candidates = self._get_fifo_candidates(company, lot=lot)
+        else:
+            candidates_key = (self.id, company.id, lot.id if lot else False)
+            if candidates_key not in fifo_candidates:
+                fifo_candidates[candidates_key] = self._get_fifo_candidates(company, lot=lot)
+            candidates = fifo_candidates[candidates_key]
         new_standard_price = 0
         tmp_value = 0  # to accumulate the value taken on the candidates
         for candidate in candidates:
@@ -397,6 +450,10 @@ will update the cost of every lot/serial number in stock."),
                     new_standard_price = next_candidates and next_candidates[0].unit_cost or new_standard_price
                 break
 
+        if fifo_candidates is not None:
+            # same as searching them again on the next call
+            fifo_candidates[candidates_key] = candidates.filtered(lambda svl: svl.remaining_qty > 0)
+
         # Fifo out will change the AVCO value of the product. So in case of out,
         # we recompute it base on the remaining value and quantities.
         if self.cost_method == 'fifo':
@@ -567,6 +624,117 @@ will update the cost of every lot/serial number in stock."),
         vacuum_svls._validate_accounting_entries()
         self._create_fifo_vacuum_anglo_saxon_expense_entries(zip(vacuum_svls, real_time_svls_to_vacuum))
 
+    @api.model
+    def _is_fifo_vacuum_deferred(self):
+        """ Whether the vacuum is left to `_cron_run_fifo_vacuum` instead of running
+        when the receipts are validated.
+        """
+        return bool(self.env['ir.config_parameter'].sudo().get_param('stock_account.fifo_vacuum_deferred'))
+
+    @api.model
+    def _flush_fifo_vacuum_queue(self):
+        self.env['stock.valuation.layer'].flush_model(['product_id', 'company_id', 'remaining_qty', 'stock_move_id', 'create_date', 'lot_id'])
+        self.env['product.product'].flush_model(['product_tmpl_id'])
+        self.env['product.template'].flush_model(['lot_valuated'])
+
+    @api.model
+    def _get_fifo_vacuum_candidate_condition(self):
+        """ Return the condition telling whether the layer `negative` has a candidate
+        to be vacuumed with. It must match the candidates of `_run_fifo_vacuum`: a
+        positive layer created after the negative one, and of the same lot when the
+        product is valuated by lot.
+        """
+        return SQL("""
+            EXISTS (
+                SELECT 1
+                  FROM stock_valuation_layer candidate
+                  JOIN product_product product ON product.id = candidate.product_id
+                  JOIN product_template template ON template.id = product.product_tmpl_id
+                 WHERE candidate.product_id = negative.product_id
+                   AND candidate.company_id = negative.company_id
+                   AND candidate.remaining_qty > 0
+                   AND (candidate.create_date, candidate.id) > (negative.create_date, negative.id)
+                   AND (template.lot_valuated IS NOT TRUE OR candidate.lot_id IS NOT DISTINCT FROM negative.lot_id)
+            )
+        """)
+
+    @api.model
+    def _get_fifo_vacuum_queue(self):
+        """ Return the products to vacuum, i.e. having a negative layer and a
+        candidate received after it.
+
+        :return: dict mapping the company ids to the lists of product ids
+        """
+        self._flush_fifo_vacuum_queue()
+        self.env.cr.execute(SQL("""
+            SELECT negative.company_id, negative.product_id
+              FROM stock_valuation_layer negative
+             WHERE negative.remaining_qty < 0
+               AND negative.stock_move_id IS NOT NULL
+               AND %(has_candidate)s
+          GROUP BY negative.company_id, negative.product_id
+          ORDER BY negative.company_id, negative.product_id
+        """, has_candidate=self._get_fifo_vacuum_candidate_condition()))
+        queue = defaultdict(list)
+        for company_id, product_id in self.env.cr.fetchall():
+            queue[company_id].append(product_id)
+        return queue
+
+    @api.model
+    def _get_fifo_vacuum_queue_stats(self):
+        """ Return the depth of the vacuum queue of every company: the number of
+        negative layers, how many of them can be vacuumed and the oldest one.
+
+        :return: dict mapping the company ids to dict with the keys `depth`,
+            `ready` and `oldest`
+        """
+        self._flush_fifo_vacuum_queue()
+        self.env.cr.execute(SQL("""
+            SELECT negative.company_id,
+                   COUNT(*),
+                   COUNT(*) FILTER (WHERE %(has_candidate)s),
+                   MIN(negative.create_date)
+              FROM stock_valuation_layer negative
+             WHERE negative.remaining_qty < 0
+               AND negative.stock_move_id IS NOT NULL
+          GROUP BY negative.company_id
+        """, has_candidate=self._get_fifo_vacuum_candidate_condition()))
+        return {
+            company_id: {'depth': depth, 'ready': ready, 'oldest': oldest}
+            for company_id, depth, ready, oldest in self.env.cr.fetchall()
+        }
+
+    @api.model
+    def _cron_run_fifo_vacuum(self, batch_size=100, auto_commit=True):
+        """ Vacuum the negative layers for which a candidate was received, by
+        batches of products of the same company.
+        """
+        if not self._is_fifo_vacuum_deferred():
+            return
+        for company_id, stats in self._get_fifo_vacuum_queue_stats().items():
+            _logger.info(
+                "FIFO vacuum queue of company %s: %d negative layers, %d ready, oldest from %s",
+                company_id, stats['depth'], stats['ready'], stats['oldest'])
+        for company_id, product_ids in self._get_fifo_vacuum_queue().items():
+            company = self.env['res.company'].browse(company_id)
+            for product_ids_batch in split_every(batch_size, product_ids):
+                batch_start = monotonic()
+                try:
+                    with self.env.cr.savepoint():
+                        self.browse(product_ids_batch).with_company(company)._run_fifo_vacuum(company)
+                except Exception:
+                    # don't let a faulty product block the rest of the queue
+                    _logger.exception(
+                        "FIFO vacuum of company %s failed for the products %s",
+                        company_id, product_ids_batch)
+                    self.env.invalidate_all()
+                    continue
+                _logger.info(
+                    "FIFO vacuum of company %s: %d products processed in %.2fs",
+                    company_id, len(product_ids_batch), monotonic() - batch_start)
+                if auto_commit:
+                    self.env.cr.commit()
+
     @api.model
     def _create_fifo_vacuum_anglo_saxon_expense_entries(self, vacuum_pairs):
         """ Batch version of _create_fifo_vacuum_anglo_saxon_expense_entry
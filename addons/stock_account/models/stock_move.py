@@ -233,6 +233,8 @@ class StockMove(models.Model):
 
     def _get_out_svl_vals(self, forced_quantity):
         svl_vals_list = []
+        # the fifo candidates of each product are searched once for all the moves
+        fifo_candidates = {}
         for move in self:
             move = move.with_company(move.company_id)
             lines = move._get_out_move_lines()
@@ -251,11 +253,12 @@ class StockMove(models.Model):
                     out_vals = move.product_id._prepare_out_svl_vals(
                         qty,
                         move.company_id,
-                        lot=lot_id
+                        lot=lot_id,
+                        fifo_candidates=fifo_candidates,
                     )
                     vals.append(out_vals)
             else:
-                vals = [move.product_id._prepare_out_svl_vals(sum(quantities.values()), move.company_id)]
+                vals = [move.product_id._prepare_out_svl_vals(sum(quantities.values()), move.company_id, fifo_candidates=fifo_candidates)]
             for val in vals:
                 val.update(move._prepare_common_svl_vals())
                 if forced_quantity:
@@ -377,8 +380,9 @@ class StockMove(models.Model):
 
         # For every in move, run the vacuum for the linked product.
         products_to_vacuum = valued_moves['in'].mapped('product_id')
-        company = valued_moves['in'].mapped('company_id') and valued_moves['in'].mapped('company_id')[0] or self.env.company
-        products_to_vacuum._run_fifo_vacuum(company)
+        if products_to_vacuum and not products_to_vacuum._is_fifo_vacuum_deferred():
+            company = valued_moves['in'].mapped('company_id') and valued_moves['in'].mapped('company_id')[0] or self.env.company
+            products_to_vacuum._run_fifo_vacuum(company)
 
         return res
 
@@ -406,6 +410,26 @@ class StockMove(models.Model):
         # adapt standard price on incomming moves if the product cost_method is 'average'
         std_price_update = {}
         std_price_update_lot = {}
+        # the running average of each product and lot is only written once, at the end
+        products_to_write = {}
+        lots_to_write = {}
+        precision = self.env['decimal.precision'].precision_get('Product Price')
+
+        def _write_standard_prices(company_id, product_id):
+            # Write the standard price, as SUPERUSER_ID because a warehouse manager may not have the right to write on products
+            if (company_id, product_id) in products_to_write:
+                product = self.env['product.product'].browse(product_id)
+                product.with_company(company_id).with_context(disable_auto_svl=True).sudo().write({
+                    'standard_price': products_to_write.pop((company_id, product_id)),
+                })
+            for lot_key in [lot_key for lot_key in lots_to_write if lot_key[:2] == (company_id, product_id)]:
+                lot = self.env['stock.lot'].browse(lot_key[2])
+                lot.with_company(company_id).with_context(disable_auto_svl=True).sudo().standard_price = lots_to_write.pop(lot_key)
+
+        for company, moves in self.grouped('company_id').items():
+            # compute the valued quantities of all the products at once
+            moves.product_id.sudo().with_company(company).mapped('quantity_svl')
+
         for move in self:
             if not move._is_in():
                 continue
@@ -423,6 +447,9 @@ class StockMove(models.Model):
                     quantity_by_lot[valued_move_line.lot_id] += valued_move_line.quantity_product_uom
 
             qty = sum(quantity_by_lot.values())
+            if float_is_zero(move.price_unit, precision):
+                # the cost of the move may fall back on the average of the previous moves
+                _write_standard_prices(move.company_id.id, move.product_id.id)
             move_cost = move._get_price_unit()
             if float_is_zero(product_tot_qty_available, precision_rounding=rounding) \
                     or float_is_zero(product_tot_qty_available + move.product_qty, precision_rounding=rounding) \
@@ -434,9 +461,11 @@ class StockMove(models.Model):
                 new_std_price = ((amount_unit * product_tot_qty_available) + (next(iter(move_cost.values())) * qty)) / (product_tot_qty_available + qty)
 
             tmpl_dict[move.product_id.id] += qty
-            # Write the standard price, as SUPERUSER_ID because a warehouse manager may not have the right to write on products
-            move.product_id.with_company(move.company_id.id).with_context(disable_auto_svl=True).sudo().write({'standard_price': new_std_price})
+            products_to_write[move.company_id.id, move.product_id.id] = new_std_price
             std_price_update[move.company_id.id, move.product_id.id] = new_std_price
+            if not new_std_price:
+                # a zero average falls back on the stored standard price, which must then be up to date
+                _write_standard_prices(move.company_id.id, move.product_id.id)
 
             # Update the standard price of the lot
             if not move.product_id.lot_valuated:
@@ -451,8 +480,13 @@ class StockMove(models.Model):
                     amount_unit = std_price_update_lot.get((move.company_id.id, lot.id)) or lot.with_company(move.company_id).standard_price
                     new_std_price = ((amount_unit * qty_avail) + (move_cost[lot] * qty)) / (qty_avail + qty)
                 lot_tmpl_dict[lot.id] += qty
-                lot.with_company(move.company_id.id).with_context(disable_auto_svl=True).sudo().standard_price = new_std_price
+                lots_to_write[move.company_id.id, move.product_id.id, lot.id] = new_std_price
                 std_price_update_lot[move.company_id.id, lot.id] = new_std_price
+                if not new_std_price:
+                    _write_standard_prices(move.company_id.id, move.product_id.id)
+
+        for company_id, product_id in list(products_to_write) + [lot_key[:2] for lot_key in lots_to_write]:
+            _write_standard_prices(company_id, product_id)
 
     def _product_price_update_after_done(self):
         """ Outgoing moves lot valuation should recompute the standard price of the product as the
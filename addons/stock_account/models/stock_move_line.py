@@ -101,7 +101,7 @@ class StockMoveLine(models.Model):
         if (move._is_in() and diff > 0) or (move._is_out() and diff < 0):
             move.product_price_update_before_done(forced_qty=(lot, diff))
             stock_valuation_layers |= move._create_in_svl(forced_quantity=qty)
-            if move.product_id.cost_method in ('average', 'fifo'):
+            if move.product_id.cost_method in ('average', 'fifo') and not move.product_id._is_fifo_vacuum_deferred():
                 move.product_id._run_fifo_vacuum(move.company_id)
         elif (move._is_in() and diff < 0) or (move._is_out() and diff > 0):
             stock_valuation_layers |= move._create_out_svl(forced_quantity=qty)
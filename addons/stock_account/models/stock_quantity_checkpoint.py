@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+
+class StockQuantityCheckpoint(models.Model):
+    _inherit = 'stock.quantity.checkpoint'
+
+    # Rows without location hold the valued quantity and the value of the
+    # product in its company, i.e. the sums of its valuation layers.
+    value = fields.Float('Value', readonly=True)
+
+    @api.model
+    def _create_checkpoint(self, date=None):
+        date = super()._create_checkpoint(date=date)
+        self.env['stock.valuation.layer'].flush_model(['product_id', 'company_id', 'quantity', 'value', 'create_date'])
+        self.env.cr.execute(SQL("""
+            INSERT INTO stock_quantity_checkpoint (date, product_id, location_id, company_id, quantity, value)
+                 SELECT %(date)s, product_id, NULL, company_id, SUM(quantity), SUM(value)
+                   FROM stock_valuation_layer
+                  WHERE create_date <= %(date)s
+               GROUP BY product_id, company_id
+                 HAVING SUM(quantity) != 0 OR SUM(value) != 0
+        """, date=date))
+        self.invalidate_model()
+        return date
@@ -50,6 +50,11 @@ class StockValuationLayer(models.Model):
             self._cr, 'stock_valuation_company_product_index',
             self._table, ['product_id', 'company_id', 'id', 'value', 'quantity']
         )
+        # the negative layers waiting for the fifo vacuum
+        tools.create_index(
+            self._cr, 'stock_valuation_layer_negative_index',
+            self._table, ['company_id', 'product_id', 'create_date'], where='remaining_qty < 0'
+        )
 
     def _compute_warehouse_id(self):
         for svl in self:
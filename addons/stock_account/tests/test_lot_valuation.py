@@ -548,6 +548,23 @@ class TestLotValuation(TestStockValuationCommon):
         self.assertEqual(self.lot1.standard_price, 5)
         self.assertEqual(self.lot3.standard_price, 7)
 
+    def test_lot_fifo_vacuum_queue(self):
+        """ A negative layer is only queued once a layer of its own lot is received """
+        self.env['ir.config_parameter'].sudo().set_param('stock_account.fifo_vacuum_deferred', True)
+        self.product1.standard_price = 9
+        out_move = self._make_out_move(self.product1, 2, lot_ids=[self.lot1])
+        self._make_in_move(self.product1, 10, 7, lot_ids=[self.lot3])
+
+        self.assertFalse(self.product1._get_fifo_vacuum_queue())
+        stats = self.product1._get_fifo_vacuum_queue_stats()[self.env.company.id]
+        self.assertEqual((stats['depth'], stats['ready']), (1, 0))
+
+        self._make_in_move(self.product1, 5, 5, lot_ids=[self.lot1])
+        self.assertEqual(self.product1._get_fifo_vacuum_queue(), {self.env.company.id: self.product1.ids})
+        self.product1._cron_run_fifo_vacuum(auto_commit=False)
+        self.assertEqual(sum(out_move.stock_valuation_layer_ids.mapped('remaining_qty')), 0)
+        self.assertFalse(self.product1._get_fifo_vacuum_queue())
+
     def test_return_lot_valuated(self):
         self.product1.standard_price = 9
         move = self._make_out_move(self.product1, 3, create_picking=True, lot_ids=[self.lot1, self.lot2, self.lot3])
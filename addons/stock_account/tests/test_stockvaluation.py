@@ -3533,6 +3533,38 @@ class TestStockValuation(TestStockValuationBase):
         self.assertEqual(self.product1.quantity_svl, 85)
         self.assertEqual(self.product1.value_svl, 637.5)
 
+    def test_at_date_from_checkpoint(self):
+        """ The valuation at date is replayed from the closest checkpoint. """
+        self.product1.categ_id.property_cost_method = 'standard'
+        self.product1.standard_price = 10.0
+
+        now = Datetime.now()
+        for quantity, date in ((10, now - timedelta(days=7)), (20, now - timedelta(days=4))):
+            move = self.env['stock.move'].create({
+                'name': 'in %s' % quantity,
+                'location_id': self.supplier_location.id,
+                'location_dest_id': self.stock_location.id,
+                'product_id': self.product1.id,
+                'product_uom': self.uom_unit.id,
+                'product_uom_qty': quantity,
+            })
+            move._action_confirm()
+            move._action_assign()
+            move.move_line_ids.quantity = quantity
+            move.picked = True
+            move._action_done()
+            move.date = date
+            move.stock_valuation_layer_ids._write({'create_date': date})
+
+        checkpoint_date = self.env['stock.quantity.checkpoint']._create_checkpoint(now - timedelta(days=3))
+        self.assertEqual(self.env['stock.quantity.checkpoint']._get_nearest_date(now - timedelta(days=5)), checkpoint_date)
+
+        self.assertEqual(self.product1.with_context(to_date=Datetime.to_string(now - timedelta(days=8))).quantity_svl, 0)
+        self.assertEqual(self.product1.with_context(to_date=Datetime.to_string(now - timedelta(days=8))).value_svl, 0)
+        self.assertEqual(self.product1.with_context(to_date=Datetime.to_string(now - timedelta(days=5))).quantity_svl, 10)
+        self.assertEqual(self.product1.with_context(to_date=Datetime.to_string(now - timedelta(days=5))).value_svl, 100)
+        self.assertEqual(self.product1.with_context(to_date=Datetime.to_string(now - timedelta(days=2))).value_svl, 300)
+
     def test_at_date_fifo_1(self):
         """ Make some operations at different dates, check that the results of the valuation at
         date wizard are consistent. Afterwards, edit the done quantity of some operations. The
@@ -415,6 +415,29 @@ class TestStockValuationAVCO(TestStockValuationCommon):
         self.assertEqual(self.product1.value_svl, 75)
         self.assertEqual(self.product1.quantity_svl, 5)
 
+    def test_batch_in_moves(self):
+        """ Receiving several moves at once gives the same average as receiving
+        them one after the other. """
+        self.product1.product_tmpl_id.categ_id.property_valuation = 'manual_periodic'
+        moves = self.env['stock.move'].create([{
+            'name': 'in 10 units @ %s per unit' % unit_cost,
+            'product_id': self.product1.id,
+            'location_id': self.supplier_location.id,
+            'location_dest_id': self.stock_location.id,
+            'product_uom': self.uom_unit.id,
+            'product_uom_qty': 10,
+            'price_unit': unit_cost,
+            'picking_type_id': self.picking_type_in.id,
+        } for unit_cost in (10, 20, 0)])
+        moves._action_confirm()
+        moves._action_assign()
+        moves.picked = True
+        moves._action_done()
+
+        # the move without price is valued at the average of the previous ones
+        self.assertEqual(moves.stock_valuation_layer_ids.mapped('value'), [100, 200, 150])
+        self.assertEqual(self.product1.standard_price, 15)
+
     def test_change_in_past_increase_in_1(self):
         move1 = self._make_in_move(self.product1, 10, unit_cost=10)
         move2 = self._make_in_move(self.product1, 10, unit_cost=20)
@@ -773,6 +796,24 @@ class TestStockValuationFIFO(TestStockValuationCommon):
         self.assertEqual(self.product1.quantity_svl, 5)
         self.assertEqual(sum(self.product1.stock_valuation_layer_ids.mapped('remaining_qty')), 5)
 
+    def test_batch_candidates(self):
+        """ Valuing several outs with shared candidates gives the same layers as
+        valuing them one after the other. """
+        self.product1.product_tmpl_id.categ_id.property_valuation = 'manual_periodic'
+        move1 = self._make_in_move(self.product1, 10, unit_cost=10)
+        move2 = self._make_in_move(self.product1, 10, unit_cost=20)
+        move3 = self._make_in_move(self.product1, 10, unit_cost=30)
+
+        fifo_candidates = {}
+        vals_list = [
+            self.product1._prepare_out_svl_vals(quantity, self.env.company, fifo_candidates=fifo_candidates)
+            for quantity in (8, 8, 8, 8)
+        ]
+        self.assertEqual([vals['value'] for vals in vals_list], [-80, -140, -200, -240])
+        self.assertEqual([vals.get('remaining_qty') for vals in vals_list], [None, None, None, -2])
+        self.assertEqual((move1 | move2 | move3).stock_valuation_layer_ids.mapped('remaining_qty'), [0, 0, 0])
+        self.assertEqual(self.product1.standard_price, 30)
+
     def test_negative_1(self):
         self.product1.product_tmpl_id.categ_id.property_valuation = 'manual_periodic'
         move1 = self._make_in_move(self.product1, 10, unit_cost=10)
@@ -786,6 +827,38 @@ class TestStockValuationFIFO(TestStockValuationCommon):
         self.assertEqual(self.product1.value_svl, 400)
         self.assertEqual(self.product1.quantity_svl, 10)
 
+    def test_negative_deferred_vacuum(self):
+        self.product1.product_tmpl_id.categ_id.property_valuation = 'manual_periodic'
+        self.env['ir.config_parameter'].sudo().set_param('stock_account.fifo_vacuum_deferred', True)
+        self._make_in_move(self.product1, 10, unit_cost=10)
+        move2 = self._make_out_move(self.product1, 15)
+        self._make_in_move(self.product1, 10, unit_cost=20)
+
+        # the negative layer waits for the cron
+        self.assertEqual(move2.stock_valuation_layer_ids.remaining_qty, -5)
+        self.assertEqual(self.product1._get_fifo_vacuum_queue(), {self.env.company.id: self.product1.ids})
+        stats = self.product1._get_fifo_vacuum_queue_stats()[self.env.company.id]
+        self.assertEqual((stats['depth'], stats['ready']), (1, 1))
+
+        self.product1._cron_run_fifo_vacuum(auto_commit=False)
+        self.assertEqual(sum(move2.stock_valuation_layer_ids.mapped('remaining_qty')), 0)
+        self.assertFalse(self.product1._get_fifo_vacuum_queue())
+        self.assertEqual(self.product1.value_svl, 100)
+        self.assertEqual(self.product1.quantity_svl, 5)
+
+    def test_negative_deferred_vacuum_disabled(self):
+        self.product1.product_tmpl_id.categ_id.property_valuation = 'manual_periodic'
+        self.env['ir.config_parameter'].sudo().set_param('stock_account.fifo_vacuum_deferred', True)
+        self._make_in_move(self.product1, 10, unit_cost=10)
+        move2 = self._make_out_move(self.product1, 15)
+        self._make_in_move(self.product1, 10, unit_cost=20)
+
+        # the cron leaves the negative layers alone once the deferral is turned off
+        self.env['ir.config_parameter'].sudo().set_param('stock_account.fifo_vacuum_deferred', False)
+        self.product1._cron_run_fifo_vacuum(auto_commit=False)
+        self.assertEqual(move2.stock_valuation_layer_ids.remaining_qty, -5)
+        self.assertEqual(self.product1._get_fifo_vacuum_queue(), {self.env.company.id: self.product1.ids})
+
     def test_change_in_past_decrease_in_1(self):
         self.product1.product_tmpl_id.categ_id.property_valuation = 'manual_periodic'
         move1 = self._make_in_move(self.product1, 20, unit_cost=10)
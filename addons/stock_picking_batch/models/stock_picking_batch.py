@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+import logging
+from time import monotonic
+
 from markupsafe import Markup
 
 from odoo import api, fields, models, _
@@ -8,6 +11,9 @@ from odoo.exceptions import UserError
 from odoo.osv.expression import AND
 from odoo.tools import float_is_zero, format_list
 
+_logger = logging.getLogger(__name__)
+
+
 class StockPickingBatch(models.Model):
     _inherit = ['mail.thread', 'mail.activity.mixin']
     _name = "stock.picking.batch"
@@ -242,23 +248,38 @@ class StockPickingBatch(models.Model):
         empty_pickings = pickings.filtered(has_no_quantity)
 
         # Run sanity_check as a batch and ignore the one in button_validate() since it is done here.
+        stage_start = monotonic()
         pickings._sanity_check(separate_pickings=False)
+        timings = {'sanity_check': monotonic() - stage_start}
         # Skip sanity_check in pickings button_validate() & remove 'waiting' pickings from the batch
         context = {'skip_sanity_check': True, 'pickings_to_detach': empty_waiting_pickings.ids}
+        if self.env['ir.config_parameter'].sudo().get_param('stock_picking_batch.defer_validation_emails'):
+            context['defer_confirmation_email'] = True
         if len(empty_pickings) != len(pickings):
             # If some pickings are at least partially done, other pickings (empty & waiting) will be removed from batch without being cancelled in case of no backorder
             pickings = pickings - empty_pickings
             context['pickings_to_detach'] = context['pickings_to_detach'] + empty_pickings.ids
 
-        for picking in pickings:
-            picking.message_post(
-                body=Markup("<b>%s:</b> %s <a href=#id=%s&view_type=form&model=stock.picking.batch>%s</a>") % (
-                    _("Transferred by"),
-                    _("Batch Transfer"),
-                    picking.batch_id.id,
-                    picking.batch_id.name))
-
-        return pickings.with_context(**context).button_validate()
+        stage_start = monotonic()
+        # log the notes in batch rather than posting a message on every picking; being
+        # logged, they no longer notify the followers of the pickings
+        pickings._message_log_batch(bodies={
+            picking.id: Markup("<b>%s:</b> %s <a href=#id=%s&view_type=form&model=stock.picking.batch>%s</a>") % (
+                _("Transferred by"),
+                _("Batch Transfer"),
+                picking.batch_id.id,
+                picking.batch_id.name)
+            for picking in pickings
+        })
+        timings['messages'] = monotonic() - stage_start
+
+        stage_start = monotonic()
+        res = pickings.with_context(**context).button_validate()
+        timings['validation'] = monotonic() - stage_start
+        _logger.info(
+            "Batch %s: %d pickings validated (%s)", self.name, len(pickings),
+            ", ".join("%s %.2fs" % (stage, duration) for stage, duration in timings.items()))
+        return res
 
     def action_assign(self):
         self.ensure_one()
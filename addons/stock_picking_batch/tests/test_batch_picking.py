@@ -187,6 +187,26 @@ class TestBatchPicking(TransactionCase):
         with self.assertRaises(UserError):
             self.batch.unlink()
 
+    def test_batch_validation_deferred_emails(self):
+        """ When the validation emails are deferred, the confirmation emails of the
+        pickings of the batch are queued instead of being sent during the validation.
+        """
+        self.env['ir.config_parameter'].sudo().set_param('stock_picking_batch.defer_validation_emails', True)
+        self.env.company.stock_move_email_validation = True
+        (self.client_1 | self.client_2).write({'email': 'client@example.com'})
+        self.env['stock.quant']._update_available_quantity(self.productA, self.stock_location, 10.0)
+        self.env['stock.quant']._update_available_quantity(self.productB, self.stock_location, 10.0)
+        self.batch.action_confirm()
+        self.batch.action_assign()
+        pickings = self.picking_client_1 | self.picking_client_2
+        pickings.move_ids.write({'quantity': 10, 'picked': True})
+        self.batch.action_done()
+
+        self.assertEqual(set(pickings.mapped('state')), {'done'})
+        mails = self.env['mail.mail'].search([('model', '=', 'stock.picking'), ('res_id', 'in', pickings.ids)])
+        self.assertEqual(set(mails.mapped('res_id')), set(pickings.ids))
+        self.assertEqual(set(mails.mapped('state')), {'outgoing'})
+
     def test_simple_batch_with_wizard(self):
         """ Test a simple batch picking with all quantity for picking available.
         The user use the wizard in order to complete automatically the quantity to
@@ -92,9 +92,7 @@ class HrEmployee(models.Model):
 
             if is_department_head:
                 # Lấy tất cả phòng ban con (đệ quy) của từng phòng ban mà trưởng phòng quản lý
-                managed_department_ids = []
-                for dept in is_department_head:
-                    managed_department_ids.extend(self._get_child_departments_recursive(dept.id))
+                managed_department_ids = self._get_child_departments_recursive(is_department_head.ids)
 
                 # Kiểm tra target_employee có trong các phòng ban quản lý không (bao gồm con)
                 if target_employee.department_id.id in managed_department_ids:
@@ -102,25 +100,9 @@ class HrEmployee(models.Model):
 
         return False
 
-    def _get_child_departments_recursive(self, parent_department_id, department_ids=None):
-        """Lấy danh sách phòng ban con đệ quy"""
-        if department_ids is None:
-            department_ids = []
-
-        # Thêm phòng ban cha vào list
-        if parent_department_id not in department_ids:
-            department_ids.append(parent_department_id)
-
-        # Tìm tất cả phòng ban con trực tiếp
-        child_departments = self.env['hr.department'].search([
-            ('parent_id', '=', parent_department_id)
-        ])
-
-        # Đệ quy cho mỗi phòng ban con
-        for child in child_departments:
-            self._get_child_departments_recursive(child.id, department_ids)
-
-        return department_ids
+    def _get_child_departments_recursive(self, parent_department_ids):
+        """Lấy danh sách phòng ban và phòng ban con (mọi cấp) bằng một truy vấn trên parent_path"""
+        return self.env['hr.department'].search([('id', 'child_of', parent_department_ids)]).ids
 
     def _get_employee_detail_data(self, employee):
         """Lấy thông tin chi tiết của nhân viên"""
@@ -217,9 +199,7 @@ class HrEmployee(models.Model):
                 ])
                 if managed_depts:
                     # User là trưởng phòng, chỉ xem nhân viên trong phòng ban quản lý
-                    managed_dept_ids = []
-                    for dept in managed_depts:
-                        managed_dept_ids.extend(self._get_child_departments_recursive(dept.id))
+                    managed_dept_ids = self._get_child_departments_recursive(managed_depts.ids)
                     domain.append(('department_id', 'in', managed_dept_ids))
                 else:
                     # User không phải trưởng phòng, chỉ xem chính mình